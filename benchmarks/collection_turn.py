@@ -0,0 +1,152 @@
+"""
+Per-turn cost of the collection phase: at most one structured call vs. the previous two calls.
+
+Replays a scripted conversation through collect_info_node against a fake model that
+records prompt sizes and sleeps a fixed per-call latency plus a per-token cost; turns the
+slot parser fully understands get a templated reply and make no call. As a
+reference it replays the same turns through the previous flow (a JSON extraction call
+followed by a separate reply call), then reports LLM calls, input tokens and latency per turn.
+Input tokens are estimated from message text; the function schema Gemini receives for the
+structured call is not counted.
+
+Usage:
+    python -m benchmarks.collection_turn --latency 0.4 --ms-per-1k-tokens 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_GEMINI_MODEL", "benchmark")
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+import src.agents.SupervisorAgent as supervisor
+from src.models.TripState import TripState
+from src.tools import llm_registry
+from src.tools.slot_parser import parse_slots
+
+CONVERSATION = [
+    "Hi! I'm thinking about a vacation.",
+    "We'd like to go from Atlanta to Lisbon",
+    "4 people",
+    "Leaving 2026-05-01 and coming back 2026-05-08",
+    "About $2500 each, and we love food tours and museums",
+]
+
+# What the fake model "understands" from each user message
+FIELDS_BY_MESSAGE = {
+    CONVERSATION[1]: {"origin": "Atlanta", "destination": "Lisbon"},
+    CONVERSATION[4]: {"budget_per_person": 2500, "interests": "food tours and museums"},
+}
+
+
+def _tokens(messages) -> int:
+    # ~4 characters per token is close enough to compare prompts of the same language
+    return sum(len(m.content) for m in messages) // 4
+
+
+class RecordingModel:
+    def __init__(self, latency: float, ms_per_1k_tokens: float):
+        self.latency = latency
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.calls = 0
+        self.input_tokens = 0
+
+    async def _charge(self, messages):
+        tokens = _tokens(messages)
+        self.calls += 1
+        self.input_tokens += tokens
+        await asyncio.sleep(self.latency + tokens / 1000 * self.ms_per_1k_tokens / 1000)
+
+    def _fields(self, messages) -> dict:
+        return next((fields for text, fields in FIELDS_BY_MESSAGE.items() if text in messages[-1].content), {})
+
+    async def ainvoke(self, messages):
+        await self._charge(messages)
+        if "Return ONLY valid JSON" in messages[0].content:
+            return AIMessage(content=json.dumps(self._fields(messages)))
+        return AIMessage(content="Sounds wonderful! Could you tell me a bit more about your plans? " * 3)
+
+    def with_structured_output(self, schema):
+        model = self
+
+        class Structured:
+            async def ainvoke(self, messages):
+                await model._charge(messages)
+                return schema(**model._fields(messages), reply="Sounds wonderful! Could you tell me a bit more? " * 3)
+
+        return Structured()
+
+
+async def _two_call_turn(llm: RecordingModel, state: TripState) -> dict:
+    """The previous collection flow: JSON extraction call, then a separate reply call."""
+    known = dict(state.collected_fields)
+    user_message, assistant_message = supervisor._latest_exchange(state.messages)
+    parsed, understood = parse_slots(user_message, known)
+    known.update(parsed)
+    if not understood:
+        response = await llm.ainvoke([
+            SystemMessage(content="Update the known travel details with the user's latest message.\n"
+                                  "Return ONLY valid JSON with these exact keys, use null for fields the latest message doesn't mention: "
+                                  '{"origin": ..., "destination": ..., "num_people": ..., "start_date": ..., "end_date": ..., '
+                                  '"budget_per_person": ..., "interests": ...}'),
+            HumanMessage(content=f"Known details: {json.dumps(known)}\nAssistant's last message: {assistant_message}\n"
+                                 f"User's latest message: {user_message}"),
+        ])
+        known.update(json.loads(response.content))
+    missing = [f for f in supervisor.REQUIRED_FIELDS if not known.get(f)]
+    reply = await llm.ainvoke([
+        SystemMessage(content=supervisor.COLLECTION_PROMPT),
+        *state.messages[-2:],
+        HumanMessage(content=f"Known so far: {known}. These fields are still missing: {missing}. Ask the user for them naturally."),
+    ])
+    return {"collected_fields": known, "messages": [reply]}
+
+
+async def _replay(turn_fn, llm: RecordingModel) -> list[float]:
+    state = TripState()
+    latencies = []
+    for text in CONVERSATION:
+        state = state.model_copy(update={"messages": state.messages + [HumanMessage(content=text)]})
+        started = time.perf_counter()
+        update = await turn_fn(state)
+        latencies.append(time.perf_counter() - started)
+        state = state.model_copy(update={
+            "collected_fields": update["collected_fields"],
+            "messages": state.messages + [AIMessage(content=update["messages"][0].content)],
+        })
+    return latencies
+
+
+async def run(latency: float, ms_per_1k_tokens: float):
+    logging.getLogger().setLevel(logging.WARNING)
+    turns = len(CONVERSATION)
+    rows = []
+
+    previous = RecordingModel(latency, ms_per_1k_tokens)
+    rows.append(("two calls (previous)", previous, await _replay(lambda state: _two_call_turn(previous, state), previous)))
+
+    merged = RecordingModel(latency, ms_per_1k_tokens)
+    llm_registry.set_chat_model_factory(lambda name, temperature: merged)
+    rows.append(("at most one call", merged, await _replay(supervisor.collect_info_node, merged)))
+
+    print(f"{turns} turns, {latency * 1000:.0f}ms per call + {ms_per_1k_tokens:.0f}ms per 1k input tokens\n")
+    print(f"{'flow':<22}{'calls/turn':>12}{'input tok/turn':>16}{'latency/turn':>14}")
+    for name, model, latencies in rows:
+        print(f"{name:<22}{model.calls / turns:>12.2f}{model.input_tokens / turns:>16.0f}{sum(latencies) / turns * 1000:>12.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.4, help="seconds of fixed latency per LLM call")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=20, help="extra latency per 1k input tokens")
+    args = parser.parse_args()
+    asyncio.run(run(args.latency, args.ms_per_1k_tokens))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Deterministic stand-ins for Gemini and DuckDuckGo used by the benchmarks.
+
+install_fakes() plugs them in through the real extension points - the LLM registry's
+chat model factory and the search client's backend - so everything between the graph
+and the network (caches, rate limiting, retries, extraction) still runs. Latency,
+failure rate and payload size are configurable, and all randomness comes from a seeded RNG.
+"""
+import asyncio
+import logging
+import random
+import typing
+from dataclasses import dataclass
+from typing import Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from pydantic import BaseModel
+
+from src.tools import llm_registry
+from src.tools.search_client import set_search_backend
+
+TRIP_MESSAGE = "Plan a trip from Atlanta to Lisbon for 2 people, 2026-05-01 to 2026-05-08, budget $2500 each. We like food and museums."
+
+TRIP_FIELDS = {
+    "origin": "Atlanta",
+    "destination": "Lisbon",
+    "num_people": 2,
+    "start_date": "2026-05-01",
+    "end_date": "2026-05-08",
+    "budget_per_person": 2500,
+    "interests": "food and museums",
+}
+
+
+@dataclass
+class FakeConfig:
+    llm_latency: float = 0.2        # seconds per LLM call
+    search_latency: float = 0.2     # seconds per search
+    jitter: float = 0.0             # +/- fraction applied to both latencies
+    llm_failure_rate: float = 0.0   # probability an LLM call raises
+    search_failure_rate: float = 0.0
+    options_per_result: int = 5     # options per list in canned structured outputs
+    sparse_rate: float = 0.0        # probability each optional field (and price) of an option comes back empty
+    search_bytes: int = 2000        # size of each fake search result
+    plan_chars: int = 4000          # size of the synthesized plan
+    seed: int = 7
+
+
+class FakeBackendError(RuntimeError):
+    pass
+
+
+class _Fakes:
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.llm_calls = 0
+        self.searches = 0
+
+    async def sleep(self, latency: float):
+        if self.config.jitter:
+            latency *= 1 + self.rng.uniform(-self.config.jitter, self.config.jitter)
+        await asyncio.sleep(latency)
+
+    def maybe_fail(self, rate: float, what: str):
+        if rate and self.rng.random() < rate:
+            raise FakeBackendError(f"fake {what} failure")
+
+
+def fake_value(annotation, index: int = 0, options: int = 1, rng: Optional[random.Random] = None, name: str = ""):
+    """Build a plausible value for a pydantic field annotation."""
+    rng = rng or random.Random(index)
+    if typing.get_origin(annotation) is typing.Union:
+        annotation = next(a for a in typing.get_args(annotation) if a is not type(None))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fake_instance(annotation, index, options, rng)
+    if typing.get_origin(annotation) is list:
+        args = typing.get_args(annotation)
+        return [fake_value(args[0], i, options, rng) for i in range(options)] if args else []
+    if annotation is float:
+        return round(rng.uniform(20, 400), 2)
+    if annotation is int:
+        return rng.randint(1, 5)
+    if annotation is list:
+        return [f"Sample {name} {index}"]
+    if name.endswith("url"):
+        return f"https://example.com/{name}/{index}"
+    return f"Sample {name} {index}"
+
+
+def fake_instance(
+    schema: type[BaseModel], index: int = 0, options: int = 1, rng: Optional[random.Random] = None, sparse_rate: float = 0.0
+) -> BaseModel:
+    """A schema instance with every field populated - lists get `options` entries, each optional field is left empty with `sparse_rate`."""
+    rng = rng or random.Random(index)
+    values = {}
+    for name, field in schema.model_fields.items():
+        value = fake_value(field.annotation, index, options, rng, name)
+        if isinstance(value, list) and value and isinstance(value[0], BaseModel) and sparse_rate:
+            value = [_sparsify(option, rng, sparse_rate) for option in value]
+        values[name] = value
+    return schema(**values)
+
+
+def _sparsify(option: BaseModel, rng: random.Random, rate: float) -> BaseModel:
+    updates = {}
+    for name, field in type(option).model_fields.items():
+        if rng.random() >= rate:
+            continue
+        if not field.is_required():
+            updates[name] = field.default
+        elif name.startswith("price"):
+            updates[name] = 0.0
+    return option.model_copy(update=updates)
+
+
+class FakeStructuredLLM:
+    def __init__(self, fakes: _Fakes, schema: type[BaseModel]):
+        self.fakes = fakes
+        self.schema = schema
+
+    async def ainvoke(self, messages, config=None):
+        self.fakes.llm_calls += 1
+        await self.fakes.sleep(self.fakes.config.llm_latency)
+        self.fakes.maybe_fail(self.fakes.config.llm_failure_rate, "LLM")
+        if "reply" in self.schema.model_fields:
+            # Collection turn: the trip details plus the assistant's reply
+            return self.schema(**TRIP_FIELDS, reply="Great, starting research on your trip!")
+        return fake_instance(
+            self.schema, options=self.fakes.config.options_per_result, rng=self.fakes.rng, sparse_rate=self.fakes.config.sparse_rate
+        )
+
+
+class FakeChatModel:
+    """Stands in for ChatGoogleGenerativeAI."""
+
+    def __init__(self, fakes: _Fakes):
+        self.fakes = fakes
+
+    async def ainvoke(self, messages, config=None):
+        self.fakes.llm_calls += 1
+        await self.fakes.sleep(self.fakes.config.llm_latency)
+        self.fakes.maybe_fail(self.fakes.config.llm_failure_rate, "LLM")
+        text = "Here is your trip plan. "
+        return AIMessage(content=(text * (self.fakes.config.plan_chars // len(text) + 1))[:self.fakes.config.plan_chars])
+
+    async def astream(self, messages, config=None):
+        message = await self.ainvoke(messages)
+        for start in range(0, len(message.content), 200):
+            yield AIMessageChunk(content=message.content[start:start + 200])
+
+    def with_structured_output(self, schema):
+        return FakeStructuredLLM(self.fakes, schema)
+
+
+def install_fakes(config: Optional[FakeConfig] = None, quiet: bool = True) -> _Fakes:
+    """Route every LLM call and web search in the process to the fakes and return their counters."""
+    if quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+    fakes = _Fakes(config or FakeConfig())
+    model = FakeChatModel(fakes)
+
+    async def fake_search(query: str) -> str:
+        fakes.searches += 1
+        await fakes.sleep(fakes.config.search_latency)
+        fakes.maybe_fail(fakes.config.search_failure_rate, "search")
+        snippet = f"{query.strip()[:60]}: Sample listing, from $120 per person, https://example.com/listing. "
+        return (snippet * (fakes.config.search_bytes // len(snippet) + 1))[:fakes.config.search_bytes]
+
+    llm_registry.set_chat_model_factory(lambda name, temperature: model)
+    # The real client still coalesces and retries; lift the rate limits so they don't dominate the numbers
+    set_search_backend(fake_search, rate=1e6, burst=1_000_000, max_concurrency=10_000)
+    return fakes
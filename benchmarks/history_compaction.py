@@ -0,0 +1,119 @@
+"""
+Per-turn prompt and session size over a long conversation, with and without history compaction.
+
+Replays a long collection-phase conversation (the user chats but never gives a budget, so
+every turn runs compact_history and collect_info) through the checkpointed travel graph
+against a fake model that records the collection prompt's size. After each turn it reads
+the session's checkpoint and reports the collection prompt's input tokens, the tokens and
+messages kept in TripState.messages, and the serialized size of that history. With compaction
+the kept history stays within HISTORY_MAX_TOKENS plus one exchange at any conversation length;
+the check fails if the kept history, or the prompt built from it, ever passes that bound.
+
+Usage:
+    python -m benchmarks.history_compaction --turns 60
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import uuid
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_GEMINI_MODEL", "benchmark")
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import src.agents.SupervisorAgent as supervisor
+from src.app.session_store import InMemorySessionStore, state_serializer
+from src.tools import history_compaction, llm_registry, speculative_research
+
+USER_MESSAGES = [
+    "We'd like to go from Atlanta to Lisbon, probably four of us.",
+    "Dates are 2026-05-01 to 2026-05-08. My sister might join, she loves old churches and tiled facades.",
+    "Still thinking about money, honestly. Last time we overspent on restaurants and I'd rather not repeat that.",
+    "Is Lisbon hilly? My dad has a bad knee, so lots of stairs could be a problem for him.",
+    "We also talked about a day trip to Sintra, but nobody wants to spend the whole day on trains.",
+    "Could you remind me what you still need? I keep getting distracted by the pastel de nata videos.",
+]
+REPLY = "That sounds lovely! I still need your budget per person before I can start researching. " * 2
+
+
+class RecordingModel:
+    """Collection model that records each prompt's size and never finds new fields."""
+
+    def __init__(self):
+        self.prompt_tokens: list[int] = []
+
+    def with_structured_output(self, schema):
+        model = self
+
+        class Structured:
+            async def ainvoke(self, messages, config=None):
+                model.prompt_tokens.append(history_compaction.history_tokens(messages))
+                return schema(reply=REPLY)
+
+        return Structured()
+
+
+async def _replay(turns: int, compaction: bool) -> list[tuple[int, int, int, int]]:
+    """Per turn: (collection prompt tokens, kept history tokens, kept messages, serialized history bytes)."""
+    history_compaction.HISTORY_COMPACTION = compaction
+    model = RecordingModel()
+    llm_registry.set_chat_model_factory(lambda name, temperature: model)
+    graph = supervisor.build_graph(checkpointer=InMemorySessionStore())
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    serializer = state_serializer()
+    rows = []
+    for turn in range(turns):
+        text = USER_MESSAGES[turn % len(USER_MESSAGES)]
+        await graph.ainvoke({"messages": [HumanMessage(content=f"{text} (message {turn + 1})")]}, config=config)
+        messages = (await graph.aget_state(config)).values["messages"]
+        rows.append((
+            model.prompt_tokens[-1],
+            history_compaction.history_tokens(messages),
+            len(messages),
+            len(serializer.dumps_typed(messages)[1]),
+        ))
+    return rows
+
+
+def _turn_tokens(turns: int) -> int:
+    """Most tokens one exchange adds to the history: the longest user message and the reply."""
+    longest = max(USER_MESSAGES, key=len)
+    return history_compaction.history_tokens([HumanMessage(content=f"{longest} (message {turns})"), AIMessage(content=REPLY)])
+
+
+async def run(turns: int) -> bool:
+    logging.getLogger().setLevel(logging.WARNING)
+    # Only the collection phase is measured; don't start research for the known destination
+    speculative_research.SPECULATIVE_RESEARCH = False
+    results = {"off": await _replay(turns, False), "on": await _replay(turns, True)}
+
+    print(f"{turns} turns, HISTORY_MAX_TOKENS={history_compaction.HISTORY_MAX_TOKENS}, keep {history_compaction.HISTORY_KEEP_MESSAGES} messages\n")
+    print(f"{'turn':>5}  {'compaction':<11}{'prompt tok':>11}{'history tok':>13}{'messages':>10}{'history KB':>12}")
+    shown = sorted({1, 5, 10, *range(20, turns + 1, 20), turns} & set(range(1, turns + 1)))
+    for turn in shown:
+        for name, rows in results.items():
+            prompt, history, messages, size = rows[turn - 1]
+            print(f"{turn:>5}  {name:<11}{prompt:>11}{history:>13}{messages:>10}{size / 1024:>12.1f}")
+
+    on = results["on"]
+    limit = history_compaction.HISTORY_MAX_TOKENS + _turn_tokens(turns)
+    # The prompt adds the same instructions to the kept history every turn; measure them on the first turn
+    prompt_limit = on[0][0] - on[0][1] + limit
+    passed = max(row[1] for row in on) <= limit and max(row[0] for row in on) <= prompt_limit
+    print(f"\nkept history limit {limit} tokens, prompt limit {prompt_limit} tokens")
+    print("PASS" if passed else "FAIL: per-turn prompt or kept history outgrows HISTORY_MAX_TOKENS plus one exchange with compaction on")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=60, help="user messages in the conversation")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.turns)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Load test for the async /plan request path.
+
+Runs the FastAPI app in-process (one event loop, i.e. one uvicorn worker) against the fake
+Gemini and DuckDuckGo backends from benchmarks/fakes.py, which await a fixed latency
+instead of doing network I/O.
+It fires N concurrent planning sessions and probes /health while they run. If anything
+on the request path blocks the event loop, wall time approaches N x single-session time
+and /health latency spikes to the length of a whole plan.
+
+Usage:
+    python -m benchmarks.load_test --sessions 50 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "load-test")
+os.environ.setdefault("GOOGLE_GEMINI_MODEL", "load-test")
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+import httpx
+
+from benchmarks.fakes import TRIP_MESSAGE, FakeConfig, install_fakes
+from src.app.main import app
+
+async def _plan(client: httpx.AsyncClient, session_id: str) -> float:
+    started = time.perf_counter()
+    response = await client.post("/plan", json={"message": TRIP_MESSAGE, "session_id": session_id})
+    response.raise_for_status()
+    assert response.json()["done"], f"session {session_id} did not finish planning"
+    return time.perf_counter() - started
+
+
+async def _probe_health(client: httpx.AsyncClient, stop: asyncio.Event, samples: list[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+
+
+async def run(sessions: int, latency: float) -> bool:
+    install_fakes(FakeConfig(llm_latency=latency, search_latency=latency))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        single = await _plan(client, "warmup")
+
+        stop = asyncio.Event()
+        health_samples: list[float] = []
+        probe = asyncio.create_task(_probe_health(client, stop, health_samples))
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(_plan(client, f"session-{i}") for i in range(sessions)))
+        wall = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    serial_estimate = single * sessions
+    print(f"single session:        {single:.2f}s")
+    print(f"{sessions} concurrent sessions: {wall:.2f}s wall (serial would be ~{serial_estimate:.2f}s)")
+    print(f"session latency:       median {statistics.median(latencies):.2f}s, max {max(latencies):.2f}s")
+    print(f"/health during load:   {len(health_samples)} probes, max {max(health_samples) * 1000:.1f}ms")
+
+    # The event loop is shared by every session, so concurrency only holds if nothing blocks it
+    passed = wall < single * 3 and max(health_samples) < latency
+    print("PASS" if passed else "FAIL: the event loop is being blocked")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent planning sessions")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake LLM/search call")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.sessions, args.latency)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Offline benchmark suite for orchestration overhead.
+
+Drives full planning sessions through travel_graph directly and through the FastAPI /plan
+endpoint (in-process, over httpx's ASGI transport) with the fake Gemini and DuckDuckGo
+backends from benchmarks/fakes.py, at several concurrency levels. For each target and
+level it reports p50/p95/p99 session latency, throughput, fake backend calls and extraction
+retries per session and peak traced memory (measured in a second, untimed pass). Caches
+are off unless --cache is given, so every session does the full amount of work.
+
+Usage:
+    python -m benchmarks.run --concurrency 1 10 50 --sessions 100
+    python -m benchmarks.run --llm-latency 0.05 --search-latency 0.05 --llm-failure-rate 0.1 --json results.json
+    python -m benchmarks.run --sparse-rate 0.4 --targets graph    # patchy extractions exercise the retry loop
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+import uuid
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_GEMINI_MODEL", "benchmark")
+
+import httpx
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fakes import TRIP_MESSAGE, FakeConfig, install_fakes
+from src.agents.SupervisorAgent import travel_graph
+from src.app.main import app
+from src.models.TripState import TripState
+from src.tools.metrics import EXTRACTION_RETRIES
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+async def _graph_session(_client) -> None:
+    await travel_graph.ainvoke(TripState(messages=[HumanMessage(content=TRIP_MESSAGE)]))
+
+
+async def _api_session(client: httpx.AsyncClient) -> None:
+    response = await client.post("/plan", json={"message": TRIP_MESSAGE, "session_id": str(uuid.uuid4())})
+    response.raise_for_status()
+
+
+TARGETS = {"graph": _graph_session, "api": _api_session}
+
+
+async def _drive(session_fn, client, concurrency: int, sessions: int) -> tuple[list[float], int, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await session_fn(client)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(sessions)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def _run_level(session_fn, client, concurrency: int, sessions: int) -> dict:
+    latencies, errors, wall = await _drive(session_fn, client, concurrency, sessions)
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "errors": errors,
+        "p50": percentile(latencies, 50) if latencies else None,
+        "p95": percentile(latencies, 95) if latencies else None,
+        "p99": percentile(latencies, 99) if latencies else None,
+        "throughput": len(latencies) / wall,
+        "peak_mb": None,
+    }
+
+
+async def _peak_memory_mb(session_fn, client, concurrency: int, sessions: int) -> float:
+    # tracemalloc slows every allocation, so peak memory comes from a separate, untimed pass
+    tracemalloc.start()
+    try:
+        await _drive(session_fn, client, concurrency, sessions)
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+async def run(args) -> list[dict]:
+    config = FakeConfig(
+        llm_latency=args.llm_latency,
+        search_latency=args.search_latency,
+        jitter=args.jitter,
+        llm_failure_rate=args.llm_failure_rate,
+        search_failure_rate=args.search_failure_rate,
+        options_per_result=args.options,
+        sparse_rate=args.sparse_rate,
+        search_bytes=args.search_bytes,
+        seed=args.seed,
+    )
+    results = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        for target in args.targets:
+            for concurrency in args.concurrency:
+                fakes = install_fakes(config)
+                sessions = max(args.sessions, concurrency)
+                retries_before = EXTRACTION_RETRIES.total()
+                result = await _run_level(TARGETS[target], client, concurrency, sessions)
+                result.update({
+                    "target": target,
+                    "llm_calls_per_session": fakes.llm_calls / sessions,
+                    "searches_per_session": fakes.searches / sessions,
+                    "retries_per_session": (EXTRACTION_RETRIES.total() - retries_before) / sessions,
+                })
+                if args.memory:
+                    install_fakes(config)
+                    result["peak_mb"] = await _peak_memory_mb(TARGETS[target], client, concurrency, sessions)
+                results.append(result)
+                _print_row(result)
+    return results
+
+
+def _ms(value) -> str:
+    return f"{value * 1000:.0f}" if value is not None else "-"
+
+
+def _mb(value) -> str:
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def _print_header():
+    print(f"{'target':<7}{'conc':>6}{'sessions':>9}{'errors':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'sess/s':>9}{'peak MB':>9}{'llm/sess':>9}{'search/sess':>12}{'retry/sess':>11}")
+
+
+def _print_row(r: dict):
+    print(f"{r['target']:<7}{r['concurrency']:>6}{r['sessions']:>9}{r['errors']:>7}{_ms(r['p50']):>9}{_ms(r['p95']):>9}"
+          f"{_ms(r['p99']):>9}{r['throughput']:>9.1f}{_mb(r['peak_mb']):>9}{r['llm_calls_per_session']:>9.1f}"
+          f"{r['searches_per_session']:>12.1f}{r['retries_per_session']:>11.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=["graph", "api"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 10, 50])
+    parser.add_argument("--sessions", type=int, default=50, help="sessions per concurrency level")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--options", type=int, default=5, help="options per canned extraction result")
+    parser.add_argument("--sparse-rate", type=float, default=0.0, help="chance each optional field of an extracted option is empty")
+    parser.add_argument("--search-bytes", type=int, default=2000, help="size of each fake search result")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--cache", action="store_true", help="leave the search/extraction caches enabled")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the traced peak-memory pass")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ["CACHE_BACKEND"] = "none"
+    _print_header()
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Final-turn latency with and without speculative research.
+
+Replays a scripted multi-turn conversation through travel_graph with the fake backends from
+benchmarks/fakes.py, pausing --think-time seconds between turns as a user typing would. With
+speculation on, collect_info starts the agents whose inputs are known during those pauses, so
+the last turn (the one that runs dispatch and synthesis) only waits for what is left. A third
+run changes the destination mid-conversation to show that the runs for the old destination
+are cancelled and redone. Caches are off so every run does the full amount of work.
+
+Usage:
+    python -m benchmarks.speculative_research --think-time 2 --llm-latency 0.4 --search-latency 0.3
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_GEMINI_MODEL", "benchmark")
+
+from langchain_core.messages import HumanMessage
+
+import src.agents.SupervisorAgent as supervisor
+from benchmarks.fakes import FakeConfig, install_fakes
+from src.models.TripState import TripState
+from src.tools import speculative_research
+
+CONVERSATION = [
+    ("We'd like to go from Atlanta to Lisbon, we love food tours and museums", {"origin": "Atlanta", "destination": "Lisbon", "interests": "food tours and museums"}),
+    ("Leaving 2026-05-01 and coming back 2026-05-08", {}),
+    ("4 people, about $2500 each", {"num_people": 4, "budget_per_person": 2500}),
+]
+# Same trip, but the user switches to Porto after giving the dates
+CHANGED_DESTINATION = [
+    CONVERSATION[0],
+    CONVERSATION[1],
+    ("Actually, make it Porto instead", {"destination": "Porto"}),
+    CONVERSATION[2],
+]
+
+
+class ScriptedCollection:
+    """Collection-turn model that returns the scripted fields for each user message."""
+
+    def __init__(self, fakes, script):
+        self.fakes = fakes
+        self.fields = dict(script)
+
+    async def ainvoke(self, messages, config=None):
+        self.fakes.llm_calls += 1
+        await self.fakes.sleep(self.fakes.config.llm_latency)
+        text = messages[-1].content.split("User's latest message: ")[1].split("\n")[0]
+        return supervisor.CollectionTurn(**self.fields.get(text, {}), reply="Got it! Anything else?")
+
+
+async def _replay(fakes, script, think_time: float) -> tuple[float, int]:
+    """Returns the final turn's latency and the searches made over the whole conversation."""
+    supervisor.get_collection_turn_llm = lambda: ScriptedCollection(fakes, script)
+    config = {"configurable": {"session_id": str(uuid.uuid4())}}
+    searches = fakes.searches
+    state = TripState()
+    latency = 0.0
+    for text, _ in script:
+        state = state.model_copy(update={"messages": state.messages + [HumanMessage(content=text)]})
+        started = time.perf_counter()
+        state = TripState(**await supervisor.travel_graph.ainvoke(state, config=config))
+        latency = time.perf_counter() - started
+        if state.final_plan is None:
+            await asyncio.sleep(think_time)
+    return latency, fakes.searches - searches
+
+
+async def run(think_time: float, config: FakeConfig):
+    fakes = install_fakes(config)
+    rows = []
+    for name, enabled, script in [
+        ("speculation off", False, CONVERSATION),
+        ("speculation on", True, CONVERSATION),
+        ("on, destination changed", True, CHANGED_DESTINATION),
+    ]:
+        speculative_research.SPECULATIVE_RESEARCH = enabled
+        rows.append((name, *await _replay(fakes, script, think_time)))
+
+    print(f"{think_time:.1f}s think time, {config.llm_latency * 1000:.0f}ms LLM / {config.search_latency * 1000:.0f}ms search latency\n")
+    print(f"{'run':<26}{'final turn':>12}{'searches':>10}")
+    for name, latency, searches in rows:
+        print(f"{name:<26}{latency:>11.2f}s{searches:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--think-time", type=float, default=2.0, help="seconds the user takes to answer each turn")
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="seconds per fake LLM call")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="seconds per fake search")
+    args = parser.parse_args()
+    os.environ["CACHE_BACKEND"] = "none"
+    asyncio.run(run(args.think_time, FakeConfig(llm_latency=args.llm_latency, search_latency=args.search_latency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from src.models.ResearchResults import ActivityOption
 from src.models.TripState import TripState
 from src.tools.data_extraction_tool import extract_with_retry
+from src.tools.result_scoring import score_options
 
 logger = logging.getLogger(__name__)
 
@@ -29,24 +30,26 @@ SYSTEM_PROMPT = """
     - Do not invent activities that are not in the search results
 """
 
-def activities_agent(state: TripState) -> dict:
+async def activities_agent(state: TripState) -> dict:
     req = state.trip_request
-    query = f"""
-        Find popular activities, tours, and attractions in {req.destination} suitable for a group of {req.num_people} people.
-        Include museums, historical sites, outdoor activities, guided tours, adventure activities, and cultural experiences.
-        Include pricing, duration, booking URLs, and operating hours.
-        """
+    # One focused search per category, run concurrently
+    queries = [
+        f"top attractions and museums in {req.destination} ticket prices opening hours",
+        f"best guided tours in {req.destination} price duration",
+        f"{req.interests} in {req.destination}" if req.interests else f"outdoor and adventure activities in {req.destination}",
+    ]
     
-    result = extract_with_retry(
-        query=query,
+    result = await extract_with_retry(
+        query=queries,
         system_prompt=SYSTEM_PROMPT,
         output_schema=ActivityResults,
-        is_good_result=lambda r: bool(r.activities) and any(f.location for f in r.activities),
+        score_result=lambda r: score_options(r.activities),
+        target_score=0.45,
         agent_name="ActivitiesAgent"
     )
 
-    activities = [f.model_dump() for f in result.activities] if result else []
+    activities = [f.model_dump() for f in result.data.activities] if result.data else []
     return {"research": {
         "activities": activities},
-        "failed_agents": state.failed_agents + ([result.agent_name] if not result.success else [])
+        "failed_agents": [result.agent_name] if not result.success else []
     }
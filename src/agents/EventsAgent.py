@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from src.models.ResearchResults import EventOption
 from src.models.TripState import TripState
 from src.tools.data_extraction_tool import extract_with_retry
+from src.tools.result_scoring import score_options
 
 logger = logging.getLogger(__name__)
 
@@ -28,24 +29,26 @@ SYSTEM_PROMPT = """
     - Do not invent events that are not in the search results
 """
 
-def events_agent(state: TripState) -> dict:
+async def events_agent(state: TripState) -> dict:
     req = state.trip_request
-    query = f"""
-        Find events and entertainment happening in {req.destination} between {req.start_date} and {req.end_date}.
-        Look for concerts, shows, theater performances, festivals, exhibitions, and other entertainment options.
-        Include booking URLs, ticket prices, and event timings.
-        """
+    # One focused search per kind of event, run concurrently
+    queries = [
+        f"events in {req.destination} {req.start_date} to {req.end_date}",
+        f"concerts and theater shows in {req.destination} {req.travel_month} tickets",
+        f"festivals and exhibitions in {req.destination} {req.travel_month}",
+    ]
     
-    result = extract_with_retry(
-        query=query,
+    result = await extract_with_retry(
+        query=queries,
         system_prompt=SYSTEM_PROMPT,
         output_schema=EventResults,
-        is_good_result=lambda r: bool(r.events) and any(f.location for f in r.events),
+        score_result=lambda r: score_options(r.events),
+        target_score=0.4,
         agent_name="EventsAgent"
     )
 
-    events = [f.model_dump() for f in result.events] if result else []
+    events = [f.model_dump() for f in result.data.events] if result.data else []
     return {
         "research": {"events": events}, 
-        "failed_agents": state.failed_agents + ([result.agent_name] if not result.success else [])
+        "failed_agents": [result.agent_name] if not result.success else []
     }
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from src.models.ResearchResults import FlightOption
 from src.models.TripState import TripState
 from src.tools.data_extraction_tool import extract_with_retry
+from src.tools.result_scoring import score_options
 
 logger = logging.getLogger(__name__)
 
@@ -26,27 +27,29 @@ SYSTEM_PROMPT = """
     - Do not invent flights that are not in the search results
 """
 
-def flights_agent(state: TripState) -> dict:
+async def flights_agent(state: TripState) -> dict:
     logger.info("FlightsAgent: Starting flight research")
     req = state.trip_request
-    query = f"""
-        Find flights from {req.origin} to {req.destination}
-        departing around {req.start_date} and returning around {req.end_date}
-        show a range of prices and airlines, and include booking URLs if available.
-        """
-    logger.debug(f"FlightsAgent: Search query - {query.strip()}")
+    # Focused sub-queries searched concurrently - DuckDuckGo does poorly with one long paragraph
+    queries = [
+        f"flights {req.origin} to {req.destination} {req.start_date} return {req.end_date} prices",
+        f"cheap flights {req.origin} to {req.destination} {req.travel_month}",
+        f"nonstop flights {req.origin} to {req.destination} airlines booking",
+    ]
+    logger.debug(f"FlightsAgent: Search queries - {queries}")
     
-    result = extract_with_retry(
-        query=query,
+    result = await extract_with_retry(
+        query=queries,
         system_prompt=SYSTEM_PROMPT,
         output_schema=FlightResults,
-        is_good_result=lambda r: bool(r.flights) and any(f.price > 0 for f in r.flights),
+        score_result=lambda r: score_options(r.flights),
+        target_score=0.5,
         agent_name="FlightsAgent"
     )
 
-    flights = [f.model_dump() for f in result.data.flights] if result.success and result.data else []
+    flights = [f.model_dump() for f in result.data.flights] if result.data else []
     logger.info(f"FlightsAgent: Found {len(flights)} flight options")
     return {"research": {
         "flights": flights},
-        "failed_agents": state.failed_agents + ([result.agent_name] if not result.success else [])
+        "failed_agents": [result.agent_name] if not result.success else []
     }
\ No newline at end of file
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from src.models.ResearchResults import HotelOption
 from src.models.TripState import TripState
 from src.tools.data_extraction_tool import extract_with_retry
+from src.tools.result_scoring import score_options
 
 logger = logging.getLogger(__name__)
 
@@ -29,23 +30,26 @@ SYSTEM_PROMPT = """
     - Do not invent hotels that are not in the search results
 """
 
-def hotels_agent(state: TripState) -> dict:
+async def hotels_agent(state: TripState) -> dict:
     req = state.trip_request
-    query = f"""
-        Find accommodations in {req.destination}. Look for Hotels, well-rated hostels, and Airbnbs that are available around {req.start_date} to {req.end_date}.
-        show a range of prices and options, and include booking URLs if available.
-        """
+    # One focused search per price tier, run concurrently
+    queries = [
+        f"best budget hotels and hostels in {req.destination} price per night",
+        f"best mid-range hotels in {req.destination} {req.travel_month}",
+        f"luxury hotels and Airbnb apartments in {req.destination} booking",
+    ]
     
-    result = extract_with_retry(
-        query=query,
+    result = await extract_with_retry(
+        query=queries,
         system_prompt=SYSTEM_PROMPT,
         output_schema=HotelResults,
-        is_good_result=lambda r: bool(r.hotels) and any(f.price > 0 for f in r.hotels),
+        score_result=lambda r: score_options(r.hotels, price_field="price_per_night"),
+        target_score=0.5,
         agent_name="HotelsAgent"
     )
 
-    hotels = [f.model_dump() for f in result.hotels] if result else []
+    hotels = [f.model_dump() for f in result.data.hotels] if result.data else []
     return {"research": {
         "hotels": hotels},
-        "failed_agents": state.failed_agents + ([result.agent_name] if not result.success else [])
+        "failed_agents": [result.agent_name] if not result.success else []
     }
\ No newline at end of file
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from src.models.ResearchResults import RestaurantOption
 from src.models.TripState import TripState
 from src.tools.data_extraction_tool import extract_with_retry
+from src.tools.result_scoring import score_options
 
 logger = logging.getLogger(__name__)
 
@@ -28,25 +29,26 @@ SYSTEM_PROMPT = """
     - Do not invent restaurants that are not in the search results
 """
 
-def restaurants_agent(state: TripState) -> dict:
+async def restaurants_agent(state: TripState) -> dict:
     req = state.trip_request
-    query = f"""
-        Find highly-rated restaurants in {req.destination}.
-        Look for a variety of cuisine types and price ranges suitable for a group of {req.num_people} people.
-        Include upscale dining, casual restaurants, and local favorites.
-        Include reservation URLs if available, and recommended dishes.
-        """
+    # One focused search per price tier, run concurrently
+    queries = [
+        f"best local restaurants in {req.destination} must try dishes",
+        f"cheap eats and casual restaurants in {req.destination}",
+        f"fine dining restaurants in {req.destination} reservations",
+    ]
     
-    result = extract_with_retry(
-        query=query,
+    result = await extract_with_retry(
+        query=queries,
         system_prompt=SYSTEM_PROMPT,
         output_schema=RestaurantResults,
-        is_good_result=lambda r: bool(r.restaurants) and any(f.location for f in r.restaurants),
+        score_result=lambda r: score_options(r.restaurants, price_field="price_range", url_field="reservation_url"),
+        target_score=0.45,
         agent_name="RestaurantsAgent"
     )
 
-    restaurants = [f.model_dump() for f in result.restaurants] if result else []
+    restaurants = [f.model_dump() for f in result.data.restaurants] if result.data else []
     return {"research": {
         "restaurants": restaurants},
-        "failed_agents": state.failed_agents + ([result.agent_name] if not result.success else [])
+        "failed_agents": [result.agent_name] if not result.success else []
     }
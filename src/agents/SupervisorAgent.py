@@ -1,20 +1,36 @@
 import json
 import os
 import logging
+import time
+import asyncio
+import contextlib
+from typing import Optional
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
-from langgraph.types import Send
+from langgraph.config import get_stream_writer
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
 from src.models.TripState import TripState
 from src.models.TripRequest import TripRequest
-from src.agents.FlightsAgent import flights_agent
-from src.agents.HotelsAgent import hotels_agent
-from src.agents.RestaurantAgent import restaurants_agent
-from src.agents.ActivitiesAgent import activities_agent
-from src.agents.EventsAgent import events_agent
-from src.agents.TransportationAgent import transportation_agent
+from src.tools import llm_registry
+from src.tools.env_config import env_flag
+from src.tools.slot_parser import normalize_date, parse_slots
+from src.tools import late_research, speculative_research
+from src.tools.data_extraction_tool import extraction_deadline
+from src.tools.history_compaction import compact_history
+from src.tools.budget_optimizer import describe_breakdown, optimize_budget
+from src.tools.research_queue import get_research_queue, run_research
+from src.tools.research_context import build_research_context
+from src.tools.tracing import current_span, span, traced
+from src.agents.FlightsAgent import flights_agent, FlightResults
+from src.agents.HotelsAgent import hotels_agent, HotelResults
+from src.agents.RestaurantAgent import restaurants_agent, RestaurantResults
+from src.agents.ActivitiesAgent import activities_agent, ActivityResults
+from src.agents.EventsAgent import events_agent, EventResults
+from src.agents.TransportationAgent import transportation_agent, TransportationResults
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -28,14 +44,15 @@ It will also manage the state of the trip planning process and ensure that all n
 is collected before moving to the next step.    
 """
 
-# LLMs - lazy loaded
-def get_collection_llm():
-    logger.debug("Initializing collection LLM (Google Gemini - temperature=0)")
-    return ChatGoogleGenerativeAI(model=os.getenv("GOOGLE_GEMINI_MODEL"), temperature=0)
+# LLMs - built on first use and shared through the registry
+COLLECTION_TEMPERATURE = 0
+SYNTHESIS_TEMPERATURE = 0.3
+
+def get_collection_turn_llm():
+    return llm_registry.get_structured_llm(CollectionTurn, temperature=COLLECTION_TEMPERATURE)
 
 def get_synthesis_llm():
-    logger.debug("Initializing synthesis LLM (Google Gemini - temperature=0.3)")
-    return ChatGoogleGenerativeAI(model=os.getenv("GOOGLE_GEMINI_MODEL"), temperature=0.3)
+    return llm_registry.get_chat_model(temperature=SYNTHESIS_TEMPERATURE)
 
 
 COLLECTION_PROMPT = """You are a friendly travel planning assistant.
@@ -57,48 +74,126 @@ Rules:
 """
 
 
-def collect_info_node(state: TripState) -> dict:
+class CollectionTurn(BaseModel):
+    """One collection-phase LLM call: the fields in the user's latest message plus the reply to send."""
+    origin: Optional[str] = Field(default=None, description="Departure city, if the latest message gives or corrects it")
+    destination: Optional[str] = Field(default=None, description="Destination, if the latest message gives or corrects it")
+    num_people: Optional[int] = Field(default=None, description="Number of travelers, if given")
+    start_date: Optional[str] = Field(default=None, description="Departure date as YYYY-MM-DD, if given")
+    end_date: Optional[str] = Field(default=None, description="Return date as YYYY-MM-DD, if given")
+    budget_per_person: Optional[float] = Field(default=None, description="Budget per person in USD, if given")
+    interests: Optional[str] = Field(default=None, description="Activities the travelers enjoy, if given")
+    reply: str = Field(description="The message to send to the user")
+
+
+REQUIRED_FIELDS = ["origin", "destination", "num_people", "start_date", "end_date", "budget_per_person"]
+FIELD_LABELS = {
+    "origin": "where you're leaving from",
+    "destination": "where you'd like to go",
+    "num_people": "how many people are traveling",
+    "start_date": "your departure date",
+    "end_date": "your return date",
+    "budget_per_person": "your budget per person",
+}
+
+
+def _templated_reply(data: dict, missing: list[str]) -> str:
+    """The reply for a turn the slot parser fully understood, so it needs no LLM call."""
+    if missing:
+        labels = [FIELD_LABELS[f] for f in missing]
+        asks = labels[0] if len(labels) == 1 else f"{', '.join(labels[:-1])} and {labels[-1]}"
+        return f"Got it, thanks! To start planning I still need {asks}."
+    travelers = f"{data['num_people']} traveler{'s' if int(data['num_people']) != 1 else ''}"
+    interests = f", interested in {data['interests']}" if data.get("interests") else ""
+    return (f"Perfect! Here's your trip: {travelers} from {data['origin']} to {data['destination']}, "
+            f"{data['start_date']} to {data['end_date']}, with a budget of ${float(data['budget_per_person']):,.0f} per person{interests}. "
+            f"I'm starting the research now!")
+
+
+def _normalize_dates(extracted: dict) -> dict:
+    """The LLM's fields with dates as YYYY-MM-DD; a date the slot parser can't read is dropped."""
+    for field in ("start_date", "end_date"):
+        if field in extracted:
+            iso = normalize_date(extracted[field])
+            if iso is None:
+                logger.warning(f"collect_info_node: Ignoring unparseable {field} {extracted[field]!r} from the LLM")
+                del extracted[field]
+            else:
+                extracted[field] = iso
+    return extracted
+
+
+def _session_id(config: Optional[RunnableConfig]) -> Optional[str]:
+    """The session the graph runs for: the checkpoint thread_id, or configurable.session_id without a checkpointer."""
+    configurable = (config or {}).get("configurable", {})
+    return configurable.get("thread_id") or configurable.get("session_id")
+
+
+def _latest_exchange(messages: list) -> tuple[str, str]:
+    """The newest user message and the assistant message it replies to."""
+    user_message, assistant_message = "", ""
+    for message in reversed(messages):
+        if message.type == "human" and not user_message:
+            user_message = message.content
+        elif message.type == "ai" and user_message:
+            assistant_message = message.content
+            break
+    return user_message, assistant_message
+
+
+@traced("compact_history")
+async def compact_history_node(state: TripState) -> dict:
+    """Folds older turns into the rolling history summary once the conversation passes HISTORY_MAX_TOKENS."""
+    update = compact_history(state.messages, state.collected_fields, state.missing_fields)
+    return {"messages": update} if update else {}
+
+
+@traced("collect_info")
+async def collect_info_node(state: TripState, config: RunnableConfig = None) -> dict:
     """
-    Extracts trip details from conversation.
-    Loops until all required fields are present.
+    Updates the collected trip fields from the newest user message and replies, in at most one LLM call.
+    The deterministic slot parser fills plain dates, numbers and budgets first; a message it fully
+    understands gets a templated reply, anything else goes to the structured call, which returns the
+    remaining fields from the latest message together with the user-facing reply.
+    While fields are still missing, research agents whose inputs are already known start speculatively.
     """
     logger.info("collect_info_node: Starting information collection")
     messages = state.messages
     logger.debug(f"collect_info_node: Current message count: {len(messages)}")
 
-    # Try to extract whatever the user has given us so far
-    llm = get_collection_llm()
-    logger.debug("collect_info_node: Invoking LLM to extract travel details")
-    extraction_response = llm.invoke([
-        SystemMessage(content="""Extract travel details from this conversation.
-            Return ONLY valid JSON with these exact keys, use null for missing fields:
-            {
-                "origin": string or null,
-                "destination": string or null,
-                "num_people": number or null,
-                "start_date": string or null,
-                "end_date": string or null,
-                "budget_per_person": number or null,
-                "interests": string or null
-            }"""),
-        *messages
-    ])
-
-    try:
-        raw = extraction_response.content.strip()
-        # Strip markdown code blocks if the model adds them
-        if "```" in raw:
-            raw = raw.split("```")[1].replace("json", "").strip()
-        data = json.loads(raw)
-        logger.debug(f"collect_info_node: Extracted data: {data}")
-    except json.JSONDecodeError:
-        # Model didn't return valid JSON — just keep the conversation going
-        logger.warning("collect_info_node: LLM response was not valid JSON")
-        data = {}
+    known = dict(state.collected_fields)
+    user_message, assistant_message = _latest_exchange(messages)
+    parsed, understood = parse_slots(user_message, known)
+    # Parser guesses only fill open fields; changing a known one is left to the LLM
+    corrections = {f: v for f, v in parsed.items() if known.get(f) not in (None, "", v)}
+    known.update({f: v for f, v in parsed.items() if f not in corrections})
+    understood = understood and not corrections
+    logger.debug(f"collect_info_node: Pre-parser found {parsed} (fully understood: {understood}, unconfirmed changes: {corrections})")
+    still_missing = [f for f in REQUIRED_FIELDS if not known.get(f)]
+
+    if understood:
+        # The parser explained the whole message, so the reply is templated and no LLM call is made
+        logger.debug("collect_info_node: Message fully parsed, replying without the LLM")
+        data, reply = known, _templated_reply(known, still_missing)
+    else:
+        logger.debug("collect_info_node: Invoking structured LLM for field extraction and reply")
+        with span("llm", purpose="collection"):
+            turn = await get_collection_turn_llm().ainvoke([
+                SystemMessage(content=COLLECTION_PROMPT),
+                HumanMessage(content=f"""Known details: {json.dumps(known)}
+Still missing before this message: {still_missing}
+Assistant's last message: {assistant_message or '(none)'}
+User's latest message: {user_message}
+
+Fill in only the fields the user's latest message gives or corrects, leaving the rest null. Write dates as YYYY-MM-DD.
+Then write the reply: if every required field is now known, confirm all the details back warmly and say you're starting research; otherwise ask naturally for the ones still missing.""")
+            ])
+        extracted = _normalize_dates(turn.model_dump(exclude={"reply"}, exclude_none=True))
+        logger.debug(f"collect_info_node: Extracted data: {extracted}")
+        data, reply = {**known, **extracted}, turn.reply
 
     # Check what's still missing
-    required = ["origin", "destination", "num_people", "start_date", "end_date", "budget_per_person"]
-    missing = [f for f in required if not data.get(f)]
+    missing = [f for f in REQUIRED_FIELDS if not data.get(f)]
     logger.info(f"collect_info_node: Missing fields: {missing}")
 
     if not missing:
@@ -115,33 +210,24 @@ def collect_info_node(state: TripState) -> dict:
         )
         logger.info(f"collect_info_node: Trip request created - {trip_request}")
 
-        logger.debug("collect_info_node: Invoking LLM for confirmation message")
-        confirm = llm.invoke([
-            SystemMessage(content=COLLECTION_PROMPT),
-            *messages,
-            HumanMessage(content=f"Confirm these trip details back to the user warmly and tell them you're starting research: {data}")
-        ])
-
         return {
             "trip_request": trip_request,
+            "collected_fields": data,
             "missing_fields": [],
             "next_step": "dispatch",
-            "messages": [AIMessage(content=confirm.content)]
+            "messages": [AIMessage(content=reply)]
         }
 
     else:
-        # Ask for only the missing fields
+        # The reply already asks for the missing fields
         logger.debug(f"collect_info_node: Asking for missing fields: {missing}")
-        response = llm.invoke([
-            SystemMessage(content=COLLECTION_PROMPT),
-            *messages,
-            HumanMessage(content=f"These fields are still missing: {missing}. Ask the user for them naturally.")
-        ])
-
+        # Research whatever the known fields allow while the user answers
+        speculative_research.speculate(_session_id(config), data, AGENTS)
         return {
+            "collected_fields": data,
             "missing_fields": missing,
             "next_step": "collect_info",
-            "messages": [AIMessage(content=response.content)]
+            "messages": [AIMessage(content=reply)]
         }
         
 
@@ -154,26 +240,133 @@ AGENTS = [
     ("transportation_agent", transportation_agent),
 ]
 
+# ResearchResults section each agent fills
+AGENT_SECTIONS = {
+    "flights_agent": "flights",
+    "hotels_agent": "hotels",
+    "restaurants_agent": "restaurants",
+    "activities_agent": "activities",
+    "events_agent": "events",
+    "transportation_agent": "transportation_options",
+}
+
+
+async def warm_up_llms():
+    """Build every client and structured-output runnable the graph uses, so the first /plan doesn't pay for it."""
+    extraction_schemas = [FlightResults, HotelResults, RestaurantResults, ActivityResults, EventResults, TransportationResults]
+    await llm_registry.warm_up(
+        temperatures=(COLLECTION_TEMPERATURE, SYNTHESIS_TEMPERATURE),
+        structured=[(schema, 0) for schema in extraction_schemas] + [(CollectionTurn, COLLECTION_TEMPERATURE)],
+    )
+
 
-def dispatch_node(state: TripState) -> dict:
-    logger.info("dispatch_node: Starting agent dispatch")
+# Upper bound on research agents running at the same time - lower it to ease search rate limits
+MAX_CONCURRENT_AGENTS = max(1, int(os.getenv("MAX_CONCURRENT_AGENTS", str(len(AGENTS)))))
+
+# How long dispatch waits for research before synthesizing with what's done (0 = wait for every agent)
+DISPATCH_DEADLINE_SECONDS = float(os.getenv("DISPATCH_DEADLINE_SECONDS", "45"))
+# Keep late agents running and patch their results into the session afterwards, instead of cancelling them
+DISPATCH_FOLLOW_UP = env_flag("DISPATCH_FOLLOW_UP", True)
+
+
+async def _run_agent(
+    name: str,
+    agent_fn,
+    state: TripState,
+    semaphore: asyncio.Semaphore,
+    speculative: Optional[asyncio.Task] = None,
+    session_id: Optional[str] = None,
+) -> tuple[str, Optional[dict]]:
+    # A speculative run is already going and queued jobs are bounded by the worker pool, so waiting for either doesn't take a slot
+    async with semaphore if speculative is None and get_research_queue() is None else contextlib.nullcontext():
+        logger.info(f"dispatch_node: {'Awaiting speculative' if speculative else 'Running'} {name}")
+        with span(name, speculative=speculative is not None) as agent_span:
+            try:
+                return name, await (speculative if speculative is not None else run_research(name, agent_fn, state, session_id))
+            except Exception as e:
+                logger.error(f"dispatch_node: {name} failed with exception: {str(e)}", exc_info=True)
+                agent_span.error = f"{type(e).__name__}: {e}"
+                return name, None
+
+
+@traced("dispatch")
+async def dispatch_node(state: TripState, config: RunnableConfig = None) -> dict:
+    """
+    Fans the research agents out as concurrent tasks, bounded by MAX_CONCURRENT_AGENTS.
+    Each agent returns its own research slice; the TripState reducers merge the slices
+    and failed agent names, so dispatch time tracks the slowest agent rather than the sum.
+    Agents started speculatively during collection with the same inputs are awaited, not rerun.
+    With RESEARCH_QUEUE on, each agent runs as a job in the research worker pool instead.
+    After DISPATCH_DEADLINE_SECONDS synthesis goes ahead with the finished slices; agents still
+    running are marked failed and, with DISPATCH_FOLLOW_UP, left to finish as a follow-up patch.
+    """
+    logger.info(f"dispatch_node: Starting agent dispatch (max {MAX_CONCURRENT_AGENTS} concurrent)")
     research_updates = {}
     failed = []
 
-    for name, agent_fn in AGENTS:
-        logger.info(f"dispatch_node: Running {name}")
-        try:
-            result = agent_fn(state)
-            research_updates.update(result.get("research", {}))
-            failed_this_run = result.get("failed_agents", [])
-            if failed_this_run:
-                logger.warning(f"dispatch_node: {name} reported failures: {failed_this_run}")
-                failed.extend(failed_this_run)
-            else:
-                logger.debug(f"dispatch_node: {name} completed successfully")
-        except Exception as e:
-            logger.error(f"dispatch_node: {name} failed with exception: {str(e)}", exc_info=True)
-            failed.append(name)
+    # Progress events for /plan/stream - a no-op when the graph isn't streamed
+    writer = get_stream_writer()
+    session_id = _session_id(config)
+    speculative = speculative_research.claim(session_id, state.trip_request)
+    writer({"type": "research_started", "agents": [name for name, _ in AGENTS], "speculative": list(speculative)})
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_AGENTS)
+    deadline = DISPATCH_DEADLINE_SECONDS or None
+    follow_up = DISPATCH_FOLLOW_UP and session_id is not None
+    # Late agents that will be cancelled stop extracting a little before the deadline, so they return their
+    # best partial result in time; ones that can follow up keep their own extraction budget
+    with extraction_deadline(deadline * 0.9) if deadline and not follow_up else contextlib.nullcontext():
+        tasks = {
+            asyncio.ensure_future(_run_agent(name, agent_fn, state, semaphore, speculative.get(name), session_id)): name
+            for name, agent_fn in AGENTS
+        }
+
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + deadline if deadline else None
+    pending = set(tasks)
+    try:
+        while pending:
+            timeout = stop_at - loop.time() if stop_at is not None else None
+            if timeout is not None and timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for finished in done:
+                name, result = finished.result()
+                if result is None:
+                    failed.append(name)
+                    writer({"type": "agent_finished", "agent": name, "success": False, "results": 0})
+                    continue
+                research_updates.update(result.get("research", {}))
+                failed_this_run = result.get("failed_agents", [])
+                if failed_this_run:
+                    logger.warning(f"dispatch_node: {name} reported failures: {failed_this_run}")
+                    # Recorded under the dispatch name, like crashed and late agents, so follow-up patches can clear it
+                    failed.append(name)
+                else:
+                    logger.debug(f"dispatch_node: {name} completed successfully")
+                writer({
+                    "type": "agent_finished",
+                    "agent": name,
+                    "success": not failed_this_run,
+                    "results": sum(len(options) for options in result.get("research", {}).values()),
+                })
+    except asyncio.CancelledError:
+        for task in pending:
+            task.cancel()
+        raise
+
+    if pending:
+        late = {tasks[task]: task for task in pending}
+        logger.warning(f"dispatch_node: Deadline of {DISPATCH_DEADLINE_SECONDS}s passed, continuing without {list(late)}")
+        current_span().set("late_agents", ",".join(late))
+        failed.extend(late)
+        for name in late:
+            writer({"type": "agent_late", "agent": name})
+        if follow_up:
+            late_research.track(session_id, late)
+        else:
+            for task in pending:
+                task.cancel()
 
     logger.info(f"dispatch_node: Agent dispatch complete. Failed agents: {failed}")
     return {
@@ -182,6 +375,13 @@ def dispatch_node(state: TripState) -> dict:
     }
     
     
+@traced("budget")
+async def budget_node(state: TripState) -> dict:
+    """Computes the cost breakdown from the research prices so synthesis quotes numbers instead of doing arithmetic."""
+    logger.info("budget_node: Optimizing budget breakdown")
+    return {"budget_breakdown": optimize_budget(state.research, state.trip_request)}
+
+
 SYNTHESIS_PROMPT = """You are a master travel planner creating a final trip itinerary.
 You will be given structured research data from multiple specialist agents.
 Write a comprehensive, practical, and engaging trip plan.
@@ -200,17 +400,22 @@ Structure your response exactly like this:
 Rules:
 - Stay within the budget_per_person provided
 - If an agent failed and returned no data, explicitly tell the user that section could not be researched rather than making something up
+- If an agent returned partial results, use them but tell the user that section is based on incomplete research
 - Be specific — use real names, real prices from the research data
-- Budget breakdown must add up and must not exceed budget_per_person
+- Use the computed BUDGET BREAKDOWN for the budget section and your picks, quoting its numbers as given instead of recalculating them; if it says Not computed, give rough estimates and say they are estimates
 """
 
 
-def synthesis_node(state: TripState) -> dict:
+@traced("synthesis")
+async def synthesis_node(state: TripState) -> dict:
     logger.info("synthesis_node: Starting synthesis of trip plan")
     req = state.trip_request
     research = state.research
+    # Agents that hit a deadline or ran out of retries can still have returned their best options
+    partial = [name for name in state.failed_agents if name in AGENT_SECTIONS and getattr(research, AGENT_SECTIONS[name])]
+    missing = [name for name in state.failed_agents if name not in partial]
 
-    # Build context from structured research data
+    # Build a compact, token-budgeted context from the structured research data
     research_context = f"""
 TRIP DETAILS:
 - From: {req.origin} to {req.destination}
@@ -220,79 +425,91 @@ TRIP DETAILS:
 - Interests: {req.interests or 'not specified'}
 
 FAILED AGENTS (no data available for these):
-{state.failed_agents if state.failed_agents else 'None — all agents succeeded'}
-
-FLIGHTS:
-{research.flights if research.flights else 'No data'}
-
-HOTELS:
-{research.hotels if research.hotels else 'No data'}
+{', '.join(missing) if missing else 'None'}
 
-RESTAURANTS:
-{research.restaurants if research.restaurants else 'No data'}
+PARTIAL RESULTS (incomplete, low-confidence data for these):
+{', '.join(partial) if partial else 'None'}
 
-ACTIVITIES:
-{research.activities if research.activities else 'No data'}
+{build_research_context(research)}
 
-EVENTS:
-{research.events if research.events else 'No data'}
-
-TRANSPORTATION:
-{research.transportation_options if research.transportation_options else 'No data'}
+BUDGET BREAKDOWN (computed from the research prices, per person and group totals in USD):
+{describe_breakdown(state.budget_breakdown)}
 """
 
-    logger.debug("synthesis_node: Invoking synthesis LLM to create final trip plan")
+    logger.debug("synthesis_node: Streaming synthesis LLM to create final trip plan")
     synthesis_llm = get_synthesis_llm()
-    response = synthesis_llm.invoke([
-        SystemMessage(content=SYNTHESIS_PROMPT),
-        HumanMessage(content=research_context)
-    ])
+    writer = get_stream_writer()
+    writer({"type": "synthesis_started"})
+    # Stream so /plan/stream can forward tokens as they arrive; ainvoke callers just get the joined text
+    parts = []
+    with span("llm", purpose="synthesis") as llm_span:
+        started = time.perf_counter()
+        async for chunk in synthesis_llm.astream([
+            SystemMessage(content=SYNTHESIS_PROMPT),
+            HumanMessage(content=research_context)
+        ]):
+            if chunk.text:
+                if not parts:
+                    llm_span.set("first_token_ms", round((time.perf_counter() - started) * 1000, 1))
+                parts.append(chunk.text)
+                writer({"type": "token", "content": chunk.text})
+    final_plan = "".join(parts)
     
     logger.info("synthesis_node: Trip plan synthesis complete")
-    logger.debug(f"synthesis_node: Final plan length: {len(response.content)} characters")
+    logger.debug(f"synthesis_node: Final plan length: {len(final_plan)} characters")
 
     return {
-        "final_plan": response.content,
+        "final_plan": final_plan,
         "next_step": "done",
-        "messages": [AIMessage(content=response.content)]
+        "messages": [AIMessage(content=final_plan)]
     }
 
     
 def route_after_collection(state: TripState) -> str:
     if state.next_step == "dispatch":
         return "dispatch"
-    return "collect_info"
+    return "wait_for_user"
 
     
-def build_graph():
+def build_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """
+    The planning graph. With a checkpointer each session is a thread (thread_id = session_id)
+    and the run pauses after collect_info, so a turn resumes from the session's checkpoint
+    and research only starts once the caller continues the run.
+    """
     graph = StateGraph(TripState)
 
     # Register all nodes
+    graph.add_node("compact_history", compact_history_node)
     graph.add_node("collect_info", collect_info_node)
     graph.add_node("dispatch", dispatch_node)
+    graph.add_node("budget", budget_node)
     graph.add_node("synthesis", synthesis_node)
 
-    # Entry point — always start at collect_info
-    graph.add_edge(START, "collect_info")
+    # Entry point — bound the history, then collect_info
+    graph.add_edge(START, "compact_history")
+    graph.add_edge("compact_history", "collect_info")
 
     # After collect_info — conditional routing
     graph.add_conditional_edges(
         "collect_info",          # from this node
         route_after_collection,  # run this function to decide
         {
-            "collect_info": "collect_info",  # if it returns "collect_info" → loop back
-            "dispatch": "dispatch"           # if it returns "dispatch" → move forward
+            "wait_for_user": END,   # fields still missing → end the turn, the next /plan call resumes collection
+            "dispatch": "dispatch"  # if it returns "dispatch" → move forward
         }
     )
 
-    # After dispatch — always go to synthesis
-    graph.add_edge("dispatch", "synthesis")
+    # After dispatch — price the trip, then synthesis
+    graph.add_edge("dispatch", "budget")
+    graph.add_edge("budget", "synthesis")
 
     # After synthesis — done
     graph.add_edge("synthesis", END)
 
-    return graph.compile()  # allow interruption only during info collection
+    # allow interruption only during info collection
+    return graph.compile(checkpointer=checkpointer, interrupt_after=["collect_info"] if checkpointer is not None else None)
 
 
-# Module level graph instance
+# Module level graph instance without checkpoints - callers pass the whole TripState
 travel_graph = build_graph()
\ No newline at end of file
@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from src.models.ResearchResults import TransportationOption
 from src.models.TripState import TripState
 from src.tools.data_extraction_tool import extract_with_retry
+from src.tools.result_scoring import score_options
 
 logger = logging.getLogger(__name__)
 
@@ -29,27 +30,26 @@ SYSTEM_PROMPT = """
     - Do not invent transportation services that are not in the search results
 """
 
-def transportation_agent(state: TripState) -> dict:
+async def transportation_agent(state: TripState) -> dict:
     req = state.trip_request
-    query = f"""
-        Find local transportation options in {req.destination}.
-        Look for public transportation (metro, buses, trains), taxis, rideshare services, and other transit options.
-        Include pricing, routes, schedules, and booking URLs if available.
-        Focus on transportation within the city and options for getting around during the trip.
-        Look for options that are suitable for a group of {req.num_people} people. 
-        If not, just provide general transportation options available in the city.
-        """
+    # One focused search per mode of transport, run concurrently
+    queries = [
+        f"{req.destination} public transport metro bus tickets prices",
+        f"{req.destination} airport to city center train taxi",
+        f"taxi and rideshare in {req.destination} fares",
+    ]
     
-    result = extract_with_retry(
-        query=query,
+    result = await extract_with_retry(
+        query=queries,
         system_prompt=SYSTEM_PROMPT,
         output_schema=TransportationResults,
-        is_good_result=lambda r: bool(r.transportation_options) and any(f.type for f in r.transportation_options),
+        score_result=lambda r: score_options(r.transportation_options),
+        target_score=0.4,
         agent_name="TransportationAgent"
     )
 
-    transportation = [f.model_dump() for f in result.transportation_options] if result else []
+    transportation = [f.model_dump() for f in result.data.transportation_options] if result.data else []
     return {"research": {
-        "transportation": transportation},
-        "failed_agents": state.failed_agents + ([result.agent_name] if not result.success else [])
+        "transportation_options": transportation},
+        "failed_agents": [result.agent_name] if not result.success else []
     }
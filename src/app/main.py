@@ -1,7 +1,11 @@
 import os
+import json
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from langchain_core.messages import HumanMessage
 
@@ -15,12 +19,41 @@ logger = logging.getLogger(__name__)
 # Load environment variables first
 load_dotenv()
 
-from src.agents.SupervisorAgent import travel_graph
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from src.agents.SupervisorAgent import build_graph, warm_up_llms
 from src.models.TripState import TripState
+from src.app.session_store import get_session_store
+from src.app.prewarm import PrewarmScheduler
+from src.app.research_workers import ResearchWorkerPool
+from src.tools import late_research, speculative_research
+from src.tools.research_queue import get_research_queue
+from src.tools.metrics import render_prometheus
+from src.tools.tracing import span
 
 logger.info("Application started - all modules loaded successfully")
 
-app = FastAPI()
+# Plan requests currently running - the pre-warm scheduler only works while this is low
+_active_requests = 0
+prewarmer = PrewarmScheduler(active_requests=lambda: _active_requests)
+# Research worker processes, when research goes through the job queue (RESEARCH_QUEUE=on)
+research_workers = ResearchWorkerPool() if get_research_queue() is not None else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build shared LLM clients up front so the first /plan doesn't pay initialization cost
+    await warm_up_llms()
+    if research_workers is not None:
+        research_workers.start()
+    prewarmer.start()
+    yield
+    await prewarmer.stop()
+    if research_workers is not None:
+        await research_workers.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 class MessageRequest(BaseModel):
@@ -28,9 +61,10 @@ class MessageRequest(BaseModel):
     session_id: str
 
 
-# In-memory session store
-# Each session_id maps to a TripState
-sessions: dict[str, TripState] = {}
+# Bounded session store (in-process LRU or SQLite, see SESSION_STORE)
+# Each session_id is a checkpointed thread of the travel graph
+sessions: BaseCheckpointSaver = get_session_store()
+travel_graph = build_graph(checkpointer=sessions)
 
 
 @app.get("/health")
@@ -39,57 +73,200 @@ async def health():
     return {"status": "ok"}
 
 
-@app.post("/plan")
-async def plan(request: MessageRequest):
+def _graph_config(session_id: str) -> dict:
+    # The session id is the checkpoint thread; nodes also attach speculative research runs to it
+    return {"configurable": {"thread_id": session_id}}
+
+
+async def _load_session(session_id: str) -> TripState:
+    snapshot = await travel_graph.aget_state(_graph_config(session_id))
+    return TripState(**snapshot.values)
+
+
+async def _run_turn(request: MessageRequest, stream_mode):
+    """
+    Run one turn from the session's checkpoint, yielding the graph's stream chunks.
+    New sessions and sessions waiting for details get the message as input; the run pauses
+    after collect_info and is continued into research once every field is known. A session
+    interrupted before research finished gets the message added to its history and is resumed
+    where it stopped (its trip request is already complete), and a finished plan runs nothing.
+    """
     logger.info(f"New request received - Session: {request.session_id}, Message: {request.message[:100]}...")
-    
-    # Get existing session or create fresh state
-    state = sessions.get(request.session_id, TripState())
-    if request.session_id in sessions:
-        logger.info(f"Resuming existing session: {request.session_id}")
+    config = _graph_config(request.session_id)
+    snapshot = await travel_graph.aget_state(config)
+    if snapshot.values.get("final_plan"):
+        logger.info(f"Session {request.session_id} already has a plan; serving it")
+        return
+    if snapshot.next:
+        logger.info(f"Resuming session {request.session_id} at {snapshot.next} after recording the new message")
+        # Keeps the resume point: the update is applied as the node that last ran
+        await travel_graph.aupdate_state(config, {"messages": [HumanMessage(content=request.message)]})
+        graph_input = None
     else:
-        logger.info(f"Creating new session: {request.session_id}")
+        logger.info(f"{'Continuing' if snapshot.values else 'Creating new'} session: {request.session_id}")
+        graph_input = {"messages": [HumanMessage(content=request.message)]}
+
+    while True:
+        async for chunk in travel_graph.astream(graph_input, config=config, stream_mode=stream_mode):
+            yield chunk
+        snapshot = await travel_graph.aget_state(config)
+        if not snapshot.next:
+            return
+        # Paused after collect_info with every field known - continue into research
+        graph_input = None
+
+
+def _finish_turn(session_id: str, updated_state: TripState, planned: bool) -> dict:
+    """Build the response payload from the session's state after the turn."""
+    if planned and updated_state.final_plan and updated_state.trip_request:
+        prewarmer.record(updated_state.trip_request.destination)
+    logger.info(f"Travel graph completed successfully for session {session_id}")
+    logger.debug(f"Updated state - Next step: {updated_state.next_step}, Missing fields: {updated_state.missing_fields}")
+
+    # Get the last AI message to return to the user
+    ai_messages = [
+        m for m in updated_state.messages
+        if hasattr(m, "type") and m.type == "ai"
+    ]
+    last_message = ai_messages[-1].content if ai_messages else "Something went wrong."
+
+    response = {
+        "response": last_message,
+        "final_plan": updated_state.final_plan,
+        "research": updated_state.research.model_dump() if updated_state.final_plan else None,
+        "budget_breakdown": updated_state.budget_breakdown if updated_state.final_plan else None,
+        "done": updated_state.final_plan is not None,
+        # Agents that missed the dispatch deadline; their results are patched into the session when they finish
+        "pending_agents": late_research.pending(session_id),
+    }
+    logger.info(f"Response prepared for session {session_id} - Plan complete: {response['done']}")
+    return response
+
 
-    # Add the user's message to existing state
-    state = state.model_copy(update={
-        "messages": state.messages + [HumanMessage(content=request.message)]
-    })
-    logger.debug(f"Message added to state. Total messages: {len(state.messages)}")
+# Background tasks applying late research to sessions served by /plan
+_follow_ups: set[asyncio.Task] = set()
 
+
+async def _follow_up(session_id: str):
+    """Merge each late agent's research into the stored session as it finishes, yielding the patch events."""
+    async for name, update in late_research.follow_ups(session_id):
+        state = await _load_session(session_id)
+        if state.final_plan:
+            await travel_graph.aupdate_state(_graph_config(session_id), late_research.patch_update(state, name, update))
+        yield late_research.patch_payload(name, update)
+
+
+async def _apply_follow_ups(session_id: str):
+    async for _ in _follow_up(session_id):
+        pass
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint: span latency histograms, token and retry counters, cache hit rates."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/plan")
+async def plan(request: MessageRequest):
+    """
+    One conversation turn. Sessions resume from their checkpoint; once a plan is done it is
+    served again without running the graph (clear the session to plan another trip).
+    """
+    global _active_requests
+    _active_requests += 1
     try:
         logger.info(f"Invoking travel graph for session {request.session_id}")
-        result = travel_graph.invoke(state)
-        updated_state = TripState(**result)
-        sessions[request.session_id] = updated_state
-        logger.info(f"Travel graph completed successfully for session {request.session_id}")
-        logger.debug(f"Updated state - Next step: {updated_state.next_step}, Missing fields: {updated_state.missing_fields}")
-
-        # Get the last AI message to return to the user
-        ai_messages = [
-            m for m in updated_state.messages
-            if hasattr(m, "type") and m.type == "ai"
-        ]
-        last_message = ai_messages[-1].content if ai_messages else "Something went wrong."
-
-        response = {
-            "response": last_message,
-            "final_plan": updated_state.final_plan,
-            "research": updated_state.research.model_dump() if updated_state.final_plan else None,
-            "budget_breakdown": updated_state.budget_breakdown if updated_state.final_plan else None,
-            "done": updated_state.final_plan is not None
-        }
-        logger.info(f"Response prepared for session {request.session_id} - Plan complete: {response['done']}")
+        planned = False
+        with span("plan_request", session_id=request.session_id):
+            async for _ in _run_turn(request, stream_mode="updates"):
+                planned = True
+        response = _finish_turn(request.session_id, await _load_session(request.session_id), planned)
+        if response["pending_agents"]:
+            task = asyncio.create_task(_apply_follow_ups(request.session_id))
+            _follow_ups.add(task)
+            task.add_done_callback(_follow_ups.discard)
         return response
 
     except Exception as e:
         logger.error(f"Error processing request for session {request.session_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        _active_requests -= 1
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/plan/stream")
+async def plan_stream(request: MessageRequest):
+    """
+    Same turn as /plan, streamed as Server-Sent Events:
+    `research_started` / `agent_finished` as each research agent completes, `synthesis_started`,
+    one `token` event per synthesis chunk, then `done` carrying the /plan response (or `error`).
+    If agents missed the dispatch deadline (`agent_late`), the stream stays open after `done`
+    and sends a `research_patch` event for each one that finishes.
+    """
+    async def events():
+        global _active_requests
+        _active_requests += 1
+        try:
+            logger.info(f"Streaming travel graph for session {request.session_id}")
+            planned = False
+            with span("plan_request", session_id=request.session_id, streaming=True):
+                async for mode, chunk in _run_turn(request, stream_mode=["custom", "updates"]):
+                    planned = True
+                    if mode == "custom":
+                        yield _sse(chunk["type"], chunk)
+            yield _sse("done", _finish_turn(request.session_id, await _load_session(request.session_id), planned))
+            async for patch in _follow_up(request.session_id):
+                yield _sse("research_patch", patch)
+        except Exception as e:
+            logger.error(f"Error streaming request for session {request.session_id}: {str(e)}", exc_info=True)
+            yield _sse("error", {"type": "error", "detail": str(e)})
+        finally:
+            _active_requests -= 1
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/plan/{session_id}/status")
+async def plan_status(session_id: str):
+    """
+    Where a session's planning stands, for polling: `stage` is `new`, `collecting`, the graph
+    node the run continues at (e.g. `dispatch` while research runs) or `done`, and `jobs` lists
+    the latest research job per agent when research goes through the worker queue.
+    """
+    snapshot = await travel_graph.aget_state(_graph_config(session_id))
+    state = TripState(**snapshot.values)
+    if state.final_plan:
+        stage = "done"
+    elif snapshot.next:
+        stage = snapshot.next[0]
+    else:
+        stage = "collecting" if snapshot.values else "new"
+    queue = get_research_queue()
+    return {
+        "session_id": session_id,
+        "stage": stage,
+        "done": state.final_plan is not None,
+        "missing_fields": state.missing_fields,
+        "failed_agents": state.failed_agents,
+        "pending_agents": late_research.pending(session_id),
+        "jobs": await asyncio.to_thread(queue.session_jobs, session_id) if queue is not None else [],
+    }
 
 
 @app.delete("/session/{session_id}")
 async def clear_session(session_id: str):
     """Clear a session so the user can start a new trip."""
     logger.info(f"Clearing session: {session_id}")
-    sessions.pop(session_id, None)
+    await sessions.adelete_thread(session_id)
+    speculative_research.cancel(session_id)
+    late_research.cancel(session_id)
+    queue = get_research_queue()
+    if queue is not None:
+        await asyncio.to_thread(queue.delete_session, session_id)
     logger.debug(f"Session {session_id} cleared")
     return {"status": "cleared"}
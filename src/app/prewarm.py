@@ -0,0 +1,161 @@
+import os
+import time
+import asyncio
+import logging
+from collections import Counter, deque
+from datetime import datetime
+from typing import Callable, Optional
+
+from src.agents.SupervisorAgent import AGENTS
+from src.models.TripRequest import TripRequest
+from src.models.TripState import TripState
+from src.tools import research_cache
+from src.tools.cache import SQLiteCache
+from src.tools.env_config import env_value
+from src.tools.research_queue import RESEARCH_QUEUE
+from src.tools.search_client import TokenBucket
+from src.tools.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Background pre-warming of the research cache for popular destinations.
+A scheduler task started in the FastAPI lifespan periodically runs the destination-only
+agents for a configured hot list (PREWARM_DESTINATIONS) plus the destinations most
+requested recently (PREWARM_LEARN_TOP), so plans for those cities hit the research cache.
+Runs happen only while the server is idle and inside PREWARM_OFF_PEAK_HOURS, at most
+PREWARM_RUNS_PER_HOUR agent runs per hour, and skip entries that are still fresh.
+With RESEARCH_QUEUE on, the workers only see a SQLite research cache, so pre-warming needs one.
+"""
+
+
+def _parse_hours(window: str) -> tuple[int, int]:
+    """A "start-end" range of local hours, e.g. "1-6", or "22-5" to wrap past midnight."""
+    start, end = (int(hour) for hour in window.split("-"))
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError("hours must be between 0 and 24")
+    return start, end
+
+
+PREWARM_DESTINATIONS = [d.strip() for d in os.getenv("PREWARM_DESTINATIONS", "").split(",") if d.strip()]
+PREWARM_LEARN_TOP = env_value("PREWARM_LEARN_TOP", 0, int)  # 0 = don't learn from traffic
+PREWARM_LEARN_WINDOW_SECONDS = env_value("PREWARM_LEARN_WINDOW_SECONDS", 24 * 3600, int)
+PREWARM_INTERVAL_SECONDS = env_value("PREWARM_INTERVAL_SECONDS", 900, int)
+PREWARM_RUNS_PER_HOUR = env_value("PREWARM_RUNS_PER_HOUR", 60.0, float)  # 0 = pre-warming disabled
+PREWARM_OFF_PEAK_HOURS = env_value("PREWARM_OFF_PEAK_HOURS", None, _parse_hours)  # local hours such as "1-6" or "22-5"; unset = any time
+PREWARM_MAX_ACTIVE_REQUESTS = env_value("PREWARM_MAX_ACTIVE_REQUESTS", 0, int)
+PREWARM_IDLE_POLL_SECONDS = 5
+
+# Agents whose results depend on the destination alone
+PREWARM_AGENTS = ("restaurants_agent", "transportation_agent")
+
+
+class PrewarmScheduler:
+    def __init__(
+        self,
+        active_requests: Callable[[], int],
+        destinations: list[str] = PREWARM_DESTINATIONS,
+        learn_top: int = PREWARM_LEARN_TOP,
+        runs_per_hour: float = PREWARM_RUNS_PER_HOUR,
+        off_peak_hours: Optional[tuple[int, int]] = PREWARM_OFF_PEAK_HOURS,
+    ):
+        self.active_requests = active_requests
+        self.destinations = list(destinations)
+        self.learn_top = learn_top
+        self.agents = [(name, agent_fn) for name, agent_fn in AGENTS if name in PREWARM_AGENTS]
+        self.off_peak_hours = off_peak_hours
+        self._budget = TokenBucket(runs_per_hour / 3600, 1) if runs_per_hour > 0 else None
+        self._recent: deque[tuple[float, str]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+
+    @property
+    def enabled(self) -> bool:
+        cache = research_cache.get_research_cache()
+        # Queued research is served by worker processes, which can't read this process's memory cache
+        shared = cache is not None and (not RESEARCH_QUEUE or isinstance(cache, SQLiteCache))
+        return bool(self.destinations or self.learn_top) and self._budget is not None and shared
+
+    def record(self, destination: str):
+        """Count a planned trip towards the learned hot-destination list."""
+        if self.learn_top:
+            self._recent.append((time.time(), destination.strip()))
+
+    def hot_destinations(self) -> list[str]:
+        """Configured destinations first, then the most requested ones within the learning window."""
+        cutoff = time.time() - PREWARM_LEARN_WINDOW_SECONDS
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+        spellings = {}
+        for _, destination in self._recent:
+            spellings.setdefault(destination.casefold(), destination)
+        counts = Counter(destination.casefold() for _, destination in self._recent)
+        learned = [spellings[key] for key, _ in counts.most_common(self.learn_top)] if self.learn_top else []
+
+        hot, seen = [], set()
+        for destination in self.destinations + learned:
+            if destination.casefold() not in seen:
+                seen.add(destination.casefold())
+                hot.append(destination)
+        return hot
+
+    def _off_peak(self) -> bool:
+        if self.active_requests() > PREWARM_MAX_ACTIVE_REQUESTS:
+            return False
+        if self.off_peak_hours is None:
+            return True
+        start, end = self.off_peak_hours
+        hour = datetime.now().hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    async def run_once(self) -> int:
+        """Refresh every stale or missing destination-only entry for the hot destinations; returns the agent runs made."""
+        runs = 0
+        if self._budget is None:
+            return runs
+        for destination in self.hot_destinations():
+            state = TripState(trip_request=TripRequest.model_construct(destination=destination))
+            for name, agent_fn in self.agents:
+                if research_cache.is_fresh(name, state.trip_request):
+                    continue
+                while not self._off_peak():
+                    await asyncio.sleep(PREWARM_IDLE_POLL_SECONDS)
+                await self._budget.acquire()
+                with span("prewarm", node=name, destination=destination) as prewarm_span:
+                    try:
+                        refresh = research_cache.refresh_in_background(name, agent_fn, state)
+                        if refresh is not None:
+                            # Shielded: sessions may be waiting on the same shared run
+                            await asyncio.shield(refresh)
+                    except Exception as e:
+                        logger.warning(f"Pre-warming {name} for {destination} failed: {str(e)}")
+                        prewarm_span.error = f"{type(e).__name__}: {e}"
+                runs += 1
+                self.runs += 1
+        if runs:
+            logger.info(f"Pre-warmed research cache with {runs} agent runs")
+        return runs
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Pre-warm pass failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(PREWARM_INTERVAL_SECONDS)
+
+    def start(self):
+        if not self.enabled:
+            logger.info("Research pre-warming disabled (set PREWARM_DESTINATIONS or PREWARM_LEARN_TOP with a research cache, SQLite with RESEARCH_QUEUE on, and PREWARM_RUNS_PER_HOUR > 0)")
+            return
+        logger.info(f"Starting research pre-warming for {self.hot_destinations() or 'learned destinations'}")
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,158 @@
+import os
+import signal
+import asyncio
+import argparse
+import logging
+import multiprocessing
+from typing import Callable, Optional
+from dotenv import load_dotenv
+
+from src.agents.SupervisorAgent import AGENTS
+from src.models.TripState import TripState
+from src.tools.research_cache import run_agent
+from src.tools.research_queue import RESEARCH_QUEUE_POLL_SECONDS, ResearchJob, ResearchQueue
+from src.tools.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Research worker processes for the job queue in src/tools/research_queue.py.
+Each worker claims queued agent jobs (up to RESEARCH_WORKER_CONCURRENCY at once), runs the
+agent through the research cache in its own event loop and stores the research update for
+the API to pick up. With RESEARCH_QUEUE=on the FastAPI lifespan starts RESEARCH_WORKERS of
+them and restarts any that die; set RESEARCH_WORKERS=0 and run
+`python -m src.app.research_workers --workers N` to size (or host) the pool separately from
+the uvicorn workers. A stopping worker puts its unfinished jobs back in the queue.
+"""
+
+RESEARCH_WORKERS = int(os.getenv("RESEARCH_WORKERS", "2"))
+RESEARCH_WORKER_CONCURRENCY = int(os.getenv("RESEARCH_WORKER_CONCURRENCY", "6"))
+WORKER_MONITOR_SECONDS = 5
+
+
+async def _run_job(queue: ResearchQueue, job: ResearchJob, agents: dict, worker: str):
+    agent_fn = agents.get(job.agent)
+    if agent_fn is None:
+        await asyncio.to_thread(queue.fail, job.id, worker, f"unknown agent {job.agent}")
+        return
+    logger.info(f"{worker}: running {job.agent} for session {job.session_id} (job {job.id}, attempt {job.attempts})")
+    try:
+        with span("research_worker", node=job.agent, job_id=job.id, attempt=job.attempts):
+            update = await run_agent(job.agent, agent_fn, TripState(trip_request=job.trip_request))
+    except asyncio.CancelledError:
+        queue.release(job.id, worker)
+        raise
+    except Exception as e:
+        logger.error(f"{worker}: {job.agent} failed for job {job.id}: {str(e)}", exc_info=True)
+        await asyncio.to_thread(queue.fail, job.id, worker, f"{type(e).__name__}: {e}")
+        return
+    await asyncio.to_thread(queue.complete, job.id, worker, update)
+
+
+async def work(worker: str, stop: Optional[asyncio.Event] = None):
+    """Claim and run research jobs until `stop` is set."""
+    queue = ResearchQueue()
+    agents = dict(AGENTS)
+    stop = stop or asyncio.Event()
+    running: set[asyncio.Task] = set()
+    logger.info(f"{worker}: waiting for research jobs (up to {RESEARCH_WORKER_CONCURRENCY} at once)")
+    try:
+        while not stop.is_set():
+            while len(running) < RESEARCH_WORKER_CONCURRENCY and (job := await asyncio.to_thread(queue.claim, worker)) is not None:
+                running.add(asyncio.create_task(_run_job(queue, job, agents, worker)))
+            if running:
+                _, running = await asyncio.wait(running, timeout=RESEARCH_QUEUE_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.sleep(RESEARCH_QUEUE_POLL_SECONDS)
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        logger.info(f"{worker}: stopped")
+
+
+def worker_main(worker: str):
+    """Process entry point: one worker event loop, stopped by SIGTERM or SIGINT."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    load_dotenv()
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        await work(worker, stop)
+
+    asyncio.run(run())
+
+
+class ResearchWorkerPool:
+    """Worker processes started from the API (or the CLI below), restarted if they exit."""
+
+    def __init__(self, processes: int = RESEARCH_WORKERS, target: Callable[[str], None] = worker_main):
+        self.processes = processes
+        self.target = target
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: dict[str, multiprocessing.Process] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _spawn(self, worker: str):
+        process = self._context.Process(target=self.target, args=(worker,), name=worker, daemon=True)
+        process.start()
+        self._workers[worker] = process
+
+    def restart_dead(self):
+        for worker, process in list(self._workers.items()):
+            if not process.is_alive():
+                logger.warning(f"Research worker {worker} exited with code {process.exitcode}; restarting it")
+                self._spawn(worker)
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(WORKER_MONITOR_SECONDS)
+            self.restart_dead()
+
+    def start(self, monitor: bool = True):
+        logger.info(f"Starting {self.processes} research worker processes")
+        for index in range(self.processes):
+            self._spawn(f"research-worker-{os.getpid()}-{index}")
+        if monitor and self.processes:
+            self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for process in self._workers.values():
+            process.terminate()
+        # Workers hand their unfinished jobs back before exiting
+        await asyncio.gather(*(asyncio.to_thread(process.join, 10) for process in self._workers.values()))
+        self._workers.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run research worker processes for the research job queue.")
+    parser.add_argument("--workers", type=int, default=max(1, RESEARCH_WORKERS), help="worker processes")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    load_dotenv()
+
+    async def run():
+        pool = ResearchWorkerPool(args.workers)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        pool.start(monitor=False)
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), WORKER_MONITOR_SECONDS)
+            except asyncio.TimeoutError:
+                pool.restart_dead()
+        await pool.stop()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.models.ResearchResults import (
+    ActivityOption,
+    EventOption,
+    FlightOption,
+    HotelOption,
+    ResearchResults,
+    RestaurantOption,
+    TransportationOption,
+)
+from src.models.TripRequest import TripRequest
+
+logger = logging.getLogger(__name__)
+
+"""
+Session storage for /plan.
+Each session is a LangGraph thread (thread_id = session_id): the graph is compiled with one
+of these checkpointers, so a turn resumes from the session's checkpoint with only the new
+message as input instead of re-running from a copied TripState. Both stores are bounded by
+SESSION_MAX sessions and SESSION_TTL_SECONDS of inactivity and keep only the latest
+checkpoint of each session; the SQLite store can be shared by several uvicorn workers. Pick the
+backend with SESSION_STORE (memory | sqlite).
+"""
+
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(24 * 3600)))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", ".cache/sessions.sqlite3")
+
+# TripState value types checkpoints are allowed to rebuild
+STATE_TYPES = [
+    TripRequest, ResearchResults, FlightOption, HotelOption, RestaurantOption, ActivityOption, EventOption, TransportationOption,
+]
+
+
+def state_serializer() -> JsonPlusSerializer:
+    return JsonPlusSerializer(allowed_msgpack_modules=[(cls.__module__, cls.__name__) for cls in STATE_TYPES])
+
+
+class InMemorySessionStore(InMemorySaver):
+    """Per-process checkpoints, only each session's latest kept; least recently used and idle sessions are evicted."""
+
+    def __init__(self, max_sessions: int = SESSION_MAX, ttl: float = SESSION_TTL_SECONDS):
+        super().__init__(serde=state_serializer())
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+        # Blob keys per thread, so pruning and eviction don't scan every session's blobs
+        self._blob_keys: dict[str, set[tuple]] = {}
+        self._lock = threading.Lock()
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            last_used = self._last_used.get(thread_id)
+        if last_used is not None and last_used + self.ttl < time.time():
+            self.delete_thread(thread_id)
+            return None
+        return super().get_tuple(config)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        now = time.time()
+        expired, evicted = [], []
+        with self._lock:
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            # Drop what only older checkpoints of this session referenced, like SQLiteSessionStore.put
+            checkpoints = self.storage[thread_id][checkpoint_ns]
+            for checkpoint_id in [i for i in checkpoints if i != checkpoint["id"]]:
+                del checkpoints[checkpoint_id]
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            versions = checkpoint["channel_versions"]
+            blob_keys = self._blob_keys.setdefault(thread_id, set())
+            blob_keys.update((thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items())
+            for key in [k for k in blob_keys if k[1] == checkpoint_ns and versions.get(k[2]) != k[3]]:
+                blob_keys.discard(key)
+                self.blobs.pop(key, None)
+
+            self._last_used[thread_id] = now
+            self._last_used.move_to_end(thread_id)
+            # Oldest first, so expired sessions sit at the front
+            while self._last_used and next(iter(self._last_used.values())) + self.ttl < now:
+                expired.append(self._last_used.popitem(last=False)[0])
+            while len(self._last_used) > self.max_sessions:
+                evicted.append(self._last_used.popitem(last=False)[0])
+        for thread_id in expired:
+            logger.info(f"Evicted idle session: {thread_id}")
+            self.delete_thread(thread_id)
+        for thread_id in evicted:
+            logger.info(f"Evicted least recently used session: {thread_id}")
+            self.delete_thread(thread_id)
+        return saved
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._last_used.pop(thread_id, None)
+            for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+                for checkpoint_id in checkpoints:
+                    self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            for key in self._blob_keys.pop(thread_id, ()):
+                self.blobs.pop(key, None)
+
+    # Not __len__: LangGraph tests the checkpointer for truthiness, and an empty store must not read as none
+    def session_count(self) -> int:
+        return len(self._last_used)
+
+
+class SQLiteSessionStore(BaseCheckpointSaver):
+    """File-backed checkpoints shared by every worker process on the host; only each session's latest checkpoint is kept."""
+
+    def __init__(self, path: str = SESSION_DB_PATH, max_sessions: int = SESSION_MAX, ttl: float = SESSION_TTL_SECONDS):
+        super().__init__(serde=state_serializer())
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Several uvicorn workers can share the file; a writer waits for the others instead of failing
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_id TEXT,
+                type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns)
+            );
+            CREATE INDEX IF NOT EXISTS checkpoints_updated_at ON checkpoints (updated_at);
+            CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+        """)
+        self._lock = threading.Lock()
+
+    def _delete_threads(self, where: str, params: tuple):
+        for table in ("checkpoint_blobs", "checkpoint_writes"):
+            self._conn.execute(f"DELETE FROM {table} WHERE thread_id IN (SELECT thread_id FROM checkpoints WHERE {where})", params)
+        self._conn.execute(f"DELETE FROM checkpoints WHERE {where}", params)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checkpoint_id, parent_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND updated_at > ?",
+                (thread_id, checkpoint_ns, time.time() - self.ttl),
+            ).fetchone()
+            if row is None or get_checkpoint_id(config) not in (None, row[0]):
+                return None
+            checkpoint_id, parent_id, checkpoint_type, checkpoint_blob, metadata_type, metadata_blob = row
+            blobs = self._conn.execute(
+                "SELECT channel, version, type, value FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            ).fetchall()
+            writes = self._conn.execute(
+                "SELECT task_id, channel, type, value FROM checkpoint_writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchall()
+
+        checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_blob))
+        versions = {channel: str(version) for channel, version in checkpoint["channel_versions"].items()}
+        checkpoint["channel_values"] = {
+            channel: self.serde.loads_typed((value_type, value))
+            for channel, version, value_type, value in blobs
+            if versions.get(channel) == version and value_type != "empty"
+        }
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}} if parent_id else None,
+            pending_writes=[(task_id, channel, self.serde.loads_typed((value_type, value))) for task_id, channel, value_type, value in writes],
+        )
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # Only the latest checkpoint is stored, so a thread has at most one to list
+        if config is None or limit == 0:
+            return
+        latest = self.get_tuple({"configurable": {**config["configurable"], "checkpoint_id": None}})
+        if latest is None:
+            return
+        if before is not None and latest.checkpoint["id"] >= get_checkpoint_id(before):
+            return
+        if filter and any(latest.metadata.get(key) != value for key, value in filter.items()):
+            return
+        yield latest
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version), *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)))
+            for channel, version in new_versions.items()
+        ]
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(stored)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO checkpoint_blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                     checkpoint_type, checkpoint_blob, metadata_type, metadata_blob, now),
+                )
+                # Drop what only older checkpoints of this session referenced
+                for channel, version in stored["channel_versions"].items():
+                    self._conn.execute(
+                        "DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version != ?",
+                        (thread_id, checkpoint_ns, channel, str(version)),
+                    )
+                self._conn.execute(
+                    "DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?",
+                    (thread_id, checkpoint_ns, checkpoint["id"]),
+                )
+                self._delete_threads("updated_at <= ?", (now - self.ttl,))
+                self._delete_threads(
+                    "thread_id IN (SELECT thread_id FROM checkpoints ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_sessions,),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, index), channel, *self.serde.dumps_typed(value), task_path)
+            for index, (channel, value) in enumerate(writes)
+        ]
+        # Special writes (errors, interrupts) replace earlier ones; regular writes are kept from the first attempt
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._lock:
+            self._conn.executemany(f"{verb} INTO checkpoint_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for table in ("checkpoint_blobs", "checkpoint_writes", "checkpoints"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def session_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0]
+
+
+def get_session_store() -> BaseCheckpointSaver:
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    logger.info(f"Session store backend: {backend}")
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    return InMemorySessionStore()
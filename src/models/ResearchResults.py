@@ -82,4 +82,21 @@ class ResearchResults(BaseModel):
     restaurants: list[RestaurantOption] = []
     activities: list[ActivityOption] = []
     events: list[EventOption] = []
-    transportation_options: list[TransportationOption] = []
\ No newline at end of file
+    transportation_options: list[TransportationOption] = []
+
+
+def merge_research(current: ResearchResults, update) -> ResearchResults:
+    """
+    Reducer for TripState.research.
+    Each research agent only returns its own slice (e.g. {"flights": [...]}),
+    so merge the provided sections into the existing results instead of replacing them.
+    """
+    if current is None:
+        current = ResearchResults()
+    if update is None:
+        return current
+    if isinstance(update, ResearchResults):
+        update = {field: getattr(update, field) for field in update.model_fields_set}
+    merged = current.model_dump()
+    merged.update({k: v for k, v in update.items() if k in ResearchResults.model_fields})
+    return ResearchResults(**merged)
\ No newline at end of file
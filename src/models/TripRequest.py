@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel
 
@@ -9,4 +10,12 @@ class TripRequest(BaseModel):
     start_date: str
     end_date: str
     budget_per_person: float
-    interests: Optional[str] = None
\ No newline at end of file
+    interests: Optional[str] = None
+
+    @property
+    def travel_month(self) -> str:
+        """Month of departure for search queries, e.g. "May 2026"."""
+        try:
+            return datetime.strptime(self.start_date, "%Y-%m-%d").strftime("%B %Y")
+        except ValueError:
+            return self.start_date
@@ -2,19 +2,29 @@ from typing import Optional
 from pydantic import BaseModel, Field
 from typing_extensions import Annotated
 from langgraph.graph.message import add_messages
-from .ResearchResults import ResearchResults
+from .ResearchResults import ResearchResults, merge_research
 from .TripRequest import TripRequest
 
 
+def merge_failed_agents(current: list[str], update: list[str]) -> list[str]:
+    """Reducer for TripState.failed_agents - union of agent names, keeping first-seen order."""
+    merged = list(current or [])
+    for name in update or []:
+        if name not in merged:
+            merged.append(name)
+    return merged
+
+
 class TripState(BaseModel):
     messages: Annotated[list, add_messages] = Field(default_factory=list)
     trip_request: Optional[TripRequest] = None
-    research: ResearchResults = Field(default_factory=ResearchResults)
+    collected_fields: dict = Field(default_factory=dict)  # trip fields captured so far, updated every turn
+    research: Annotated[ResearchResults, merge_research] = Field(default_factory=ResearchResults)
     missing_fields: list[str] = Field(default_factory=list)
     next_step: str = "collect_info"
     final_plan: Optional[str] = None      # narrative summary for reading
     budget_breakdown: dict = Field(default_factory=dict)  # computed totals
-    failed_agents: list[str] = Field(default_factory=list)  # track which agents have failed
+    failed_agents: Annotated[list[str], merge_failed_agents] = Field(default_factory=list)  # track which agents have failed
 
     class Config:
         arbitrary_types_allowed = True
\ No newline at end of file
@@ -0,0 +1,230 @@
+import os
+import math
+import logging
+from datetime import date
+from typing import Optional
+from pydantic import BaseModel
+
+import numpy as np
+
+from src.models.ResearchResults import ResearchResults
+from src.models.TripRequest import TripRequest
+from src.tools.result_scoring import completeness, is_filled
+from src.tools.slot_parser import normalize_date
+from src.tools.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Deterministic budget optimizer for TripState.budget_breakdown.
+Picks one flight, one hotel and one local transportation option plus the set of activities
+and events (at most BUDGET_EXPERIENCES_PER_DAY per night) that gives the best trip within budget_per_person, so synthesis can quote the
+numbers instead of doing the arithmetic itself. Everything is costed per person: flight and
+transport prices as given, hotels as price_per_night x nights x rooms shared by the group.
+Flight/hotel/transport combinations are enumerated with numpy broadcasting over each
+category's cost/quality Pareto frontier, and the budget left by each combination is scored
+with a vectorized 0/1 knapsack over the priced activities and events.
+"""
+
+PEOPLE_PER_ROOM = int(os.getenv("BUDGET_PEOPLE_PER_ROOM", "2"))
+# Most activities and events planned per night of the trip
+EXPERIENCES_PER_DAY = int(os.getenv("BUDGET_EXPERIENCES_PER_DAY", "2"))
+# Knapsack budget resolution: at most this many steps, and never finer than one dollar
+MAX_BUDGET_STEPS = 5000
+# Value of an experience (activity or event) relative to the quality of the core choices
+EXPERIENCE_VALUE = 1.0
+HOTEL_RATING_WEIGHT = 0.5
+
+
+def trip_nights(trip_request: TripRequest) -> Optional[int]:
+    """Nights between the trip dates (at least one), or None if they can't be read or end before they start."""
+    start, end = normalize_date(trip_request.start_date), normalize_date(trip_request.end_date)
+    if start is None or end is None or end < start:
+        return None
+    return max(1, (date.fromisoformat(end) - date.fromisoformat(start)).days)
+
+
+def _priced(options: list[BaseModel], price_field: str) -> list[BaseModel]:
+    return [option for option in options if is_filled(getattr(option, price_field))]
+
+
+def _quality(option: BaseModel) -> float:
+    quality = completeness(option)
+    rating = getattr(option, "rating", None)
+    if is_filled(rating):
+        quality += HOTEL_RATING_WEIGHT * min(rating, 5) / 5
+    return quality
+
+
+def _frontier(costs: np.ndarray, quality: np.ndarray) -> np.ndarray:
+    """Indices of the options no other option beats on both cost and quality."""
+    order = np.lexsort((-quality, costs))
+    best = np.maximum.accumulate(quality[order])
+    keep = np.concatenate(([True], quality[order][1:] > best[:-1]))
+    return order[keep]
+
+
+def _category(options: list[BaseModel], costs: list[float]) -> tuple[list[BaseModel], np.ndarray, np.ndarray]:
+    """Pareto-pruned options with their per-person costs and qualities; an empty category is a zero-cost placeholder."""
+    if not options:
+        return [None], np.zeros(1), np.zeros(1)
+    cost_array = np.asarray(costs, dtype=float)
+    quality = np.array([_quality(option) for option in options])
+    keep = _frontier(cost_array, quality)
+    return [options[i] for i in keep], cost_array[keep], quality[keep]
+
+
+def _undominated(costs: np.ndarray, values: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Indices of the items fewer than `limit` others beat on both cost and value; with at most
+    `limit` picks, any other item can be swapped for one of those without losing value.
+    """
+    beats = (costs[None, :] <= costs[:, None]) & (values[None, :] >= values[:, None])
+    beats &= (costs[None, :] < costs[:, None]) | (values[None, :] > values[:, None]) | (np.arange(len(costs))[None, :] < np.arange(len(costs))[:, None])
+    return np.flatnonzero(beats.sum(axis=1) < limit)
+
+
+def _knapsack(costs: np.ndarray, values: np.ndarray, capacity: float, limit: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    0/1 knapsack over a discretized budget with at most `limit` items, vectorized over the budget
+    and item-count axes. best[k, b] is the best value of exactly k items costing at most b steps.
+    Returns (best, per-item take table, item weights in steps, dollars per step).
+    """
+    step = max(1.0, capacity / MAX_BUDGET_STEPS)
+    steps = int(capacity // step)
+    weights = np.ceil(costs / step).astype(int)
+    best = np.full((limit + 1, steps + 1), -np.inf)
+    best[0] = 0.0
+    take = np.zeros((len(costs), limit + 1, steps + 1), dtype=bool)
+    for i, (weight, value) in enumerate(zip(weights, values)):
+        if weight > steps:
+            continue
+        candidate = best[:-1, :steps + 1 - weight] + value
+        improved = candidate > best[1:, weight:]
+        take[i, 1:, weight:] = improved
+        best[1:, weight:] = np.where(improved, candidate, best[1:, weight:])
+    return best, take, weights, step
+
+
+def _chosen_items(take: np.ndarray, weights: np.ndarray, count: int, budget_step: int) -> list[int]:
+    chosen = []
+    for i in range(len(weights) - 1, -1, -1):
+        if count > 0 and take[i, count, budget_step]:
+            chosen.append(i)
+            count -= 1
+            budget_step -= weights[i]
+    return sorted(chosen)
+
+
+def _line(option: Optional[BaseModel], label_field: str, per_person: float, num_people: int, **extra) -> Optional[dict]:
+    if option is None:
+        return None
+    per_person = float(per_person)
+    return {"option": getattr(option, label_field), **extra, "per_person": round(per_person, 2), "total": round(per_person * num_people, 2)}
+
+
+def optimize_budget(research: ResearchResults, trip_request: TripRequest) -> dict:
+    """
+    The best feasible flight, hotel, transportation and experiences for the trip, costed per
+    person and for the group. If even the cheapest combination is over budget it is returned
+    with within_budget False; categories without priced options are left out. Without readable
+    trip dates the hotel cost is unknown, so the breakdown is only flagged as not computed.
+    """
+    num_people = max(1, int(trip_request.num_people))
+    budget = float(trip_request.budget_per_person)
+    nights = trip_nights(trip_request)
+    if nights is None:
+        reason = f"trip dates {trip_request.start_date!r} to {trip_request.end_date!r} could not be read"
+        logger.warning(f"Budget optimizer: not computed, {reason}")
+        return {"computed": False, "reason": reason}
+    rooms = math.ceil(num_people / PEOPLE_PER_ROOM)
+
+    with span("budget_optimizer") as budget_span:
+        flights = _priced(research.flights, "price")
+        hotels = _priced(research.hotels, "price_per_night")
+        transport = _priced(research.transportation_options, "price")
+        experiences = [(option, "activity") for option in _priced(research.activities, "price")]
+        experiences += [(option, "event") for option in _priced(research.events, "price")]
+
+        flight_options, flight_costs, flight_quality = _category(flights, [f.price for f in flights])
+        hotel_options, hotel_costs, hotel_quality = _category(hotels, [h.price_per_night * nights * rooms / num_people for h in hotels])
+        transport_options, transport_costs, transport_quality = _category(transport, [t.price for t in transport])
+
+        # Every flight x hotel x transport combination on the frontiers, flattened
+        core_costs = (flight_costs[:, None, None] + hotel_costs[None, :, None] + transport_costs[None, None, :]).ravel()
+        core_quality = (flight_quality[:, None, None] + hotel_quality[None, :, None] + transport_quality[None, None, :]).ravel()
+
+        limit = max(1, nights) * EXPERIENCES_PER_DAY
+        experience_costs = np.array([option.price for option, _ in experiences], dtype=float)
+        experience_values = np.array([EXPERIENCE_VALUE + 0.1 * completeness(option) for option, _ in experiences])
+        candidates = _undominated(experience_costs, experience_values, limit)
+        capacity = max(0.0, budget - core_costs.min())
+        best, take, weights, step = _knapsack(experience_costs[candidates], experience_values[candidates], capacity, limit)
+        best_count = best.argmax(axis=0)
+        best_value = best.max(axis=0)
+
+        # Value of each combination = its quality + the best experiences its leftover budget buys
+        leftover_steps = np.floor((budget - core_costs) / step).astype(int)
+        feasible = leftover_steps >= 0
+        totals = np.where(feasible, core_quality + best_value[np.clip(leftover_steps, 0, len(best_value) - 1)], -np.inf)
+        # Ties go to the cheaper combination
+        pick = int(np.lexsort((core_costs, -totals))[0]) if feasible.any() else int(np.argmin(core_costs))
+        f, h, t = np.unravel_index(pick, (len(flight_costs), len(hotel_costs), len(transport_costs)))
+
+        chosen = []
+        if feasible[pick]:
+            budget_step = int(leftover_steps[pick])
+            chosen = [int(candidates[i]) for i in _chosen_items(take, weights, int(best_count[budget_step]), budget_step)]
+        spent = float(core_costs[pick] + experience_costs[chosen].sum())
+        hotel = hotel_options[h]
+        breakdown = {
+            "computed": True,
+            "currency": "USD",
+            "num_people": num_people,
+            "nights": nights,
+            "budget_per_person": budget,
+            "flight": _line(flight_options[f], "airline", flight_costs[f], num_people),
+            "hotel": _line(
+                hotel, "name", hotel_costs[h], num_people, price_per_night=hotel.price_per_night, rooms=rooms
+            ) if hotel is not None else None,
+            "transportation": _line(transport_options[t], "type", transport_costs[t], num_people),
+            "experiences": [
+                {"option": experiences[i][0].name, "kind": experiences[i][1], "per_person": experiences[i][0].price,
+                 "total": round(experiences[i][0].price * num_people, 2)}
+                for i in chosen
+            ],
+            "per_person_total": round(spent, 2),
+            "group_total": round(spent * num_people, 2),
+            "remaining_per_person": round(budget - spent, 2),
+            "within_budget": bool(feasible[pick]),
+        }
+        budget_span.set("combinations", len(core_costs))
+        budget_span.set("experiences", len(experiences))
+        budget_span.set("experience_candidates", len(candidates))
+        budget_span.set("within_budget", breakdown["within_budget"])
+    logger.info(f"Budget optimizer: ${spent:.2f} of ${budget:.2f} per person with {len(chosen)} experiences (within budget: {breakdown['within_budget']})")
+    return breakdown
+
+
+def describe_breakdown(breakdown: dict) -> str:
+    """The breakdown as prompt lines for synthesis."""
+    if not breakdown:
+        return "Not computed"
+    if not breakdown.get("computed", True):
+        return f"Not computed: {breakdown['reason']}"
+    lines = []
+    for label, key in (("Flight", "flight"), ("Hotel", "hotel"), ("Getting around", "transportation")):
+        line = breakdown.get(key)
+        if line is None:
+            lines.append(f"- {label}: no priced options")
+            continue
+        detail = f" (${line['price_per_night']:g}/night x {breakdown['nights']} nights x {line['rooms']} rooms)" if key == "hotel" else ""
+        lines.append(f"- {label}: {line['option']}{detail} - ${line['per_person']:.2f} per person, ${line['total']:.2f} total")
+    for experience in breakdown.get("experiences", []):
+        lines.append(f"- {experience['kind'].title()}: {experience['option']} - ${experience['per_person']:.2f} per person, ${experience['total']:.2f} total")
+    lines.append(
+        f"- TOTAL: ${breakdown['per_person_total']:.2f} per person (${breakdown['group_total']:.2f} for {breakdown['num_people']}), "
+        f"${breakdown['remaining_per_person']:.2f} per person left of ${breakdown['budget_per_person']:.2f}"
+        + ("" if breakdown["within_budget"] else " - OVER BUDGET even with the cheapest options")
+    )
+    return "\n".join(lines)
@@ -0,0 +1,227 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+"""
+Small key/value caches shared by the tools.
+Values are plain strings (search text, JSON) with a per-entry TTL, and every backend
+evicts by entry count and total size and keeps hit/miss counters.
+Backends are picked per namespace from the environment, e.g. SEARCH_CACHE_BACKEND=sqlite,
+falling back to CACHE_BACKEND (memory | sqlite | none).
+"""
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+DEFAULT_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_CACHE_PATH = os.getenv("CACHE_PATH", ".cache/travel_planner.sqlite3")
+
+
+class ResultCache(ABC):
+    def __init__(self, namespace: str, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None if it is missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """Store a value for `ttl` seconds, evicting old entries if over the size limits."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "backend": type(self).__name__,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class MemoryCache(ResultCache):
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, namespace: str, **limits):
+        super().__init__(namespace, **limits)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self._record(True)
+                return entry[1]
+            if entry:
+                self._remove(key)
+            self._record(False)
+            return None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + ttl, value)
+            self._bytes += len(value)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(ResultCache):
+    """
+    On-disk cache that survives restarts and is shared by every worker process on the host.
+    Least recently used rows are evicted once the namespace is over its limits.
+    """
+
+    def __init__(self, namespace: str, path: str = DEFAULT_CACHE_PATH, **limits):
+        super().__init__(namespace, **limits)
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )""")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row and row[1] > now:
+                self._conn.execute(
+                    "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+                self._record(True)
+                return row[0]
+            if row:
+                self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+            self._record(False)
+            return None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, value, len(value), now + ttl, now),
+            )
+            self._evict(now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+        count, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY last_access", (self.namespace,)
+        ).fetchall()
+        stale = []
+        for key, entry_size in rows:
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            stale.append((self.namespace, key))
+            count -= 1
+            size -= entry_size
+        self._conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", stale)
+        self.evictions += len(stale)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at > ?", (self.namespace, time.time())
+            ).fetchone()[0]
+
+
+_caches: dict[str, Optional[ResultCache]] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(namespace: str, default_backend: Optional[str] = None) -> Optional[ResultCache]:
+    """
+    Process-wide cache for a namespace, or None when caching is disabled for it.
+    `default_backend` applies when the namespace's own variable is unset, ahead of CACHE_BACKEND.
+    """
+    with _caches_lock:
+        if namespace not in _caches:
+            backend = os.getenv(
+                f"{namespace.upper()}_CACHE_BACKEND", default_backend or os.getenv("CACHE_BACKEND", "memory")
+            ).lower()
+            limits = {
+                "max_entries": int(os.getenv(f"{namespace.upper()}_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                "max_bytes": int(os.getenv(f"{namespace.upper()}_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            }
+            if backend == "sqlite":
+                _caches[namespace] = SQLiteCache(namespace, **limits)
+            elif backend == "memory":
+                _caches[namespace] = MemoryCache(namespace, **limits)
+            else:
+                _caches[namespace] = None
+            logger.info(f"Cache '{namespace}' using backend: {backend}")
+        return _caches[namespace]
+
+
+def cache_stats() -> list[dict]:
+    """Hit/miss counters for every cache created so far."""
+    with _caches_lock:
+        return [cache.stats() for cache in _caches.values() if cache is not None]
@@ -1,12 +1,24 @@
 import os
+import json
+import time
+import asyncio
+import hashlib
 import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
 from dotenv import load_dotenv
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
-from pydantic import BaseModel
-from src.tools.web_search_tool import web_search_tool
-from typing import Optional, Any
+from pydantic import BaseModel, ValidationError
+from src.tools.env_config import env_overrides
+from src.tools.web_search_tool import batch_web_search, is_search_error, web_search_tool
+from src.tools.search_preprocessing import preprocess_results
+from src.tools.cache import get_cache
+from src.tools.llm_registry import get_chat_model, get_structured_llm
+from src.tools.metrics import EXTRACTION_RETRIES
+from src.tools.tracing import Span, span
+from typing import Optional, Any, Union
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -19,77 +31,343 @@ class AgentResult(BaseModel):
     data: Optional[Any] = None
     error: Optional[str] = None
     agent_name: str
+    score: Optional[float] = None
 
 
 def get_llm():
-    return ChatGoogleGenerativeAI(model=os.getenv("GOOGLE_GEMINI_MODEL"), temperature=0)
+    return get_chat_model(temperature=0)
 
 MAX_RETRIES = 3
 
+# A retry that scores no better than the best attempt by this much means refinement has stalled
+MIN_SCORE_GAIN = float(os.getenv("EXTRACTION_MIN_SCORE_GAIN", "0.05"))
 
-def _generate_better_query(llm, previous_query: str, previous_results: str) -> str:
-    logger.debug(f"Generating improved query for: {previous_query[:80]}...")
-    response = llm.invoke([
-        SystemMessage(content="""You are a search query optimizer.
-        Given a query that returned poor results, generate a better one.
-        Return ONLY the search query string, nothing else."""),
-        HumanMessage(content=f"""
-            Previous query: {previous_query}
-            Previous results: {previous_results[:500]}
-            Generate a better search query.""")
+# Latency budget in seconds for one extract_with_retry call (searches, extractions and refinements)
+DEFAULT_EXTRACTION_BUDGET = float(os.getenv("EXTRACTION_BUDGET_SECONDS", "60"))
+# Overrides as "EventsAgent=20,FlightsAgent=90"
+EXTRACTION_BUDGETS: dict[str, float] = env_overrides("EXTRACTION_BUDGETS", float)
+
+# Hedged mode: search the original query plus this many LLM-generated alternates at once (0 = serial retries)
+EXTRACTION_HEDGE = min(int(os.getenv("EXTRACTION_HEDGE", "0")), 2)
+
+# Absolute time.monotonic() deadline inherited from the caller (e.g. the dispatch node)
+_deadline: ContextVar[Optional[float]] = ContextVar("extraction_deadline", default=None)
+
+
+@contextmanager
+def extraction_deadline(seconds: float):
+    """Cap every extract_with_retry call made inside the block (including in child tasks) to `seconds` from now."""
+    current = _deadline.get()
+    deadline = time.monotonic() + seconds
+    token = _deadline.set(min(deadline, current) if current is not None else deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _remaining(deadline: float) -> float:
+    return deadline - time.monotonic()
+
+
+def _query_text(query: Union[str, list[str]]) -> str:
+    return "; ".join(query) if isinstance(query, list) else query
+
+# Extractions are pure functions of (prompt, schema, raw results), so they can live as long as the search results do
+EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", str(24 * 3600)))
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _schema_fingerprint(output_schema: type[BaseModel]) -> str:
+    # The JSON schema covers nested option models and field descriptions, so any model change yields a new key
+    return _digest(json.dumps(output_schema.model_json_schema(), sort_keys=True))[:16]
+
+
+def _extraction_cache_key(agent_name: str, output_schema: type[BaseModel], system_prompt: str, raw_results: str) -> str:
+    return ":".join([
+        agent_name,
+        output_schema.__name__,
+        _schema_fingerprint(output_schema),
+        _digest(system_prompt)[:16],
+        _digest(raw_results),
     ])
+
+
+def _get_cached_extraction(cache_key: str, output_schema: type[BaseModel]) -> Optional[BaseModel]:
+    cache = get_cache("extraction")
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is None:
+        return None
+    try:
+        return output_schema.model_validate_json(cached)
+    except ValidationError:
+        cache.delete(cache_key)
+        return None
+
+
+def _cache_extraction(cache_key: str, result: BaseModel):
+    cache = get_cache("extraction")
+    if cache is not None:
+        # Compact JSON of the validated model - defaults are restored on load
+        cache.set(cache_key, result.model_dump_json(exclude_defaults=True), EXTRACTION_CACHE_TTL)
+
+
+async def _generate_better_query(llm, previous_query: str, previous_results: str) -> str:
+    logger.debug(f"Generating improved query for: {previous_query[:80]}...")
+    with span("llm", purpose="query_refinement"):
+        response = await llm.ainvoke([
+            SystemMessage(content="""You are a search query optimizer.
+            Given a query that returned poor results, generate a better one.
+            Return ONLY the search query string, nothing else."""),
+            HumanMessage(content=f"""
+                Previous query: {previous_query}
+                Previous results: {previous_results[:500]}
+                Generate a better search query.""")
+        ])
     improved_query = response.content.strip()
     logger.debug(f"Improved query: {improved_query}")
     return improved_query
 
 
-def extract_with_retry(
-    query: str,
+async def _generate_alternate_queries(llm, query: str, count: int) -> list[str]:
+    logger.debug(f"Generating {count} alternate queries for: {query[:80]}...")
+    with span("llm", purpose="query_alternates"):
+        response = await llm.ainvoke([
+            SystemMessage(content=f"""You are a search query optimizer.
+            Given a web search query, write {count} differently worded alternatives that would find the same information.
+            Return ONLY the queries, one per line, nothing else."""),
+            HumanMessage(content=query)
+        ])
+    alternates = [line.strip(" -*\t") for line in response.content.splitlines() if line.strip(" -*\t")]
+    logger.debug(f"Alternate queries: {alternates[:count]}")
+    return alternates[:count]
+
+
+async def _search(query: Union[str, list[str]], agent_name: str) -> str:
+    """
+    Run one query, or a batch of focused sub-queries concurrently with their results merged.
+    A failed or empty search raises, so its error text is never extracted from or cached.
+    """
+    if isinstance(query, str):
+        results = await web_search_tool(query, agent_name=agent_name)
+        if is_search_error(results):
+            raise RuntimeError(results)
+        if not results.strip():
+            raise RuntimeError("The search returned no results")
+        return results
+    results = await batch_web_search(query, agent_name=agent_name)
+    if not results:
+        raise RuntimeError(f"None of the {len(query)} searches in the batch returned results")
+    return "\n".join(results)
+
+
+async def _attempt(
+    query: Union[str, list[str]],
+    system_prompt: str,
+    output_schema: type[BaseModel],
+    structured_llm,
+    score_result: callable,
+    agent_name: str,
+    attempt: int,
+) -> tuple[Optional[BaseModel], Optional[str], float]:
+    """One search + extraction. Returns (result, raw search results, quality score); errors yield no result."""
+    raw_results = None
+    with span("extract_attempt", attempt=attempt) as attempt_span:
+        try:
+            logger.debug(f"[{agent_name}] Attempt {attempt} - Searching: {_query_text(query)[:80]}...")
+            raw_results = await _search(query, agent_name)
+            logger.debug(f"[{agent_name}] Search returned {len(raw_results)} characters")
+            attempt_span.set("search_bytes", len(raw_results))
+            search_context = preprocess_results(raw_results, _query_text(query), agent_name)
+            attempt_span.set("context_bytes", len(search_context))
+
+            cache_key = _extraction_cache_key(agent_name, output_schema, system_prompt, search_context)
+            result = _get_cached_extraction(cache_key, output_schema)
+            attempt_span.set("cache_hit", result is not None)
+            if result is not None:
+                logger.debug(f"[{agent_name}] Extraction cache hit, skipping LLM call")
+            else:
+                logger.debug(f"[{agent_name}] Invoking LLM for structured extraction")
+                with span("llm", purpose="extraction"):
+                    result = await structured_llm.ainvoke([
+                        SystemMessage(content=system_prompt),
+                        HumanMessage(content=f"Extract from these search results:\n\n{search_context}")
+                    ])
+                _cache_extraction(cache_key, result)
+                logger.debug(f"[{agent_name}] LLM extraction complete")
+
+            score = score_result(result)
+            attempt_span.set("score", score)
+            return result, raw_results, score
+        except Exception as e:
+            logger.error(f"[{agent_name}] Attempt {attempt} failed: {str(e)}")
+            attempt_span.error = f"{type(e).__name__}: {e}"
+            return None, raw_results, 0.0
+
+
+async def extract_with_retry(
+    query: Union[str, list[str]],
     system_prompt: str,
     output_schema: type[BaseModel],
-    is_good_result: callable,
+    score_result: callable,
+    target_score: float,
     agent_name: str,
+    hedge: Optional[int] = None,
+    budget: Optional[float] = None,
 ) -> AgentResult:
-    logger.info(f"[{agent_name}] Starting extraction with query: {query[:100]}...")
+    """
+    Search and extract until a result's `score_result` reaches `target_score`, returning the
+    best-scoring attempt rather than the last one.
+    `query` may be a list of focused sub-queries; they are searched concurrently and their
+    merged, de-duplicated results go into a single extraction call.
+    The call is bounded by the agent's latency budget and any deadline set by the caller via
+    extraction_deadline(); when time runs out the best partial result is returned.
+    `hedge` (default EXTRACTION_HEDGE) runs that many LLM-generated alternate queries alongside
+    the original instead of retrying serially, keeping the first result that meets the target.
+    """
+    hedge = EXTRACTION_HEDGE if hedge is None else hedge
+    budget = budget if budget is not None else EXTRACTION_BUDGETS.get(agent_name, DEFAULT_EXTRACTION_BUDGET)
+    deadline = time.monotonic() + budget
+    inherited = _deadline.get()
+    if inherited is not None:
+        deadline = min(deadline, inherited)
+
+    with span("extract", agent=agent_name, hedged=hedge > 0) as extract_span:
+        logger.info(f"[{agent_name}] Starting extraction ({_remaining(deadline):.0f}s budget) with query: {_query_text(query)[:100]}...")
+        extract = _extract_hedged if hedge > 0 else _extract_serial
+        best, best_score, expired = await extract(
+            query, system_prompt, output_schema, score_result, target_score, agent_name, extract_span, deadline, hedge
+        )
+        good = best is not None and best_score >= target_score
+        retries = extract_span.attributes.get("attempts", 1) - 1
+        extract_span.set("retries", retries)
+        extract_span.set("score", best_score)
+        extract_span.set("success", good)
+        extract_span.set("deadline_hit", expired)
+        EXTRACTION_RETRIES.inc(retries, agent=agent_name)
+
+    if good:
+        return AgentResult(success=True, data=best, agent_name=agent_name, score=best_score)
+    if expired:
+        logger.error(f"[{agent_name}] Deadline reached after {extract_span.attributes.get('attempts', 0)} attempts")
+        if best is not None:
+            return AgentResult(success=False, data=best, error="Deadline reached, returning best partial result", agent_name=agent_name, score=best_score)
+        return AgentResult(success=False, data=None, error="Deadline reached before any result", agent_name=agent_name)
+
+    # Exhausted retries, or refinement stopped improving the score
+    logger.error(f"[{agent_name}] Gave up after {extract_span.attributes.get('attempts', 0)} attempts below target score {target_score}")
+    if best is not None:
+        logger.warning(f"[{agent_name}] Returning best available result (score {best_score})")
+        return AgentResult(success=False, data=best, error="Max retries exhausted, returning best available", agent_name=agent_name, score=best_score)
+
+    logger.error(f"[{agent_name}] Complete failure - no results obtained")
+    return AgentResult(success=False, data=None, error="All attempts failed completely", agent_name=agent_name)
+
+
+async def _extract_serial(
+    query: Union[str, list[str]],
+    system_prompt: str,
+    output_schema: type[BaseModel],
+    score_result: callable,
+    target_score: float,
+    agent_name: str,
+    extract_span: Span,
+    deadline: float,
+    hedge: int = 0,
+) -> tuple[Optional[BaseModel], float, bool]:
+    """
+    Retry one query at a time, refining it with the LLM after weak results, until an attempt
+    meets the target or a retry fails to beat the best score. Returns (best, best score, deadline hit).
+    """
     llm = get_llm()
-    structured_llm = llm.with_structured_output(output_schema)
+    structured_llm = get_structured_llm(output_schema)
     current_query = query
-    last_result = None
+    best, best_score = None, 0.0
 
-    for attempt in range(MAX_RETRIES):
-        raw_results = None
+    for attempt in range(1, MAX_RETRIES + 1):
+        extract_span.set("attempts", attempt)
         try:
-            logger.debug(f"[{agent_name}] Attempt {attempt + 1}/{MAX_RETRIES} - Searching: {current_query[:80]}...")
-            raw_results = web_search_tool(current_query)
-            logger.debug(f"[{agent_name}] Search returned {len(raw_results)} characters")
-            
-            logger.debug(f"[{agent_name}] Invoking LLM for structured extraction")
-            result = structured_llm.invoke([
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=f"Extract from these search results:\n\n{raw_results}")
-            ])
-            logger.debug(f"[{agent_name}] LLM extraction complete")
-
-            if is_good_result(result):
-                logger.info(f"[{agent_name}] Extraction successful on attempt {attempt + 1}")
-                return AgentResult(success=True, data=result, agent_name=agent_name)
-
-            last_result = result
-            logger.warning(f"[{agent_name}] Attempt {attempt + 1} returned weak results, retrying...")
-            if attempt < MAX_RETRIES - 1 and raw_results:
-                current_query = _generate_better_query(llm, current_query, raw_results)
+            result, raw_results, score = await asyncio.wait_for(
+                _attempt(current_query, system_prompt, output_schema, structured_llm, score_result, agent_name, attempt),
+                _remaining(deadline),
+            )
+        except asyncio.TimeoutError:
+            return best, best_score, True
+        stalled = result is not None and best is not None and score < best_score + MIN_SCORE_GAIN
+        if result is not None and (best is None or score > best_score):
+            best, best_score = result, score
+        if best is not None and best_score >= target_score:
+            logger.info(f"[{agent_name}] Extraction reached score {best_score} on attempt {attempt}")
+            return best, best_score, False
+        if stalled:
+            logger.warning(f"[{agent_name}] Attempt {attempt} did not improve on score {best_score}, stopping")
+            return best, best_score, False
+        if result is not None:
+            logger.warning(f"[{agent_name}] Attempt {attempt} scored {score} (target {target_score}), retrying...")
 
-        except Exception as e:
-            logger.error(f"[{agent_name}] Attempt {attempt + 1} failed: {str(e)}")
-            if attempt < MAX_RETRIES - 1 and raw_results:
-                logger.info(f"[{agent_name}] Attempting query refinement after error")
-                current_query = _generate_better_query(llm, current_query, raw_results or "")
-
-    # Exhausted retries
-    logger.error(f"[{agent_name}] Exhausted all {MAX_RETRIES} retry attempts")
-    if last_result:
-        logger.warning(f"[{agent_name}] Returning best available result after retries exhausted")
-        return AgentResult(success=False, data=last_result, error="Max retries exhausted, returning best available", agent_name=agent_name)
-    
-    logger.error(f"[{agent_name}] Complete failure - no results obtained")
-    return AgentResult(success=False, data=None, error="All attempts failed completely", agent_name=agent_name)
\ No newline at end of file
+        if attempt < MAX_RETRIES and raw_results:
+            try:
+                current_query = await asyncio.wait_for(
+                    _generate_better_query(llm, _query_text(current_query), raw_results), _remaining(deadline)
+                )
+            except asyncio.TimeoutError:
+                return best, best_score, True
+            except Exception as e:
+                logger.error(f"[{agent_name}] Query refinement failed: {str(e)}")
+    return best, best_score, False
+
+
+async def _extract_hedged(
+    query: Union[str, list[str]],
+    system_prompt: str,
+    output_schema: type[BaseModel],
+    score_result: callable,
+    target_score: float,
+    agent_name: str,
+    extract_span: Span,
+    deadline: float,
+    hedge: int,
+) -> tuple[Optional[BaseModel], float, bool]:
+    """
+    Race the original query against `hedge` alternates; the first result to meet the target wins
+    and the rest are cancelled. Otherwise the best-scoring result is returned.
+    """
+    llm = get_llm()
+    structured_llm = get_structured_llm(output_schema)
+    best, best_score = None, 0.0
+
+    def launch(search_query: Union[str, list[str]]) -> asyncio.Task:
+        attempt = extract_span.attributes.get("attempts", 0) + 1
+        extract_span.set("attempts", attempt)
+        return asyncio.create_task(
+            _attempt(search_query, system_prompt, output_schema, structured_llm, score_result, agent_name, attempt)
+        )
+
+    alternates = asyncio.create_task(_generate_alternate_queries(llm, _query_text(query), hedge))
+    pending = {launch(query), alternates}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=max(_remaining(deadline), 0), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                return best, best_score, True
+            for task in done:
+                if task is alternates:
+                    if task.exception() is not None:
+                        logger.error(f"[{agent_name}] Alternate query generation failed: {str(task.exception())}")
+                        continue
+                    pending.update(launch(alternate) for alternate in task.result())
+                    continue
+                result, _, score = task.result()
+                if result is not None and (best is None or score > best_score):
+                    best, best_score = result, score
+                if best is not None and best_score >= target_score:
+                    logger.info(f"[{agent_name}] Hedged extraction reached score {best_score} after launching {extract_span.attributes.get('attempts')} queries")
+                    return best, best_score, False
+        return best, best_score, False
+    finally:
+        for task in pending:
+            task.cancel()
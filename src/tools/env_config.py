@@ -0,0 +1,56 @@
+import os
+import logging
+from typing import Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+"""
+Parsing for the environment settings the tools share: on/off flags, single values and per-name overrides
+such as SEARCH_CACHE_TTLS="EventsAgent=1800,FlightsAgent=600". Malformed values are logged
+and ignored instead of failing at import time.
+"""
+
+TRUE_VALUES = ("1", "on", "true", "yes")
+FALSE_VALUES = ("0", "off", "false", "no")
+
+T = TypeVar("T")
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """An on/off setting: 1/on/true/yes or 0/off/false/no, `default` when unset or unrecognized."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    value = raw.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    logger.warning(f"Ignoring {name}={raw!r}: expected one of {TRUE_VALUES + FALSE_VALUES}; using {'on' if default else 'off'}")
+    return default
+
+
+def env_value(name: str, default: T, parse: Callable[[str], T]) -> T:
+    """A single setting converted by `parse`, `default` when unset or malformed."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return parse(raw.strip())
+    except ValueError as e:
+        logger.warning(f"Ignoring malformed {name}={raw!r}: {e}; using {default!r}")
+        return default
+
+
+def env_overrides(name: str, parse: Callable[[str], T]) -> dict[str, T]:
+    """Per-name overrides written as "key=value,key=value", with each value converted by `parse`."""
+    overrides = {}
+    for entry in filter(None, (part.strip() for part in os.getenv(name, "").split(","))):
+        key, separator, value = entry.partition("=")
+        try:
+            if not separator or not key.strip():
+                raise ValueError("expected key=value")
+            overrides[key.strip()] = parse(value.strip())
+        except ValueError as e:
+            logger.warning(f"Ignoring malformed {name} entry {entry!r}: {e}")
+    return overrides
@@ -0,0 +1,79 @@
+import os
+import json
+import logging
+from langchain_core.messages import BaseMessage, RemoveMessage, SystemMessage
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from src.tools.env_config import env_flag
+from src.tools.metrics import HISTORY_COMPACTED_MESSAGES
+from src.tools.search_preprocessing import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+"""
+Conversation history compaction for TripState.messages.
+add_messages only ever appends, so a long collection conversation grows the session's
+checkpoint and anything that reads the history on every turn. Once the history passes
+HISTORY_MAX_TOKENS, compact_history replaces everything but the newest HISTORY_KEEP_MESSAGES
+with one rolling summary message: the slots already captured, the fields still missing and
+a short digest of the newest compacted user messages. The summary keeps a fixed id, so each
+compaction replaces it in place and it stays bounded too.
+"""
+
+HISTORY_COMPACTION = env_flag("HISTORY_COMPACTION", True)
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "1500"))
+# Newest messages kept verbatim; the latest assistant/user exchange always survives
+HISTORY_KEEP_MESSAGES = max(2, int(os.getenv("HISTORY_KEEP_MESSAGES", "4")))
+# User messages quoted in the summary's digest, newest last
+HISTORY_DIGEST_LINES = int(os.getenv("HISTORY_DIGEST_LINES", "8"))
+DIGEST_CHARS = 160
+
+SUMMARY_ID = "history-summary"
+
+
+def history_tokens(messages: list[BaseMessage]) -> int:
+    return sum(estimate_tokens(str(message.content)) for message in messages)
+
+
+def history_summary(messages: list[BaseMessage]) -> str:
+    """The rolling summary's text, or "" if the history was never compacted."""
+    for message in messages:
+        if message.id == SUMMARY_ID:
+            return message.content
+    return ""
+
+
+def _digest_line(message: BaseMessage) -> str:
+    text = " ".join(str(message.content).split())
+    return text if len(text) <= DIGEST_CHARS else text[:DIGEST_CHARS - 1] + "…"
+
+
+def compact_history(messages: list[BaseMessage], collected_fields: dict, missing_fields: list[str]) -> list[BaseMessage]:
+    """
+    add_messages update that compacts `messages`: the refreshed summary message followed by
+    the newest turns, replacing the whole list. Empty while the history is under HISTORY_MAX_TOKENS.
+    """
+    if not HISTORY_COMPACTION or history_tokens(messages) <= HISTORY_MAX_TOKENS:
+        return []
+    previous = next((message for message in messages if message.id == SUMMARY_ID), None)
+    turns = [message for message in messages if message.id != SUMMARY_ID]
+    older = turns[:-HISTORY_KEEP_MESSAGES]
+    if not older:
+        return []
+
+    digest = list(previous.additional_kwargs.get("digest", [])) if previous else []
+    digest += [_digest_line(message) for message in older if message.type == "human"]
+    digest = digest[-HISTORY_DIGEST_LINES:]
+    compacted = (previous.additional_kwargs.get("compacted", 0) if previous else 0) + len(older)
+    lines = [f"Summary of the {compacted} earlier messages of this conversation.", f"Trip details captured: {json.dumps(collected_fields)}"]
+    if missing_fields:
+        lines.append(f"Still missing: {', '.join(missing_fields)}")
+    if digest:
+        lines.append("Earlier user messages (newest last):")
+        lines += [f"- {line}" for line in digest]
+    summary = SystemMessage(content="\n".join(lines), id=SUMMARY_ID, additional_kwargs={"digest": digest, "compacted": compacted})
+
+    HISTORY_COMPACTED_MESSAGES.inc(len(older))
+    logger.info(f"Compacted {len(older)} messages into the history summary ({compacted} so far)")
+    # Rewrite the history as the summary followed by the kept turns
+    return [RemoveMessage(id=REMOVE_ALL_MESSAGES), summary, *turns[-HISTORY_KEEP_MESSAGES:]]
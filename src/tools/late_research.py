@@ -0,0 +1,87 @@
+import os
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+from langgraph.types import Overwrite
+
+from src.models.ResearchResults import ResearchResults
+from src.models.TripState import TripState
+
+logger = logging.getLogger(__name__)
+
+"""
+Follow-up patches for research agents that missed the dispatch deadline.
+dispatch_node hands agents still running at DISPATCH_DEADLINE_SECONDS to this module instead
+of cancelling them, and synthesis goes ahead without their slices. The API then consumes
+follow_ups() for the session: each late agent that finishes within DISPATCH_FOLLOW_UP_SECONDS
+yields a patch that is merged into the stored session (and streamed as a `research_patch`
+event on /plan/stream); the rest are cancelled.
+"""
+
+DISPATCH_FOLLOW_UP_SECONDS = float(os.getenv("DISPATCH_FOLLOW_UP_SECONDS", "120"))
+
+# session_id -> {agent name: task resolving to (agent name, research update or None)}
+_late: dict[str, dict[str, asyncio.Task]] = {}
+
+
+def track(session_id: str, tasks: dict[str, asyncio.Task]):
+    """Keep a session's late agent runs going so their results can be patched in."""
+    _late.setdefault(session_id, {}).update(tasks)
+
+
+def pending(session_id: str) -> list[str]:
+    return list(_late.get(session_id, {}))
+
+
+def cancel(session_id: str):
+    for task in _late.pop(session_id, {}).values():
+        task.cancel()
+
+
+async def follow_ups(session_id: str, timeout: Optional[float] = None) -> AsyncIterator[tuple[str, dict]]:
+    """Yield (agent name, research update) for each late agent that succeeds, as they finish, until `timeout`."""
+    tasks = {task: name for name, task in _late.pop(session_id, {}).items()}
+    if not tasks:
+        return
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + (timeout if timeout is not None else DISPATCH_FOLLOW_UP_SECONDS)
+    waiting = set(tasks)
+    try:
+        while waiting:
+            remaining = stop_at - loop.time()
+            if remaining <= 0:
+                break
+            done, waiting = await asyncio.wait(waiting, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for finished in done:
+                _, update = finished.result()
+                if update is None:
+                    logger.warning(f"Late {tasks[finished]} failed; no follow-up for session {session_id}")
+                    continue
+                logger.info(f"Late {tasks[finished]} finished; patching session {session_id}")
+                yield tasks[finished], update
+    finally:
+        if waiting:
+            logger.warning(f"Giving up on late agents for session {session_id}: {[tasks[task] for task in waiting]}")
+        for task in waiting:
+            task.cancel()
+
+
+def patch_update(state: TripState, name: str, update: dict) -> dict:
+    """Session state update merging a late agent's research slice and dropping it from failed_agents."""
+    failed = [agent for agent in state.failed_agents if agent != name]
+    if update.get("failed_agents"):
+        failed.append(name)
+    # The failed_agents reducer only adds names, so the corrected list replaces it outright
+    return {"research": update.get("research", {}), "failed_agents": Overwrite(failed)}
+
+
+def patch_payload(name: str, update: dict) -> dict:
+    """JSON-ready `research_patch` event for a late agent's update."""
+    research = update.get("research", {})
+    return {
+        "type": "research_patch",
+        "agent": name,
+        "success": not update.get("failed_agents"),
+        "research": ResearchResults(**research).model_dump(include=set(research)),
+    }
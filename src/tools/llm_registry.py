@@ -0,0 +1,88 @@
+import os
+import logging
+import threading
+from typing import Callable, Iterable, Optional
+from dotenv import load_dotenv
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import Runnable
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import BaseModel
+from src.tools.env_config import env_flag
+from src.tools.tracing import TOKEN_USAGE_HANDLER
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+"""
+Process-wide registry of chat model clients.
+Building ChatGoogleGenerativeAI sets up a new API client (HTTP connection pool, TLS) and
+with_structured_output converts the schema on every call, so both are built once per
+(model, temperature) and (model, temperature, schema) and shared by every node and agent.
+The clients are safe to share between threads and asyncio tasks on the serving event loop.
+"""
+
+ChatModelFactory = Callable[[str, float], BaseChatModel]
+
+_models: dict[tuple[str, float], BaseChatModel] = {}
+_structured: dict[tuple[str, float, type[BaseModel]], Runnable] = {}
+_lock = threading.Lock()
+
+
+def _default_factory(model: str, temperature: float) -> BaseChatModel:
+    logger.debug(f"Initializing chat model {model} (temperature={temperature})")
+    # Token usage is attributed to the tracing span that made the call
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature, callbacks=[TOKEN_USAGE_HANDLER])
+
+
+_factory: ChatModelFactory = _default_factory
+
+
+def set_chat_model_factory(factory: Optional[ChatModelFactory]):
+    """Swap how chat models are built (e.g. fake models for benchmarks) and drop cached clients."""
+    global _factory
+    with _lock:
+        _factory = factory or _default_factory
+        _models.clear()
+        _structured.clear()
+
+
+def _model_name(model: Optional[str]) -> str:
+    return model or os.getenv("GOOGLE_GEMINI_MODEL")
+
+
+def get_chat_model(temperature: float = 0, model: Optional[str] = None) -> BaseChatModel:
+    key = (_model_name(model), float(temperature))
+    with _lock:
+        if key not in _models:
+            _models[key] = _factory(*key)
+        return _models[key]
+
+
+def get_structured_llm(output_schema: type[BaseModel], temperature: float = 0, model: Optional[str] = None) -> Runnable:
+    """Cached `with_structured_output` runnable for a schema class."""
+    key = (_model_name(model), float(temperature), output_schema)
+    llm = get_chat_model(temperature, model)
+    with _lock:
+        if key not in _structured:
+            logger.debug(f"Building structured output runnable for {output_schema.__name__}")
+            _structured[key] = llm.with_structured_output(output_schema)
+        return _structured[key]
+
+
+async def warm_up(temperatures: Iterable[float] = (0,), structured: Iterable[tuple[type[BaseModel], float]] = ()):
+    """
+    Build clients and structured runnables ahead of the first request.
+    With LLM_WARM_UP_PING=true each client also sends a one-word prompt so the
+    connection pool is already open when traffic arrives.
+    """
+    for output_schema, temperature in structured:
+        get_structured_llm(output_schema, temperature)
+    for temperature in temperatures:
+        llm = get_chat_model(temperature)
+        if env_flag("LLM_WARM_UP_PING", False):
+            try:
+                await llm.ainvoke([HumanMessage(content="ping")])
+            except Exception as e:
+                logger.warning(f"LLM warm-up ping failed (temperature={temperature}): {str(e)}")
+    logger.info(f"LLM registry warmed up: {len(_models)} clients, {len(_structured)} structured runnables")
@@ -0,0 +1,110 @@
+import threading
+from bisect import bisect_left
+from typing import Iterable
+
+"""
+Minimal Prometheus-style metrics (counters and histograms) rendered by the /metrics endpoint.
+Finished tracing spans feed the latency histograms, so every traced node, agent,
+extraction attempt, search and LLM call shows up here without extra instrumentation.
+"""
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144)
+
+_lock = threading.Lock()
+
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _labels_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self) -> float:
+        with _lock:
+            return sum(self._values.values())
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with _lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = _labels_key(labels)
+        with _lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+SPAN_DURATION = Histogram("travel_span_duration_seconds", "Duration of traced operations by span name and agent")
+SEARCH_RESULT_BYTES = Histogram("travel_search_result_bytes", "Size of web search results", BYTES_BUCKETS)
+LLM_TOKENS = Counter("travel_llm_tokens_total", "LLM tokens by span name and direction (in/out)")
+EXTRACTION_RETRIES = Counter("travel_extraction_retries_total", "Extra extraction attempts after the first, by agent")
+SEARCH_PREPROCESS_BYTES = Counter("travel_search_preprocess_bytes_total", "Search text bytes before (in) and after (out) pre-processing, by agent")
+HISTORY_COMPACTED_MESSAGES = Counter("travel_history_compacted_messages_total", "Conversation messages folded into session history summaries")
+SYNTHESIS_CONTEXT_BYTES = Counter("travel_synthesis_context_bytes_total", "Research context bytes for synthesis as raw reprs (in) and as built (out)")
+
+METRICS = [SPAN_DURATION, SEARCH_RESULT_BYTES, LLM_TOKENS, EXTRACTION_RETRIES, SEARCH_PREPROCESS_BYTES, SYNTHESIS_CONTEXT_BYTES, HISTORY_COMPACTED_MESSAGES]
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format, plus cache hit/miss counters."""
+    from src.tools.cache import cache_stats
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    stats = cache_stats()
+    for field in ("hits", "misses", "evictions"):
+        name = f"travel_cache_{field}_total"
+        lines.append(f"# TYPE {name} counter")
+        for entry in stats:
+            lines.append(f"{name}{_format_labels([('cache', entry['namespace'])])} {entry[field]}")
+    return "\n".join(lines) + "\n"
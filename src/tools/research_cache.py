@@ -0,0 +1,178 @@
+import json
+import time
+import asyncio
+import logging
+import weakref
+from typing import Awaitable, Callable, Optional
+
+from src.models.TripRequest import TripRequest
+from src.models.TripState import TripState
+from src.tools.cache import ResultCache, get_cache
+from src.tools.env_config import env_overrides
+from src.tools.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Cross-session cache of research agent results.
+Most agents depend on only a few trip fields (restaurants on the destination alone), so
+their validated research slice is cached under the normalized values of just those fields
+and reused by every session planning the same trip. Entries are served fresh for the
+agent's fresh TTL, then served stale while a background run refreshes them, and dropped
+after the stale TTL. Identical runs in flight are shared. Pick the backend with
+RESEARCH_CACHE_BACKEND (memory | sqlite | none; defaults to CACHE_BACKEND, or to sqlite with
+RESEARCH_QUEUE on, so the API process and the research workers share one cache).
+"""
+
+# Bump when agent prompts or queries change enough to invalidate cached research
+RESEARCH_CACHE_VERSION = "1"
+
+# TripRequest fields each agent's queries depend on
+CACHE_KEY_FIELDS = {
+    "flights_agent": ("origin", "destination", "start_date", "end_date"),
+    "hotels_agent": ("destination", "travel_month"),
+    "restaurants_agent": ("destination",),
+    "activities_agent": ("destination", "interests"),
+    "events_agent": ("destination", "start_date", "end_date"),
+    "transportation_agent": ("destination",),
+}
+
+# (fresh, stale) lifetimes in seconds - stale entries are still served while a refresh runs
+RESEARCH_TTLS = {
+    "flights_agent": (3600, 6 * 3600),
+    "hotels_agent": (12 * 3600, 2 * 86400),
+    "restaurants_agent": (7 * 86400, 30 * 86400),
+    "activities_agent": (3 * 86400, 14 * 86400),
+    "events_agent": (6 * 3600, 86400),
+    "transportation_agent": (7 * 86400, 30 * 86400),
+}
+
+def _parse_ttls(value: str) -> tuple[int, int]:
+    fresh, stale = value.split(":")
+    return int(fresh), int(stale)
+
+
+# Overrides as "events_agent=1800:7200,restaurants_agent=86400:604800"
+RESEARCH_TTLS.update(env_overrides("RESEARCH_CACHE_TTLS", _parse_ttls))
+
+AgentFn = Callable[[TripState], Awaitable[dict]]
+
+
+def _normalize(value) -> str:
+    return " ".join(str(value).casefold().replace(",", " ").split()) if value is not None else ""
+
+
+def research_cache_key(name: str, trip_request: Optional[TripRequest]) -> Optional[str]:
+    """Cache key for an agent's results, or None if the agent isn't cacheable for this request."""
+    fields = CACHE_KEY_FIELDS.get(name)
+    if not fields or trip_request is None or not _normalize(trip_request.destination):
+        return None
+    return ":".join([RESEARCH_CACHE_VERSION, name, *(_normalize(getattr(trip_request, field, None)) for field in fields)])
+
+
+# Runs in flight per event loop, keyed by research cache key, and background refreshes kept alive until done
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Task]]" = weakref.WeakKeyDictionary()
+_refreshes: set[asyncio.Task] = set()
+
+
+def get_research_cache() -> Optional[ResultCache]:
+    # Imported here: research_queue runs its jobs through this module
+    from src.tools.research_queue import RESEARCH_QUEUE
+
+    # Queued research runs in worker processes, which only see entries the API stores in a shared cache
+    return get_cache("research", default_backend="sqlite" if RESEARCH_QUEUE else None)
+
+
+def _load(key: str) -> Optional[tuple[float, dict]]:
+    cache = get_research_cache()
+    cached = cache.get(key) if cache is not None else None
+    if cached is None:
+        return None
+    entry = json.loads(cached)
+    return entry["stored_at"], entry["update"]
+
+
+def _fresh_ttl(name: str) -> float:
+    return RESEARCH_TTLS.get(name, (3600, 3600))[0]
+
+
+def is_fresh(name: str, trip_request: Optional[TripRequest]) -> bool:
+    """Whether the agent's cached results for this request can be served without a refresh."""
+    key = research_cache_key(name, trip_request)
+    entry = _load(key) if key is not None else None
+    return entry is not None and time.time() - entry[0] <= _fresh_ttl(name)
+
+
+def _store(name: str, key: str, update: dict):
+    cache = get_research_cache()
+    if cache is None or update.get("failed_agents"):
+        # Only complete, validated results are shared with other sessions
+        return
+    cache.set(key, json.dumps({"stored_at": time.time(), "update": update}), RESEARCH_TTLS.get(name, (3600, 3600))[1])
+
+
+def _shared_run(name: str, key: str, agent_fn: AgentFn, state: TripState) -> asyncio.Task:
+    inflight = _inflight.setdefault(asyncio.get_running_loop(), {})
+    task = inflight.get(key)
+    if task is None:
+        async def run() -> dict:
+            update = await agent_fn(state)
+            _store(name, key, update)
+            return update
+
+        task = asyncio.ensure_future(run())
+        inflight[key] = task
+        task.add_done_callback(lambda done: _forget(inflight, key, done))
+    return task
+
+
+def _forget(inflight: dict, key: str, task: asyncio.Task):
+    if inflight.get(key) is task:
+        del inflight[key]
+
+
+def _log_refresh_failure(name: str, task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background research refresh for {name} failed: {str(task.exception())}")
+
+
+def refresh_in_background(name: str, agent_fn: AgentFn, state: TripState) -> Optional[asyncio.Task]:
+    """Start (or join) a run that repopulates the agent's cache entry without waiting for it."""
+    key = research_cache_key(name, state.trip_request)
+    if key is None or get_research_cache() is None:
+        return None
+    task = _shared_run(name, key, agent_fn, state)
+    _refreshes.add(task)
+    task.add_done_callback(_refreshes.discard)
+    task.add_done_callback(lambda done: _log_refresh_failure(name, done))
+    return task
+
+
+async def run_agent(name: str, agent_fn: AgentFn, state: TripState) -> dict:
+    """
+    Run a research agent through the cross-session cache: fresh entries are returned directly,
+    stale ones are returned while a background run refreshes them, and misses join any
+    identical run already in flight.
+    """
+    key = research_cache_key(name, state.trip_request)
+    if key is None or get_research_cache() is None:
+        return await agent_fn(state)
+
+    with span("research_cache", node=name) as cache_span:
+        entry = _load(key)
+        if entry is not None:
+            stored_at, update = entry
+            age = time.time() - stored_at
+            cache_span.set("age_seconds", round(age))
+            if age <= _fresh_ttl(name):
+                cache_span.set("outcome", "fresh")
+                logger.info(f"Research cache hit for {name} ({age:.0f}s old)")
+                return update
+            cache_span.set("outcome", "stale")
+            logger.info(f"Serving stale research for {name} ({age:.0f}s old) and refreshing in background")
+            refresh_in_background(name, agent_fn, state)
+            return update
+
+        cache_span.set("outcome", "miss")
+        # Shield so a cancelled session doesn't cancel the run other sessions are waiting on
+        return await asyncio.shield(_shared_run(name, key, agent_fn, state))
@@ -0,0 +1,123 @@
+import os
+import logging
+from typing import Any, Optional
+from pydantic import BaseModel
+
+from src.models.ResearchResults import ResearchResults
+from src.tools.env_config import env_overrides
+from src.tools.metrics import SYNTHESIS_CONTEXT_BYTES
+from src.tools.result_scoring import completeness, is_filled
+from src.tools.search_preprocessing import estimate_tokens
+from src.tools.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Compact research context for synthesis_node.
+Each ResearchResults section is written as a pipe-separated table with columns only for
+the fields some option actually fills, instead of the Python repr of every option (nulls,
+review lists and all). Each section keeps its top-k options, ranked by whether they are
+priced and how complete they are, and the whole context is trimmed to a token budget:
+verbose columns go first, then the lowest-ranked rows. Names and prices are never dropped.
+"""
+
+SYNTHESIS_TOKEN_BUDGET = int(os.getenv("SYNTHESIS_TOKEN_BUDGET", "2500"))
+DEFAULT_SECTION_TOP_K = int(os.getenv("SYNTHESIS_TOP_K", "5"))
+
+# (title, price field) per ResearchResults section, in prompt order
+SECTIONS = {
+    "flights": ("FLIGHTS", "price"),
+    "hotels": ("HOTELS", "price_per_night"),
+    "restaurants": ("RESTAURANTS", "price_range"),
+    "activities": ("ACTIVITIES", "price"),
+    "events": ("EVENTS", "price"),
+    "transportation_options": ("TRANSPORTATION", "price"),
+}
+
+# Overrides as "events=3,restaurants=8"
+SECTION_TOP_K = env_overrides("SYNTHESIS_TOP_K_SECTIONS", int)
+
+# Columns dropped, in this order, while the context is over budget
+VERBOSE_FIELDS = (
+    "reviews", "recommended_menu", "contact_info", "amenities", "description", "neighborhood",
+    "opening_hours", "closing_hours", "timings", "class_type", "duration", "rating",
+)
+MAX_CELL_CHARS = 120
+MAX_LIST_ITEMS = 3
+
+
+def _cell(value: Any) -> str:
+    if not is_filled(value):
+        return "-"
+    if isinstance(value, float):
+        text = f"{value:g}" if value < 1e6 else f"{value:.0f}"
+    elif isinstance(value, list):
+        text = "; ".join(str(item) for item in value[:MAX_LIST_ITEMS]) + (f"; +{len(value) - MAX_LIST_ITEMS} more" if len(value) > MAX_LIST_ITEMS else "")
+    else:
+        text = str(value)
+    text = " ".join(text.replace("|", "/").split())
+    if len(text) > MAX_CELL_CHARS and not text.startswith("http"):
+        text = text[:MAX_CELL_CHARS - 1] + "…"
+    return text
+
+
+def _rank(options: list[BaseModel], price_field: str) -> list[int]:
+    """Indices of the options, best first: priced before unpriced, then by field completeness."""
+    return sorted(range(len(options)), key=lambda i: (-is_filled(getattr(options[i], price_field, None)), -completeness(options[i]), i))
+
+
+class _Section:
+    def __init__(self, name: str, options: list[BaseModel], top_k: int):
+        self.title, self.price_field = SECTIONS[name]
+        self.options = options
+        # Kept option indices, best first
+        self.kept = _rank(options, self.price_field)[:top_k]
+        self.columns = [
+            field for field in (type(options[0]).model_fields if options else ())
+            if any(is_filled(getattr(options[i], field)) for i in self.kept)
+        ]
+
+    def render(self) -> str:
+        if not self.options:
+            return f"{self.title}: No data"
+        shown = f"{len(self.kept)} of {len(self.options)}" if len(self.kept) < len(self.options) else str(len(self.options))
+        rows = [" | ".join(self.columns)]
+        # Rows in the agent's original order
+        rows += [" | ".join(_cell(getattr(self.options[i], field)) for field in self.columns) for i in sorted(self.kept)]
+        return f"{self.title} ({shown}):\n" + "\n".join(rows)
+
+
+def _render(sections: list[_Section]) -> str:
+    return "\n\n".join(section.render() for section in sections)
+
+
+def build_research_context(research: ResearchResults, token_budget: Optional[int] = None) -> str:
+    """The research sections as compact tables, trimmed to `token_budget` (default SYNTHESIS_TOKEN_BUDGET) tokens."""
+    token_budget = token_budget or SYNTHESIS_TOKEN_BUDGET
+    with span("research_context") as context_span:
+        raw = "\n\n".join(f"{title}:\n{getattr(research, name) or 'No data'}" for name, (title, _) in SECTIONS.items())
+        sections = [_Section(name, getattr(research, name), SECTION_TOP_K.get(name, DEFAULT_SECTION_TOP_K)) for name in SECTIONS]
+        context = _render(sections)
+
+        # Over budget: drop verbose columns, then the lowest-ranked row of the longest section
+        for field in VERBOSE_FIELDS:
+            if estimate_tokens(context) <= token_budget:
+                break
+            for section in sections:
+                if field in section.columns:
+                    section.columns.remove(field)
+            context = _render(sections)
+        while estimate_tokens(context) > token_budget:
+            longest = max(sections, key=lambda section: len(section.kept))
+            if len(longest.kept) <= 1:
+                break
+            longest.kept.pop()
+            context = _render(sections)
+
+        context_span.set("bytes_in", len(raw))
+        context_span.set("bytes_out", len(context))
+        context_span.set("tokens_estimated", estimate_tokens(context))
+    SYNTHESIS_CONTEXT_BYTES.inc(len(raw), stage="in")
+    SYNTHESIS_CONTEXT_BYTES.inc(len(context), stage="out")
+    logger.debug(f"Research context {len(raw)} -> {len(context)} bytes (~{estimate_tokens(context)} tokens)")
+    return context
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from src.models.TripRequest import TripRequest
+from src.models.TripState import TripState
+from src.tools.env_config import env_flag
+from src.tools.research_cache import run_agent
+from src.tools.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Durable local job queue for research agent runs.
+With RESEARCH_QUEUE=on, dispatch and speculative research enqueue one job per agent into a
+SQLite table instead of running the agent in the API process; worker processes
+(src/app/research_workers.py) claim jobs, run the agent through the research cache and
+store its research update, which the waiting request polls for. The API and the workers
+make their queue calls in worker threads (asyncio.to_thread), so a busy database never
+blocks an event loop. Claims are leases: a job
+whose worker died is claimed again once RESEARCH_JOB_LEASE_SECONDS pass, up to
+RESEARCH_JOB_MAX_ATTEMPTS times. Jobs are reused per (session, agent, request), so a run
+resumed after an API restart picks up results the workers finished meanwhile.
+"""
+
+RESEARCH_QUEUE = env_flag("RESEARCH_QUEUE", False)
+RESEARCH_QUEUE_PATH = os.getenv("RESEARCH_QUEUE_PATH", ".cache/research_queue.sqlite3")
+RESEARCH_QUEUE_POLL_SECONDS = float(os.getenv("RESEARCH_QUEUE_POLL_SECONDS", "0.2"))
+# Longer than any agent's extraction budget, so only jobs of dead workers expire
+RESEARCH_JOB_LEASE_SECONDS = float(os.getenv("RESEARCH_JOB_LEASE_SECONDS", "300"))
+RESEARCH_JOB_MAX_ATTEMPTS = int(os.getenv("RESEARCH_JOB_MAX_ATTEMPTS", "2"))
+# Finished jobs are kept this long for /plan/{session_id}/status and resumed runs
+RESEARCH_JOB_TTL_SECONDS = float(os.getenv("RESEARCH_JOB_TTL_SECONDS", str(24 * 3600)))
+
+AgentFn = Callable[[TripState], Awaitable[dict]]
+
+# Statuses a job can be reused or waited on in
+ACTIVE_STATUSES = ("queued", "running", "done")
+
+
+@dataclass
+class ResearchJob:
+    id: int
+    session_id: str
+    agent: str
+    trip_request: TripRequest
+    attempts: int
+
+
+class ResearchQueue:
+    """SQLite-backed job table shared by the API and every worker process on the host."""
+
+    def __init__(self, path: str = RESEARCH_QUEUE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS research_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                agent TEXT NOT NULL,
+                trip_request TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS research_jobs_status ON research_jobs (status, id);
+            CREATE INDEX IF NOT EXISTS research_jobs_session ON research_jobs (session_id, agent);
+        """)
+        self._lock = threading.Lock()
+
+    def enqueue(self, session_id: str, agent: str, trip_request: TripRequest) -> int:
+        """Id of the session's active job for this agent and request, adding one if there is none."""
+        payload = json.dumps(trip_request.model_dump(exclude_unset=True), sort_keys=True)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT id FROM research_jobs WHERE session_id = ? AND agent = ? AND trip_request = ? "
+                f"AND status IN ({', '.join('?' * len(ACTIVE_STATUSES))}) ORDER BY id DESC LIMIT 1",
+                (session_id, agent, payload, *ACTIVE_STATUSES),
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            self._conn.execute(
+                "DELETE FROM research_jobs WHERE status IN ('done', 'failed', 'cancelled') AND updated_at <= ?",
+                (now - RESEARCH_JOB_TTL_SECONDS,),
+            )
+            return self._conn.execute(
+                "INSERT INTO research_jobs (session_id, agent, trip_request, status, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (session_id, agent, payload, now, now),
+            ).lastrowid
+
+    def claim(self, worker: str) -> Optional[ResearchJob]:
+        """Lease the oldest queued job (or one whose lease expired) to `worker`."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs that keep killing their workers are given up on
+                self._conn.execute(
+                    "UPDATE research_jobs SET status = 'failed', error = 'lease expired', updated_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, RESEARCH_JOB_MAX_ATTEMPTS),
+                )
+                row = self._conn.execute(
+                    "SELECT id, session_id, agent, trip_request, attempts FROM research_jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE research_jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ?, updated_at = ? WHERE id = ?",
+                        (worker, now + RESEARCH_JOB_LEASE_SECONDS, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, session_id, agent, payload, attempts = row
+        return ResearchJob(job_id, session_id, agent, TripRequest.model_construct(**json.loads(payload)), attempts + 1)
+
+    def _finish(self, job_id: int, worker: str, status: str, result: Optional[str], error: Optional[str]):
+        with self._lock:
+            # A worker that lost its lease doesn't overwrite the job's new run
+            self._conn.execute(
+                "UPDATE research_jobs SET status = ?, result = ?, error = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (status, result, error, time.time(), job_id, worker),
+            )
+
+    def complete(self, job_id: int, worker: str, update: dict):
+        self._finish(job_id, worker, "done", json.dumps(update), None)
+
+    def fail(self, job_id: int, worker: str, error: str):
+        self._finish(job_id, worker, "failed", None, error)
+
+    def release(self, job_id: int, worker: str):
+        """Put a job a stopping worker won't finish back in the queue without counting the attempt."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE research_jobs SET status = 'queued', attempts = attempts - 1, worker = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, worker),
+            )
+
+    def cancel(self, job_id: int):
+        """Drop a job no one is waiting for anymore, unless a worker already started it."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE research_jobs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+
+    def result(self, job_id: int) -> tuple[str, Optional[dict], Optional[str]]:
+        """(status, research update, error) of a job."""
+        with self._lock:
+            row = self._conn.execute("SELECT status, result, error FROM research_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return "missing", None, None
+        status, result, error = row
+        return status, json.loads(result) if result is not None else None, error
+
+    def session_jobs(self, session_id: str) -> list[dict]:
+        """The latest job of each agent for a session."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT agent, status, attempts, worker, error, created_at, updated_at FROM research_jobs "
+                "WHERE id IN (SELECT MAX(id) FROM research_jobs WHERE session_id = ? GROUP BY agent) ORDER BY id",
+                (session_id,),
+            ).fetchall()
+        return [
+            {"agent": agent, "status": status, "attempts": attempts, "worker": worker, "error": error,
+             "queued_seconds_ago": round(time.time() - created_at, 1), "updated_seconds_ago": round(time.time() - updated_at, 1)}
+            for agent, status, attempts, worker, error, created_at, updated_at in rows
+        ]
+
+    def delete_session(self, session_id: str):
+        """Cancel a session's queued jobs and forget its finished ones."""
+        with self._lock:
+            self._conn.execute("UPDATE research_jobs SET status = 'cancelled' WHERE session_id = ? AND status = 'queued'", (session_id,))
+            self._conn.execute("DELETE FROM research_jobs WHERE session_id = ? AND status != 'running'", (session_id,))
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM research_jobs WHERE status = 'queued'").fetchone()[0]
+
+
+_queue: Optional[ResearchQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_research_queue() -> Optional[ResearchQueue]:
+    """Process-wide queue handle, or None when RESEARCH_QUEUE is off."""
+    global _queue
+    if not RESEARCH_QUEUE:
+        return None
+    with _queue_lock:
+        if _queue is None:
+            _queue = ResearchQueue()
+            logger.info(f"Research queue at {_queue.path}")
+        return _queue
+
+
+async def _await_job(queue: ResearchQueue, job_id: int, name: str) -> dict:
+    try:
+        while True:
+            status, update, error = await asyncio.to_thread(queue.result, job_id)
+            if status == "done":
+                return update
+            if status in ("failed", "cancelled", "missing"):
+                raise RuntimeError(f"Research job {job_id} for {name} {status}: {error or 'no result'}")
+            await asyncio.sleep(RESEARCH_QUEUE_POLL_SECONDS)
+    except asyncio.CancelledError:
+        # Not awaited, so the cancel goes through even if this task is cancelled again
+        asyncio.get_running_loop().run_in_executor(None, queue.cancel, job_id)
+        raise
+
+
+async def run_research(name: str, agent_fn: AgentFn, state: TripState, session_id: Optional[str]) -> dict:
+    """
+    An agent's research update: from a queued job run by the worker pool when RESEARCH_QUEUE is
+    on, otherwise from run_agent in this process.
+    """
+    queue = get_research_queue()
+    if queue is None or state.trip_request is None:
+        return await run_agent(name, agent_fn, state)
+    # Runs outside a session never share a job
+    job_id = await asyncio.to_thread(queue.enqueue, session_id or f"anonymous-{uuid.uuid4()}", name, state.trip_request)
+    with span("research_job", node=name, job_id=job_id):
+        return await _await_job(queue, job_id, name)
@@ -0,0 +1,58 @@
+from typing import Any, Optional
+from pydantic import BaseModel
+
+"""
+Quality scores for extracted research results.
+extract_with_retry keeps the best-scoring attempt and stops as soon as an attempt reaches the
+agent's target score, so agents describe "good enough" numerically instead of as a yes/no check.
+"""
+
+# Agents are prompted for at most 5 options, so 5 counts as a full list
+TARGET_OPTIONS = 5
+
+# Weights of the score components: list size, priced options, options with a URL, field completeness
+COUNT_WEIGHT = 0.4
+PRICE_WEIGHT = 0.25
+URL_WEIGHT = 0.15
+COMPLETENESS_WEIGHT = 0.2
+
+
+def is_filled(value: Any) -> bool:
+    """Whether an extracted field carries information (zero prices and blank strings don't)."""
+    if value is None or isinstance(value, bool):
+        return value is True
+    if isinstance(value, (int, float)):
+        return value > 0
+    if isinstance(value, str):
+        return bool(value.strip())
+    if isinstance(value, (list, dict)):
+        return bool(value)
+    return True
+
+
+def completeness(option: BaseModel) -> float:
+    """Share of the option model's fields that were filled in."""
+    fields = type(option).model_fields
+    return sum(is_filled(getattr(option, name)) for name in fields) / len(fields)
+
+
+def score_options(
+    options: list[BaseModel],
+    price_field: Optional[str] = "price",
+    url_field: Optional[str] = "booking_url",
+    target_options: int = TARGET_OPTIONS,
+) -> float:
+    """
+    Score a list of extracted options from 0 to 1: how close the list is to `target_options`
+    entries, the share of options with a price and with a URL, and the mean field completeness.
+    Pass None for price_field/url_field when the model has no such field; its weight is dropped.
+    """
+    if not options:
+        return 0.0
+    components = [(COUNT_WEIGHT, min(len(options), target_options) / target_options)]
+    if price_field:
+        components.append((PRICE_WEIGHT, sum(is_filled(getattr(o, price_field)) for o in options) / len(options)))
+    if url_field:
+        components.append((URL_WEIGHT, sum(is_filled(getattr(o, url_field)) for o in options) / len(options)))
+    components.append((COMPLETENESS_WEIGHT, sum(completeness(o) for o in options) / len(options)))
+    return round(sum(weight * value for weight, value in components) / sum(weight for weight, _ in components), 3)
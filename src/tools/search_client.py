@@ -0,0 +1,156 @@
+import os
+import random
+import asyncio
+import logging
+import weakref
+from typing import Awaitable, Callable, Optional, Union
+from langchain_community.tools import DuckDuckGoSearchRun
+
+logger = logging.getLogger(__name__)
+
+"""
+Shared search client used by web_search_tool.
+Every search in the process goes through one client per event loop, which
+- spaces requests out with a token bucket (SEARCH_RATE_PER_SECOND, SEARCH_BURST),
+- caps in-flight requests (SEARCH_MAX_CONCURRENCY),
+- coalesces concurrent identical queries into a single request, and
+- retries throttled requests with exponential backoff and full jitter.
+"""
+
+SEARCH_RATE_PER_SECOND = float(os.getenv("SEARCH_RATE_PER_SECOND", "2"))
+SEARCH_BURST = int(os.getenv("SEARCH_BURST", "6"))
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "4"))
+SEARCH_MAX_ATTEMPTS = int(os.getenv("SEARCH_MAX_ATTEMPTS", "4"))
+SEARCH_BACKOFF_BASE = float(os.getenv("SEARCH_BACKOFF_BASE", "1.0"))
+SEARCH_BACKOFF_MAX = float(os.getenv("SEARCH_BACKOFF_MAX", "16.0"))
+
+# A backend takes a query and returns the raw result text; it may be sync (run in a thread) or async
+SearchBackend = Callable[[str], Union[str, Awaitable[str]]]
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _is_throttled(error: Exception) -> bool:
+    # duckduckgo_search / ddgs raise RatelimitException; HTTP wrappers surface 202/429 status codes
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in ("ratelimit", "rate limit", "429", "too many requests"))
+
+
+def _default_backend() -> SearchBackend:
+    return DuckDuckGoSearchRun().run
+
+
+class SearchClient:
+    def __init__(
+        self,
+        backend: Optional[SearchBackend] = None,
+        rate: float = SEARCH_RATE_PER_SECOND,
+        burst: int = SEARCH_BURST,
+        max_concurrency: int = SEARCH_MAX_CONCURRENCY,
+        max_attempts: int = SEARCH_MAX_ATTEMPTS,
+    ):
+        self._backend = backend or _default_backend()
+        self._bucket = TokenBucket(rate, burst)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._max_attempts = max_attempts
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.throttled = 0
+
+    async def search(self, query: str, key: Optional[str] = None) -> str:
+        """
+        Run a search, sharing the result with any identical query already in flight.
+        `key` identifies identical queries (defaults to the query text).
+        """
+        key = key or query
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug(f"Search coalesced with in-flight request: {query[:80]}...")
+        else:
+            task = asyncio.ensure_future(self._search_with_backoff(query))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # Shield so one cancelled caller doesn't cancel the request for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _search_with_backoff(self, query: str) -> str:
+        for attempt in range(self._max_attempts):
+            try:
+                return await self._run(query)
+            except Exception as e:
+                if not _is_throttled(e) or attempt == self._max_attempts - 1:
+                    raise
+                self.throttled += 1
+                delay = random.uniform(0, min(SEARCH_BACKOFF_MAX, SEARCH_BACKOFF_BASE * 2 ** attempt))
+                logger.warning(f"Search throttled (attempt {attempt + 1}/{self._max_attempts}), backing off {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _run(self, query: str) -> str:
+        async with self._semaphore:
+            await self._bucket.acquire()
+            self.requests += 1
+            if asyncio.iscoroutinefunction(self._backend):
+                return await self._backend(query)
+            return await asyncio.to_thread(self._backend, query)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "throttled": self.throttled,
+            "in_flight": len(self._inflight),
+        }
+
+
+# asyncio primitives are bound to one event loop, so keep one client per loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SearchClient]" = weakref.WeakKeyDictionary()
+_backend: Optional[SearchBackend] = None
+_client_options: dict = {}
+
+
+def set_search_backend(backend: Optional[SearchBackend], **client_options):
+    """
+    Swap the search backend (e.g. a fake for benchmarks) and optionally the SearchClient
+    limits (rate, burst, max_concurrency, max_attempts); existing clients are dropped.
+    """
+    global _backend, _client_options
+    _backend = backend
+    _client_options = client_options
+    _clients.clear()
+
+
+def get_search_client() -> SearchClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = SearchClient(backend=_backend, **_client_options)
+        _clients[loop] = client
+    return client
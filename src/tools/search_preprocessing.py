@@ -0,0 +1,201 @@
+import os
+import re
+import math
+import logging
+from collections import Counter
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from src.tools.env_config import env_flag, env_overrides
+from src.tools.metrics import SEARCH_PREPROCESS_BYTES
+from src.tools.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Pre-processing between web search and structured extraction.
+Raw DuckDuckGo text is split into snippets, near-duplicates are dropped (word shingles +
+MinHash), the rest are ranked against the agent's query with BM25, and the best snippets
+are kept up to the agent's token budget in their original order. The extraction prompt
+only sees that condensed text.
+"""
+
+# Approximate prompt tokens of search text each agent's extraction gets
+SEARCH_TOKEN_BUDGETS = {
+    "FlightsAgent": 1200,
+    "HotelsAgent": 1500,
+    "RestaurantsAgent": 1200,
+    "ActivitiesAgent": 1500,
+    "EventsAgent": 1200,
+    "TransportationAgent": 1000,
+}
+DEFAULT_SEARCH_TOKEN_BUDGET = int(os.getenv("SEARCH_TOKEN_BUDGET", "1500"))
+
+# Overrides as "EventsAgent=800,HotelsAgent=2000"
+SEARCH_TOKEN_BUDGETS.update(env_overrides("SEARCH_TOKEN_BUDGETS", int))
+
+SEARCH_PREPROCESS = env_flag("SEARCH_PREPROCESS", True)
+
+CHARS_PER_TOKEN = 4
+MIN_SNIPPET_CHARS = 40
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16  # LSH bands of 4 rows: snippets sharing any band are compared
+DUPLICATE_SIMILARITY = 0.8
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Extraction needs prices and booking links, so snippets carrying them rank higher
+URL_BONUS = 1.0
+PRICE_BONUS = 0.5
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "to", "from", "on", "in", "at", "by", "with", "is", "are", "be",
+    "as", "it", "its", "that", "this", "these", "those", "look", "find", "show", "include", "including", "if",
+    "available", "around", "such", "etc", "e", "g", "any", "all", "their", "who", "what", "which", "them",
+}
+
+# The leading lookahead lets the regex engine skip straight to candidate separators
+_SPLIT_PATTERN = re.compile(r"(?=[\n.…!?])(?:\n+|\.{3}|…|[.!?]\s+(?=[A-Z0-9$\"'(]))")
+_URL_PATTERN = re.compile(r"https?://|www\.")
+_PRICE_PATTERN = re.compile(r"[$€£]\s?\d|\d\s?(?:usd|eur|gbp)\b", re.I)
+_WORD_PATTERN = re.compile(r"[a-z0-9$]+(?:['.][a-z0-9]+)*")
+# Universal hashes (a * x + b) mod p; p < 2**31 keeps a * x within uint64
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(0)
+_A = _rng.integers(1, int(_PRIME), size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def tokenize(text: str) -> list[str]:
+    return [word for word in _WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def split_snippets(raw_results: str) -> Iterator[str]:
+    """Yield snippet-sized pieces of the search text, folding fragments shorter than MIN_SNIPPET_CHARS into the next piece."""
+    pending = ""
+    for piece in _SPLIT_PATTERN.split(raw_results):
+        piece = " ".join(piece.split())
+        if not piece:
+            continue
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= MIN_SNIPPET_CHARS:
+            yield pending
+            pending = ""
+    if pending:
+        yield pending
+
+
+def _shingles(words: list[str]) -> np.ndarray:
+    grams = [tuple(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))]
+    return np.fromiter((hash(gram) % int(_PRIME) for gram in set(grams)), dtype=np.uint64)
+
+
+def minhash(shingles: np.ndarray) -> np.ndarray:
+    """MinHash signature of a set of shingle hashes, one minimum per permutation."""
+    return ((np.outer(shingles, _A) + _B) % _PRIME).min(axis=0)
+
+
+def drop_near_duplicates(snippets: Iterable[str], threshold: float = DUPLICATE_SIMILARITY) -> Iterator[str]:
+    """Yield snippets whose estimated Jaccard similarity to every earlier kept snippet is below `threshold`."""
+    seen = set()
+    signatures: list[np.ndarray] = []
+    buckets: dict[tuple[int, bytes], list[int]] = {}
+    for snippet in snippets:
+        normalized = snippet.lower()
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+        words = _WORD_PATTERN.findall(normalized)
+        if not words:
+            continue
+        signature = minhash(_shingles(words))
+        packed = signature.tobytes()
+        width = len(packed) // MINHASH_BANDS
+        bands = [(band, packed[band * width:(band + 1) * width]) for band in range(MINHASH_BANDS)]
+        candidates = {index for key in bands for index in buckets.get(key, ())}
+        if any(np.mean(signatures[index] == signature) >= threshold for index in candidates):
+            continue
+        for key in bands:
+            buckets.setdefault(key, []).append(len(signatures))
+        signatures.append(signature)
+        yield snippet
+
+
+def bm25_scores(query: str, snippets: list[str]) -> list[float]:
+    """BM25 relevance of each snippet to the query, with document frequencies taken from the snippets themselves."""
+    documents = [tokenize(snippet) for snippet in snippets]
+    if not documents:
+        return []
+    average_length = sum(len(doc) for doc in documents) / len(documents) or 1
+    frequencies = Counter(term for doc in documents for term in set(doc))
+    terms = set(tokenize(query))
+    scores = []
+    for doc in documents:
+        counts = Counter(doc)
+        score = 0.0
+        for term in terms:
+            if term not in counts:
+                continue
+            idf = math.log(1 + (len(documents) - frequencies[term] + 0.5) / (frequencies[term] + 0.5))
+            tf = counts[term]
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / average_length))
+        scores.append(score)
+    return scores
+
+
+def rank_snippets(query: str, snippets: list[str]) -> list[float]:
+    return [
+        score + URL_BONUS * bool(_URL_PATTERN.search(snippet)) + PRICE_BONUS * bool(_PRICE_PATTERN.search(snippet))
+        for snippet, score in zip(snippets, bm25_scores(query, snippets))
+    ]
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text to about `tokens`, at the last word break when one is near the end."""
+    limit = max(1, tokens) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return cut[:space] if space > limit // 2 else cut
+
+
+def fit_to_budget(snippets: list[str], scores: list[float], token_budget: int) -> list[str]:
+    """
+    Keep the highest-scoring snippets that fit in `token_budget`, returned in their original order.
+    A snippet bigger than the whole budget (e.g. a page without sentence breaks) is cut to fit
+    rather than dropped, and the best snippet is always kept, so non-empty input never comes back empty.
+    """
+    chosen = {}
+    used = 0
+    for index in sorted(range(len(snippets)), key=lambda i: (-scores[i], i)):
+        snippet = truncate_to_tokens(snippets[index], token_budget - 1)
+        cost = estimate_tokens(snippet) + 1
+        if used + cost > token_budget and chosen:
+            continue
+        chosen[index] = snippet
+        used += cost
+    return [chosen[i] for i in sorted(chosen)]
+
+
+def preprocess_results(raw_results: str, query: str, agent_name: Optional[str] = None, token_budget: Optional[int] = None) -> str:
+    """Condense raw search text for the extraction prompt: dedupe, rank against `query`, trim to the agent's token budget."""
+    if not SEARCH_PREPROCESS or not raw_results:
+        return raw_results
+    token_budget = token_budget or SEARCH_TOKEN_BUDGETS.get(agent_name, DEFAULT_SEARCH_TOKEN_BUDGET)
+    with span("preprocess", bytes_in=len(raw_results)) as preprocess_span:
+        snippets = list(drop_near_duplicates(split_snippets(raw_results)))
+        kept = fit_to_budget(snippets, rank_snippets(query, snippets), token_budget)
+        processed = "\n".join(kept)
+        preprocess_span.set("snippets", len(snippets))
+        preprocess_span.set("snippets_kept", len(kept))
+        preprocess_span.set("bytes_out", len(processed))
+    SEARCH_PREPROCESS_BYTES.inc(len(raw_results), agent=agent_name or "", stage="in")
+    SEARCH_PREPROCESS_BYTES.inc(len(processed), agent=agent_name or "", stage="out")
+    logger.debug(f"[{agent_name}] Pre-processed search results {len(raw_results)} -> {len(processed)} bytes ({len(kept)}/{len(snippets)} snippets)")
+    return processed
@@ -0,0 +1,216 @@
+import re
+from datetime import date, datetime
+from typing import Optional
+
+"""
+Deterministic pre-parser for the collection phase.
+Pulls the unambiguous trip fields (dates, party size, budget, "from X to Y") out of a
+single user message with regular expressions, so simple replies fill slots without an
+LLM call. parse_slots also reports whether anything in the message was left unexplained;
+only those messages need to go to Gemini.
+"""
+
+MONTHS = {
+    name: index
+    for index, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ], start=1)
+    for name in names
+}
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+_MONTH = r"(?P<month>" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+
+DATE_PATTERNS = [
+    re.compile(r"\b(?P<year>\d{4})-(?P<mon>\d{1,2})-(?P<day>\d{1,2})\b"),
+    re.compile(r"\b(?P<mon>\d{1,2})/(?P<day>\d{1,2})(?:/(?P<year>\d{2,4}))?\b"),
+    re.compile(_MONTH + r"\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(?P<year>\d{4}))?\b", re.I),
+    re.compile(r"\b(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?" + _MONTH + r"(?:,?\s+(?P<year>\d{4}))?\b", re.I),
+]
+PEOPLE_PATTERN = re.compile(
+    r"\b(?P<count>\d{1,2}|" + "|".join(NUMBER_WORDS) + r")\s+(?:of us|people|persons|travell?ers|adults|guests|pax|friends)\b",
+    re.I,
+)
+SOLO_PATTERN = re.compile(r"\b(?:just me|solo|by myself|on my own|alone)\b", re.I)
+COUPLE_PATTERN = re.compile(r"\b(?:me and my (?:wife|husband|partner|girlfriend|boyfriend|friend)|my (?:wife|husband|partner) and (?:i|me)|a couple)\b", re.I)
+BUDGET_PATTERN = re.compile(
+    r"(?:\$|usd\s?)\s?(?P<amount>\d[\d,]*(?:\.\d+)?)\s?(?P<k>k\b)?"
+    r"|\b(?P<amount2>\d[\d,]*(?:\.\d+)?)\s?(?P<k2>k\b)?\s?(?:usd|dollars|bucks)\b",
+    re.I,
+)
+TOTAL_BUDGET_PATTERN = re.compile(r"\b(?:total|in total|altogether|combined|for (?:all of us|everyone|the group))\b", re.I)
+ROUTE_PATTERN = re.compile(
+    r"\b(?i:from)\s+(?P<origin>[A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*){0,3})\s+(?i:to)\s+(?P<destination>[A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*){0,3})"
+)
+# Capitalized words that start a time, not a place ("from Monday to Friday", "from Christmas to New Year's")
+NON_PLACE_PATTERN = re.compile(
+    r"(?:" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r"|mon|tues?|wed|thu(?:rs?)?|fri|sat|sun"
+    r"|(?:mon|tues|wednes|thurs|fri|satur|sun)day|weekend|today|tonight|tomorrow|noon|midnight|morning|evening"
+    r"|christmas|xmas|christmas eve|new year(?:'s)?(?: eve| day)?|easter|thanksgiving|halloween|hanukkah|ramadan|diwali"
+    r"|(?:labou?r|memorial|independence|presidents'?|valentine'?s|boxing|mother'?s|father'?s) day|spring break)\.?(?![\w'-])",
+    re.I,
+)
+FILLER_WORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "to", "from", "on", "in", "at", "by", "with", "is", "are", "be",
+    "we", "i", "me", "us", "our", "my", "it", "its", "that", "this", "will", "would", "like", "want", "going",
+    "go", "travel", "traveling", "travelling", "trip", "fly", "flying", "visit", "visiting", "heading", "leave", "leaving", "return", "returning", "back", "until",
+    "till", "through", "between", "about", "around", "roughly", "approximately", "budget", "each", "per", "person",
+    "pp", "total", "have", "has", "can", "spend", "people", "dates", "date", "yes", "yeah", "ok", "okay", "sure",
+    "thanks", "thank", "you", "please", "just", "only", "there", "so",
+}
+
+
+def _to_iso(match: re.Match, today: date) -> Optional[str]:
+    """The matched date as YYYY-MM-DD; without a year, its first occurrence on or after `today`."""
+    parts = match.groupdict()
+    month = MONTHS[parts["month"].lower()] if parts.get("month") else int(parts["mon"])
+    day = int(parts["day"])
+    year = parts.get("year")
+    if year is None:
+        # No year given - assume the next occurrence of that day
+        candidate_year = today.year
+        if (month, day) < (today.month, today.day):
+            candidate_year += 1
+        year = candidate_year
+    else:
+        year = int(year)
+        if year < 100:
+            year += 2000
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def _find_dates(text: str, today: date) -> list[tuple[int, int, str, re.Match]]:
+    found = []
+    taken = []
+    for pattern in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            if any(start < match.end() and match.start() < end for start, end in taken):
+                continue
+            iso = _to_iso(match, today)
+            if iso:
+                found.append((match.start(), match.end(), iso, match))
+                taken.append((match.start(), match.end()))
+    return sorted(found)
+
+
+def normalize_date(text: str, today: Optional[date] = None) -> Optional[str]:
+    """One date written any way the parser understands, as YYYY-MM-DD; None unless the text holds exactly one."""
+    try:
+        return datetime.fromisoformat(str(text).strip()).date().isoformat()
+    except ValueError:
+        pass
+    dates = _find_dates(str(text), today or date.today())
+    return dates[0][2] if len(dates) == 1 else None
+
+
+def _place(words: str) -> str:
+    """Trim a capitalized run like "Tokyo May" back to the place name (stops at dates, weekdays and holidays)."""
+    place = []
+    split = words.split()
+    for index, word in enumerate(split):
+        if NON_PLACE_PATTERN.match(" ".join(split[index:])):
+            break
+        place.append(word)
+    return " ".join(place)
+
+
+def _to_amount(raw: str, thousands: Optional[str]) -> float:
+    amount = float(raw.replace(",", ""))
+    return amount * 1000 if thousands else amount
+
+
+def parse_slots(text: str, known: Optional[dict] = None, today: Optional[date] = None) -> tuple[dict, bool]:
+    """
+    Parse trip fields out of one user message.
+    `known` holds fields captured on earlier turns; it is used to resolve a lone date or a
+    group budget. Returns (fields found, whether the whole message was understood).
+    """
+    known = known or {}
+    today = today or date.today()
+    slots = {}
+    spans = []
+    ambiguous = False
+
+    route = ROUTE_PATTERN.search(text)
+    if route:
+        origin, destination = _place(route.group("origin")), _place(route.group("destination"))
+        if origin and destination:
+            slots["origin"], slots["destination"] = origin, destination
+            spans.append((route.start(), route.start("destination") + len(destination)))
+
+    dates = _find_dates(text, today)
+    if len(dates) == 2:
+        # A return date without a year is the first one on or after departure, not after today
+        start_date = dates[0][2]
+        end_date = _to_iso(dates[1][3], date.fromisoformat(start_date))
+        if end_date and end_date >= start_date:
+            slots["start_date"], slots["end_date"] = start_date, end_date
+        else:
+            ambiguous = True
+    elif len(dates) == 1:
+        # A single date only makes sense if exactly one end of the trip is still open
+        open_ends = [field for field in ("start_date", "end_date") if not known.get(field)]
+        if open_ends == ["end_date"]:
+            start_date = normalize_date(known["start_date"], today)
+            end_date = _to_iso(dates[0][3], date.fromisoformat(start_date)) if start_date else None
+            if end_date:
+                slots["end_date"] = end_date
+            else:
+                ambiguous = True
+        elif open_ends == ["start_date"]:
+            end_date = normalize_date(known["end_date"], today)
+            if end_date and dates[0][2] <= end_date:
+                slots["start_date"] = dates[0][2]
+            else:
+                ambiguous = True
+        else:
+            ambiguous = True
+    elif len(dates) > 2:
+        ambiguous = True
+    spans.extend((start, end) for start, end, _, _ in dates)
+
+    people = PEOPLE_PATTERN.search(text)
+    if people:
+        count = people.group("count").lower()
+        slots["num_people"] = NUMBER_WORDS.get(count) or int(count)
+        spans.append(people.span())
+    elif SOLO_PATTERN.search(text):
+        slots["num_people"] = 1
+        spans.append(SOLO_PATTERN.search(text).span())
+    elif COUPLE_PATTERN.search(text):
+        slots["num_people"] = 2
+        spans.append(COUPLE_PATTERN.search(text).span())
+
+    budgets = list(BUDGET_PATTERN.finditer(text))
+    if len(budgets) == 1:
+        budget = budgets[0]
+        amount = _to_amount(budget.group("amount") or budget.group("amount2"), budget.group("k") or budget.group("k2"))
+        spans.append(budget.span())
+        total = TOTAL_BUDGET_PATTERN.search(text)
+        if total:
+            group_size = slots.get("num_people") or known.get("num_people")
+            if group_size:
+                slots["budget_per_person"] = round(amount / int(group_size), 2)
+                spans.append(total.span())
+            else:
+                ambiguous = True
+        else:
+            slots["budget_per_person"] = amount
+    elif len(budgets) > 1:
+        ambiguous = True
+
+    # Anything left over that isn't filler (a city name, interests, a correction) needs the LLM
+    remainder = list(text)
+    for start, end in spans:
+        remainder[start:end] = " " * (end - start)
+    remainder = "".join(remainder)
+    leftover = [word for word in re.findall(r"[a-zA-Z]+|\d+", remainder) if word.lower() not in FILLER_WORDS]
+    understood = bool(slots) and not ambiguous and not leftover
+    return slots, understood
@@ -0,0 +1,121 @@
+import os
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, Optional
+
+from src.models.TripRequest import TripRequest
+from src.models.TripState import TripState
+from src.tools.env_config import env_flag
+from src.tools.research_cache import research_cache_key
+from src.tools.research_queue import run_research
+from src.tools.tracing import span
+
+logger = logging.getLogger(__name__)
+
+"""
+Speculative research while collect_info is still gathering trip fields.
+Each research agent only needs a few fields, so as soon as a session's collected fields cover
+an agent's inputs (restaurants once the destination is known, events and hotels once the
+dates are too) its run starts in the background and is attached to the session. dispatch_node
+then awaits those runs instead of starting over. A run is reused only if the final TripRequest
+still gives it the same inputs (compared by research cache key); runs whose inputs change, e.g.
+the user picks another destination, are cancelled. Disable with SPECULATIVE_RESEARCH=off.
+"""
+
+SPECULATIVE_RESEARCH = env_flag("SPECULATIVE_RESEARCH", True)
+# Sessions with speculative runs kept in this process; the oldest session's runs are cancelled beyond it
+SPECULATIVE_MAX_SESSIONS = int(os.getenv("SPECULATIVE_MAX_SESSIONS", "1000"))
+
+# Collected fields each agent needs before it can start
+SPECULATIVE_INPUTS = {
+    "flights_agent": ("origin", "destination", "start_date", "end_date"),
+    "hotels_agent": ("destination", "start_date", "end_date"),
+    "restaurants_agent": ("destination",),
+    "activities_agent": ("destination",),
+    "events_agent": ("destination", "start_date", "end_date"),
+    "transportation_agent": ("destination",),
+}
+
+AgentFn = Callable[[TripState], Awaitable[dict]]
+
+# session_id -> {agent name: (research cache key of the run's inputs, run)}
+_sessions: "OrderedDict[str, dict[str, tuple[str, asyncio.Task]]]" = OrderedDict()
+
+
+def partial_request(fields: dict) -> TripRequest:
+    """A TripRequest holding only the fields collected so far (unvalidated; missing ones stay unset)."""
+    known = {name: value for name, value in fields.items() if name in TripRequest.model_fields and value}
+    return TripRequest.model_construct(**known)
+
+
+def _cancel_runs(runs: dict[str, tuple[str, asyncio.Task]]):
+    for _, task in runs.values():
+        task.cancel()
+
+
+def _log_failure(name: str, task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Speculative {name} run failed: {str(task.exception())}")
+
+
+async def _speculate(name: str, agent_fn: AgentFn, state: TripState, session_id: str) -> dict:
+    with span("speculative_research", node=name):
+        return await run_research(name, agent_fn, state, session_id)
+
+
+def speculate(session_id: Optional[str], fields: dict, agents: Iterable[tuple[str, AgentFn]]) -> list[str]:
+    """
+    Start the agents whose inputs are covered by the collected `fields` and cancel runs whose
+    inputs changed since they started. Returns the names of the agents started.
+    """
+    if not SPECULATIVE_RESEARCH or not session_id:
+        return []
+    request = partial_request(fields)
+    state = TripState(trip_request=request)
+    runs = _sessions.pop(session_id, {})
+    started = []
+    for name, agent_fn in agents:
+        inputs = SPECULATIVE_INPUTS.get(name)
+        ready = inputs is not None and all(fields.get(field) for field in inputs)
+        key = research_cache_key(name, request) if ready else None
+        if name in runs and runs[name][0] != key:
+            logger.info(f"Cancelling speculative {name} run for session {session_id}: its inputs changed")
+            runs.pop(name)[1].cancel()
+        if key is None or name in runs:
+            continue
+        task = asyncio.ensure_future(_speculate(name, agent_fn, state, session_id))
+        task.add_done_callback(lambda done, name=name: _log_failure(name, done))
+        runs[name] = (key, task)
+        started.append(name)
+
+    if runs:
+        _sessions[session_id] = runs
+        while len(_sessions) > SPECULATIVE_MAX_SESSIONS:
+            _, evicted = _sessions.popitem(last=False)
+            _cancel_runs(evicted)
+    if started:
+        logger.info(f"Started speculative research for session {session_id}: {started}")
+    return started
+
+
+def claim(session_id: Optional[str], trip_request: TripRequest) -> dict[str, asyncio.Task]:
+    """
+    Detach the session's speculative runs for dispatch: runs started with the final request's
+    inputs are returned by agent name, and the rest are cancelled.
+    """
+    runs = _sessions.pop(session_id, {}) if session_id else {}
+    loop = asyncio.get_running_loop()
+    claimed = {}
+    for name, (key, task) in runs.items():
+        failed = task.done() and (task.cancelled() or task.exception() is not None)
+        if key == research_cache_key(name, trip_request) and task.get_loop() is loop and not failed:
+            claimed[name] = task
+        else:
+            task.cancel()
+    return claimed
+
+
+def cancel(session_id: str):
+    """Cancel every speculative run of a session, e.g. when the session is cleared."""
+    _cancel_runs(_sessions.pop(session_id, {}))
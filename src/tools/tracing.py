@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import atexit
+import secrets
+import logging
+import threading
+import functools
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.tools.metrics import SPAN_DURATION, SEARCH_RESULT_BYTES, LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+"""
+Lightweight OpenTelemetry-style tracing.
+`with span("name", agent=...)` times a block and nests under the enclosing span (the
+parent travels in a ContextVar, so it follows asyncio tasks). Finished spans feed the
+Prometheus histograms in metrics.py and are exported to the sinks listed in TRACE_SINKS:
+  console - one log line per span
+  json    - JSON lines appended to TRACE_FILE
+  otlp    - OTLP/HTTP JSON batches posted to OTEL_EXPORTER_OTLP_ENDPOINT (a local collector)
+"""
+
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "ai-travel-planner")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time: float
+    attributes: dict[str, Any] = field(default_factory=dict)
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: float):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class ConsoleSink:
+    def export(self, span: Span):
+        attributes = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        logger.info(f"span {span.name} {span.duration * 1000:.1f}ms {attributes}{' error=' + span.error if span.error else ''}")
+
+
+class JSONFileSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPSink:
+    """Batches spans and posts them as OTLP/HTTP JSON from a background thread."""
+
+    def __init__(self, endpoint: str, flush_interval: float = 2.0, max_batch: int = 512):
+        self.endpoint = endpoint
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._buffer: list[Span] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        threading.Thread(target=self._loop, name="otlp-exporter", daemon=True).start()
+        atexit.register(self.flush)
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(span)
+            if len(self._buffer) >= self.max_batch:
+                self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [self._encode(span) for span in batch]}],
+        }]}
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            logger.debug(f"OTLP export of {len(batch)} spans failed: {str(e)}")
+
+    @staticmethod
+    def _encode(span: Span) -> dict:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(int(span.start_time * 1e9)),
+            "endTimeUnixNano": str(int((span.start_time + span.duration) * 1e9)),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+
+def _build_sinks() -> list:
+    sinks = []
+    for name in filter(None, (s.strip().lower() for s in os.getenv("TRACE_SINKS", "").split(","))):
+        if name == "console":
+            sinks.append(ConsoleSink())
+        elif name == "json":
+            sinks.append(JSONFileSink(os.getenv("TRACE_FILE", "traces.jsonl")))
+        elif name == "otlp":
+            sinks.append(OTLPSink(os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318").rstrip("/") + "/v1/traces"))
+        else:
+            logger.warning(f"Unknown trace sink: {name}")
+    return sinks
+
+
+_sinks: list = _build_sinks()
+
+
+def set_sinks(sinks: list):
+    """Replace the span exporters (anything with an export(span) method)."""
+    global _sinks
+    _sinks = list(sinks)
+
+
+def _finish(span: Span):
+    SPAN_DURATION.observe(span.duration, span=span.name, agent=span.attributes.get("agent", ""))
+    if "search_bytes" in span.attributes and span.name == "web_search":
+        SEARCH_RESULT_BYTES.observe(span.attributes["search_bytes"], agent=span.attributes.get("agent", ""))
+    for direction in ("in", "out"):
+        if span.attributes.get(f"tokens_{direction}"):
+            LLM_TOKENS.inc(span.attributes[f"tokens_{direction}"], span=span.name, direction=direction)
+    for sink in _sinks:
+        try:
+            sink.export(span)
+        except Exception as e:
+            logger.debug(f"Span export to {type(sink).__name__} failed: {str(e)}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a span nested under the current one."""
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        start_time=time.time(),
+        attributes=attributes,
+    )
+    if parent and "agent" in parent.attributes and "agent" not in attributes:
+        current.attributes["agent"] = parent.attributes["agent"]
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current_span.reset(token)
+        _finish(current)
+
+
+def traced(name: str):
+    """Decorator form of span() for coroutine functions such as graph nodes."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Adds each LLM call's token usage to the span that made the call."""
+
+    run_inline = True
+
+    def on_llm_end(self, response, **kwargs):
+        current = _current_span.get()
+        if current is None:
+            return
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    current.add("tokens_in", usage.get("input_tokens", 0))
+                    current.add("tokens_out", usage.get("output_tokens", 0))
+
+
+TOKEN_USAGE_HANDLER = TokenUsageHandler()
@@ -1,20 +1,100 @@
+import os
+import asyncio
 import logging
-from langchain_community.tools import DuckDuckGoSearchRun
+from typing import Optional
+from src.tools.cache import get_cache
+from src.tools.env_config import env_overrides
+from src.tools.search_client import get_search_client
+from src.tools.tracing import span
 
 logger = logging.getLogger(__name__)
 
-def _get_search():
-    return DuckDuckGoSearchRun()
+# How long search results stay fresh per agent, in seconds - events change much faster than restaurants
+SEARCH_TTLS = {
+    "FlightsAgent": 3600,
+    "EventsAgent": 6 * 3600,
+    "HotelsAgent": 12 * 3600,
+    "ActivitiesAgent": 3 * 86400,
+    "RestaurantsAgent": 7 * 86400,
+    "TransportationAgent": 7 * 86400,
+}
+DEFAULT_SEARCH_TTL = int(os.getenv("SEARCH_CACHE_DEFAULT_TTL", "3600"))
 
-def web_search_tool(query: str) -> str:
-    """Perform a web search using DuckDuckGo and return the results."""
-    logger.info(f"Executing web search: {query[:100]}...")
-    try:
-        _search = _get_search()
-        results = _search.run(query)
+# Overrides as "EventsAgent=1800,FlightsAgent=600"
+SEARCH_TTLS.update(env_overrides("SEARCH_CACHE_TTLS", int))
+
+# How long a batch of sub-queries may take before the stragglers are dropped
+SEARCH_BATCH_TIMEOUT = float(os.getenv("SEARCH_BATCH_TIMEOUT", "15"))
+
+
+# web_search_tool reports failures in its result text; callers check for this prefix with is_search_error
+SEARCH_ERROR_PREFIX = "An error occurred while performing the web search"
+
+
+def is_search_error(results: str) -> bool:
+    return results.startswith(SEARCH_ERROR_PREFIX)
+
+
+def normalize_query(query: str) -> str:
+    """Case and whitespace insensitive form of a query, used as the cache key."""
+    return " ".join(query.lower().split())
+
+
+async def _cached_search(query: str, agent_name: Optional[str]) -> str:
+    with span("web_search", agent=agent_name or "") as search_span:
+        cache = get_cache("search")
+        cache_key = normalize_query(query)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Web search cache hit: {query.strip()[:100]}...")
+                search_span.set("cache_hit", True)
+                search_span.set("search_bytes", len(cached))
+                return cached
+        search_span.set("cache_hit", False)
+
+        logger.info(f"Executing web search: {query[:100]}...")
+        results = await get_search_client().search(query, key=cache_key)
         logger.debug(f"Web search returned {len(results)} characters")
+        search_span.set("search_bytes", len(results))
+        if cache is not None and results:
+            cache.set(cache_key, results, SEARCH_TTLS.get(agent_name, DEFAULT_SEARCH_TTL))
         return results
+
+
+async def web_search_tool(query: str, agent_name: Optional[str] = None) -> str:
+    """
+    Perform a web search using DuckDuckGo and return the results without blocking the event loop.
+    Requests go through the shared rate-limited search client, which coalesces identical in-flight queries.
+    Successful results are cached under the normalized query for the calling agent's TTL.
+    """
+    try:
+        return await _cached_search(query, agent_name)
     except Exception as e:
         logger.error(f"Web search failed for query '{query[:80]}...': {str(e)}")
-        results = f"An error occurred while performing the web search: {e}"
+        return f"{SEARCH_ERROR_PREFIX}: {e}"
+
+
+async def batch_web_search(queries: list[str], agent_name: Optional[str] = None, timeout: Optional[float] = None) -> list[str]:
+    """
+    Run several focused searches concurrently and return the results that arrived within
+    `timeout` seconds (default SEARCH_BATCH_TIMEOUT), in query order.
+    Failed, empty and late searches are dropped rather than failing the whole batch.
+    """
+    timeout = SEARCH_BATCH_TIMEOUT if timeout is None else timeout
+    with span("search_batch", queries=len(queries)) as batch_span:
+        tasks = [asyncio.create_task(_cached_search(query, agent_name)) for query in queries]
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        results = []
+        for query, task in zip(queries, tasks):
+            if task not in done:
+                logger.warning(f"Web search timed out after {timeout}s in batch: {query[:80]}...")
+            elif task.exception() is not None:
+                logger.error(f"Web search failed for query '{query[:80]}...': {str(task.exception())}")
+            elif task.result():
+                results.append(task.result())
+        batch_span.set("completed", len(results))
+        batch_span.set("timed_out", len(pending))
         return results
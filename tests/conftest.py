@@ -0,0 +1,5 @@
+import os
+
+# Model settings the agents read at import; tests swap in fake models and never call Gemini
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("GOOGLE_GEMINI_MODEL", "test")
@@ -0,0 +1,103 @@
+import itertools
+import random
+
+import pytest
+
+from src.models.ResearchResults import ActivityOption, EventOption, FlightOption, HotelOption, ResearchResults, TransportationOption
+from src.models.TripRequest import TripRequest
+from src.tools import budget_optimizer
+from src.tools.budget_optimizer import describe_breakdown, optimize_budget, trip_nights
+from src.tools.result_scoring import completeness
+
+
+def _trip(start: str = "2026-05-01", end: str = "2026-05-03", people: int = 2, budget: float = 1500) -> TripRequest:
+    return TripRequest(origin="Atlanta", destination="Lisbon", num_people=people, start_date=start, end_date=end, budget_per_person=budget)
+
+
+@pytest.mark.parametrize("start, end, nights", [
+    ("2026-05-01", "2026-05-08", 7),
+    ("May 1, 2026", "May 8, 2026", 7),
+    ("2026-05-01", "5/4/26", 3),
+    ("2026-05-01", "2026-05-01", 1),
+])
+def test_trip_nights(start, end, nights):
+    assert trip_nights(_trip(start, end)) == nights
+
+
+@pytest.mark.parametrize("start, end", [("next Friday", "2026-05-08"), ("2026-05-01", "a week later"), ("2026-05-08", "2026-05-01")])
+def test_unreadable_dates_are_not_computed(start, end):
+    breakdown = optimize_budget(ResearchResults(), _trip(start, end))
+    assert breakdown["computed"] is False
+    assert describe_breakdown(breakdown).startswith("Not computed: ")
+
+
+def _random_case(rng: random.Random) -> tuple[ResearchResults, TripRequest]:
+    def maybe(value):
+        return value if rng.random() < 0.5 else None
+
+    flights = [
+        FlightOption(airline=f"flight-{i}", departure_time="08:00", arrival_time="14:00", price=rng.randint(150, 900),
+                     origin="ATL", destination="LIS", duration=maybe("8h"), booking_url=maybe("https://example.com"))
+        for i in range(rng.randint(1, 4))
+    ]
+    hotels = [
+        HotelOption(name=f"hotel-{i}", location="Lisbon", price_per_night=rng.randint(60, 300), rating=maybe(rng.randint(1, 5)),
+                    booking_url=maybe("https://example.com"), neighborhood=maybe("Alfama"))
+        for i in range(rng.randint(1, 4))
+    ]
+    transport = [
+        TransportationOption(type=f"transport-{i}", price=rng.randint(5, 120), duration=maybe("20m"))
+        for i in range(rng.randint(1, 3))
+    ]
+    activities = [
+        ActivityOption(name=f"activity-{i}", price=rng.randint(10, 200), description=maybe("tour"), location=maybe("Baixa"))
+        for i in range(rng.randint(0, 5))
+    ]
+    events = [
+        EventOption(name=f"event-{i}", price=rng.randint(10, 200), date=maybe("2026-05-02"), location=maybe("Belem"))
+        for i in range(rng.randint(0, 3))
+    ]
+    research = ResearchResults(flights=flights, hotels=hotels, transportation_options=transport, activities=activities, events=events)
+    nights = rng.randint(1, 3)
+    trip = _trip("2026-05-01", f"2026-05-0{1 + nights}", people=rng.randint(1, 5), budget=rng.randint(300, 2500))
+    return research, trip
+
+
+def _brute_force(research: ResearchResults, trip: TripRequest) -> float:
+    """Best value of any feasible pick, by trying every combination; -inf if nothing fits."""
+    nights = trip_nights(trip)
+    rooms = -(-trip.num_people // budget_optimizer.PEOPLE_PER_ROOM)
+    experiences = research.activities + research.events
+    limit = nights * budget_optimizer.EXPERIENCES_PER_DAY
+    best = float("-inf")
+    for flight, hotel, transport in itertools.product(research.flights, research.hotels, research.transportation_options):
+        core_cost = flight.price + hotel.price_per_night * nights * rooms / trip.num_people + transport.price
+        core_value = sum(budget_optimizer._quality(option) for option in (flight, hotel, transport))
+        for count in range(min(limit, len(experiences)) + 1):
+            for picked in itertools.combinations(experiences, count):
+                if core_cost + sum(option.price for option in picked) <= trip.budget_per_person:
+                    value = core_value + sum(budget_optimizer.EXPERIENCE_VALUE + 0.1 * completeness(option) for option in picked)
+                    best = max(best, value)
+    return best
+
+
+def _value(breakdown: dict, research: ResearchResults) -> float:
+    by_label = {
+        **{("flight", f.airline): f for f in research.flights},
+        **{("hotel", h.name): h for h in research.hotels},
+        **{("transportation", t.type): t for t in research.transportation_options},
+    }
+    value = sum(budget_optimizer._quality(by_label[(key, breakdown[key]["option"])]) for key in ("flight", "hotel", "transportation"))
+    experiences = {option.name: option for option in research.activities + research.events}
+    return value + sum(budget_optimizer.EXPERIENCE_VALUE + 0.1 * completeness(experiences[e["option"]]) for e in breakdown["experiences"])
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_brute_force(seed):
+    research, trip = _random_case(random.Random(seed))
+    breakdown = optimize_budget(research, trip)
+    best = _brute_force(research, trip)
+    assert breakdown["within_budget"] == (best > float("-inf"))
+    if breakdown["within_budget"]:
+        assert breakdown["per_person_total"] <= trip.budget_per_person + 0.01
+        assert _value(breakdown, research) == pytest.approx(best)
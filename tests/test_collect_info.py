@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+import src.agents.SupervisorAgent as supervisor
+from src.models.TripState import TripState
+from src.tools import llm_registry, speculative_research
+
+
+class FakeCollectionModel:
+    """Collection model that returns fixed fields and counts its calls."""
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self.calls = 0
+
+    def with_structured_output(self, schema):
+        model = self
+
+        class Structured:
+            async def ainvoke(self, messages, config=None):
+                model.calls += 1
+                return schema(reply="Got it.", **model.fields)
+
+        return Structured()
+
+
+@pytest.fixture(autouse=True)
+def no_speculation(monkeypatch):
+    monkeypatch.setattr(speculative_research, "SPECULATIVE_RESEARCH", False)
+    yield
+    llm_registry.set_chat_model_factory(None)
+
+
+def _collect(text: str, known: dict, **llm_fields) -> tuple[dict, FakeCollectionModel]:
+    model = FakeCollectionModel(**llm_fields)
+    llm_registry.set_chat_model_factory(lambda name, temperature: model)
+    state = TripState(messages=[AIMessage(content="Where to?"), HumanMessage(content=text)], collected_fields=known)
+    return asyncio.run(supervisor.collect_info_node(state)), model
+
+
+def test_parser_guess_does_not_overwrite_a_known_field():
+    update, _ = _collect("from Boston to Madrid, and my mom is coming", {"origin": "Atlanta", "destination": "Lisbon"})
+    assert update["collected_fields"]["origin"] == "Atlanta"
+    assert update["collected_fields"]["destination"] == "Lisbon"
+
+
+def test_llm_confirms_a_correction():
+    update, model = _collect("from Boston to Madrid", {"origin": "Atlanta", "destination": "Lisbon"}, origin="Boston", destination="Madrid")
+    assert model.calls == 1
+    assert update["collected_fields"]["origin"] == "Boston"
+    assert update["collected_fields"]["destination"] == "Madrid"
+
+
+def test_parser_fills_open_fields():
+    update, _ = _collect("4 people, we love street food", {"origin": "Atlanta"})
+    assert update["collected_fields"] == {"origin": "Atlanta", "num_people": 4}
+
+
+def test_understood_turn_gets_a_templated_reply_without_the_llm():
+    update, model = _collect("3 people", {"origin": "Atlanta", "destination": "Lisbon"})
+    assert model.calls == 0
+    assert update["collected_fields"]["num_people"] == 3
+    assert "departure date" in update["messages"][0].content
+    assert update["next_step"] == "collect_info"
+
+
+def test_understood_final_turn_confirms_the_trip():
+    known = {"origin": "Atlanta", "destination": "Lisbon", "num_people": 2, "start_date": "2026-05-01", "end_date": "2026-05-08"}
+    update, model = _collect("$2,500 each", known)
+    assert model.calls == 0
+    assert update["next_step"] == "dispatch"
+    assert update["trip_request"].budget_per_person == 2500.0
+    assert "Atlanta to Lisbon" in update["messages"][0].content
+
+
+def test_llm_dates_are_normalized_and_unreadable_ones_dropped():
+    update, model = _collect(
+        "the first week of May, back whenever", {"end_date": "2026-05-09"}, start_date="May 1, 2026", end_date="whenever",
+    )
+    assert model.calls == 1
+    assert update["collected_fields"]["start_date"] == "2026-05-01"
+    assert update["collected_fields"]["end_date"] == "2026-05-09"
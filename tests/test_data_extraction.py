@@ -0,0 +1,84 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from src.tools import llm_registry
+from src.tools.cache import get_cache
+from src.tools.data_extraction_tool import extract_with_retry
+from src.tools.search_client import set_search_backend
+
+RESULTS = "Hotel Lisboa Plaza - $180 per night - https://example.com/plaza. Great views over the river and the old town."
+
+
+class Hotels(BaseModel):
+    names: list[str] = []
+    note: Optional[str] = None
+
+
+class FakeExtractionModel:
+    """Structured extraction that records each prompt; free-text calls return a refined query."""
+
+    def __init__(self):
+        self.prompts: list[str] = []
+
+    async def ainvoke(self, messages, config=None):
+        return AIMessage(content="hotels in lisbon")
+
+    def with_structured_output(self, schema):
+        model = self
+
+        class Structured:
+            async def ainvoke(self, messages, config=None):
+                model.prompts.append(messages[-1].content)
+                return schema(names=["Hotel Lisboa Plaza"])
+
+        return Structured()
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeExtractionModel()
+    llm_registry.set_chat_model_factory(lambda name, temperature: model)
+    yield model
+    llm_registry.set_chat_model_factory(None)
+    set_search_backend(None)
+
+
+def _flaky_backend(failures: int):
+    calls = 0
+
+    async def search(query: str) -> str:
+        nonlocal calls
+        calls += 1
+        if calls <= failures:
+            raise ConnectionError("search backend unavailable")
+        return RESULTS
+
+    return search
+
+
+def _extract(query: str):
+    return asyncio.run(extract_with_retry(
+        query, "Extract hotels.", Hotels, score_result=lambda result: float(bool(result.names)),
+        target_score=1.0, agent_name="TestHotelsAgent", budget=10,
+    ))
+
+
+def test_failed_search_is_retried_without_extracting_its_error_text(model):
+    set_search_backend(_flaky_backend(failures=1), rate=1000, burst=1000)
+    result = _extract("hotels in lisbon failed once")
+    assert result.success
+    assert len(model.prompts) == 1
+    assert "An error occurred" not in model.prompts[0]
+
+
+def test_failed_search_is_not_cached_as_an_extraction(model):
+    set_search_backend(_flaky_backend(failures=100), rate=1000, burst=1000)
+    cached_before = len(get_cache("extraction"))
+    result = _extract("hotels in lisbon always failing")
+    assert not result.success and result.data is None
+    assert model.prompts == []
+    assert len(get_cache("extraction")) == cached_before
@@ -0,0 +1,45 @@
+import pytest
+
+from src.tools.env_config import env_flag, env_overrides, env_value
+
+
+@pytest.mark.parametrize("raw, expected", [("on", True), ("TRUE", True), ("1", True), ("off", False), ("No", False), ("0", False)])
+def test_env_flag_values(monkeypatch, raw, expected):
+    monkeypatch.setenv("TEST_FLAG", raw)
+    assert env_flag("TEST_FLAG", not expected) is expected
+
+
+@pytest.mark.parametrize("raw", [None, "", "maybe"])
+def test_env_flag_falls_back_to_default(monkeypatch, raw):
+    if raw is None:
+        monkeypatch.delenv("TEST_FLAG", raising=False)
+    else:
+        monkeypatch.setenv("TEST_FLAG", raw)
+    assert env_flag("TEST_FLAG", True) is True
+    assert env_flag("TEST_FLAG", False) is False
+
+
+def test_env_value_parses_the_setting(monkeypatch):
+    monkeypatch.setenv("TEST_VALUE", " 30 ")
+    assert env_value("TEST_VALUE", 60.0, float) == 30.0
+
+
+@pytest.mark.parametrize("raw", [None, "", "fast"])
+def test_env_value_falls_back_to_default(monkeypatch, caplog, raw):
+    if raw is None:
+        monkeypatch.delenv("TEST_VALUE", raising=False)
+    else:
+        monkeypatch.setenv("TEST_VALUE", raw)
+    assert env_value("TEST_VALUE", 60.0, float) == 60.0
+    assert ("Ignoring malformed TEST_VALUE" in caplog.text) == bool(raw)
+
+
+def test_env_overrides_parses_entries(monkeypatch):
+    monkeypatch.setenv("TEST_OVERRIDES", " EventsAgent=20, FlightsAgent = 90 ,")
+    assert env_overrides("TEST_OVERRIDES", float) == {"EventsAgent": 20.0, "FlightsAgent": 90.0}
+
+
+def test_env_overrides_skips_malformed_entries(monkeypatch, caplog):
+    monkeypatch.setenv("TEST_OVERRIDES", "EventsAgent=20,FlightsAgent,HotelsAgent=soon,=5")
+    assert env_overrides("TEST_OVERRIDES", int) == {"EventsAgent": 20}
+    assert caplog.text.count("Ignoring malformed TEST_OVERRIDES") == 3
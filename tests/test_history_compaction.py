@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+import src.agents.SupervisorAgent as supervisor
+from src.app.session_store import InMemorySessionStore
+from src.tools import history_compaction, llm_registry, speculative_research
+from src.tools.history_compaction import history_summary, history_tokens
+
+USER_MESSAGES = [
+    "We'd like to go from Atlanta to Lisbon, probably four of us.",
+    "My sister might join, she loves old churches and tiled facades.",
+    "Still thinking about money, honestly. Last time we overspent on restaurants and I'd rather not repeat that.",
+    "Is Lisbon hilly? My dad has a bad knee, so lots of stairs could be a problem for him.",
+]
+
+
+class ChattyModel:
+    """Collection model that never finds the budget, so the conversation never leaves collection."""
+
+    def with_structured_output(self, schema):
+        class Structured:
+            async def ainvoke(self, messages, config=None):
+                return schema(reply="That sounds lovely! I still need your budget per person before I can start researching.")
+
+        return Structured()
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    monkeypatch.setattr(speculative_research, "SPECULATIVE_RESEARCH", False)
+    monkeypatch.setattr(history_compaction, "HISTORY_COMPACTION", True)
+    llm_registry.set_chat_model_factory(lambda name, temperature: ChattyModel())
+    yield supervisor.build_graph(checkpointer=InMemorySessionStore())
+    llm_registry.set_chat_model_factory(None)
+
+
+def test_kept_history_stays_within_the_token_limit_plus_one_turn(graph):
+    config = {"configurable": {"thread_id": "long-chat"}}
+
+    async def scenario() -> list[tuple[int, int]]:
+        sizes = []
+        for turn in range(80):
+            message = HumanMessage(content=f"{USER_MESSAGES[turn % len(USER_MESSAGES)]} (message {turn + 1})")
+            await graph.ainvoke({"messages": [message]}, config=config)
+            messages = (await graph.aget_state(config)).values["messages"]
+            # One turn is the user's message and the reply to it
+            sizes.append((history_tokens(messages), history_tokens([message, messages[-1]])))
+        assert history_summary(messages), "the conversation was never compacted"
+        return sizes
+
+    for kept, turn in asyncio.run(scenario()):
+        assert kept <= history_compaction.HISTORY_MAX_TOKENS + turn
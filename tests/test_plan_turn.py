@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage
+
+import src.agents.SupervisorAgent as supervisor
+import src.app.main as main
+from src.app.session_store import InMemorySessionStore
+from src.tools import late_research, llm_registry, speculative_research
+
+TRIP = {
+    "origin": "Atlanta", "destination": "Lisbon", "num_people": 2,
+    "start_date": "2026-05-01", "end_date": "2026-05-08", "budget_per_person": 2500,
+}
+
+
+class FakePlannerModel:
+    """Collection turns that find the whole trip, and a fixed synthesized plan."""
+
+    def with_structured_output(self, schema):
+        class Structured:
+            async def ainvoke(self, messages, config=None):
+                return schema(reply="Starting research!", **TRIP)
+
+        return Structured()
+
+    async def astream(self, messages, config=None):
+        yield AIMessageChunk(content="Your Lisbon plan")
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    monkeypatch.setattr(speculative_research, "SPECULATIVE_RESEARCH", False)
+    # No research agents, so resumed runs go straight to budget and synthesis
+    monkeypatch.setattr(supervisor, "AGENTS", [])
+    llm_registry.set_chat_model_factory(lambda name, temperature: FakePlannerModel())
+    graph = supervisor.build_graph(checkpointer=InMemorySessionStore())
+    monkeypatch.setattr(main, "travel_graph", graph)
+    yield graph
+    llm_registry.set_chat_model_factory(None)
+
+
+async def _turn(session_id: str, message: str):
+    async for _ in main._run_turn(main.MessageRequest(message=message, session_id=session_id), stream_mode="updates"):
+        pass
+    return await main._load_session(session_id)
+
+
+def test_message_to_an_interrupted_run_is_kept_and_the_run_resumed(graph):
+    config = main._graph_config("s")
+
+    async def scenario():
+        # A run paused before research (e.g. the API restarted mid-turn)
+        await graph.ainvoke({"messages": [HumanMessage(content="A trip to Lisbon please")]}, config=config)
+        assert (await graph.aget_state(config)).next == ("dispatch",)
+        return await _turn("s", "Hello, are you still there?")
+
+    state = asyncio.run(scenario())
+    assert state.final_plan == "Your Lisbon plan"
+    assert [m.content for m in state.messages if m.type == "human"] == ["A trip to Lisbon please", "Hello, are you still there?"]
+    assert state.messages[-1].content == "Your Lisbon plan"
+
+
+def test_new_session_plans_in_one_turn(graph):
+    state = asyncio.run(_turn("t", "A trip to Lisbon please"))
+    assert state.final_plan == "Your Lisbon plan"
+
+
+def test_failed_agents_use_dispatch_names_so_follow_ups_clear_them(graph, monkeypatch):
+    async def flights_agent(state):
+        return {"research": {"flights": []}, "failed_agents": ["FlightsAgent"]}
+
+    monkeypatch.setattr(supervisor, "AGENTS", [("flights_agent", flights_agent)])
+
+    async def scenario():
+        planned = await _turn("f", "A trip to Lisbon please")
+        # A later run of the agent succeeds and is patched into the session
+        update = {"research": {"flights": []}, "failed_agents": []}
+        late_research.track("f", {"flights_agent": asyncio.ensure_future(asyncio.sleep(0, result=("flights_agent", update)))})
+        async for _ in main._follow_up("f"):
+            pass
+        return planned, await main._load_session("f")
+
+    planned, patched = asyncio.run(scenario())
+    assert planned.failed_agents == ["flights_agent"]
+    assert patched.failed_agents == []
+
+
+def test_synthesis_lists_partial_results_apart_from_missing_ones(graph, monkeypatch):
+    flight = {"airline": "TAP", "departure_time": "08:00", "arrival_time": "21:00", "price": 640, "origin": "ATL", "destination": "LIS"}
+
+    async def flights_agent(state):
+        # Best options found before the extraction deadline
+        return {"research": {"flights": [flight]}, "failed_agents": ["FlightsAgent"]}
+
+    async def hotels_agent(state):
+        return {"research": {"hotels": []}, "failed_agents": ["HotelsAgent"]}
+
+    class RecordingPlannerModel(FakePlannerModel):
+        async def astream(self, messages, config=None):
+            contexts.append(messages[-1].content)
+            yield AIMessageChunk(content="Your Lisbon plan")
+
+    contexts = []
+    monkeypatch.setattr(supervisor, "AGENTS", [("flights_agent", flights_agent), ("hotels_agent", hotels_agent)])
+    llm_registry.set_chat_model_factory(lambda name, temperature: RecordingPlannerModel())
+    state = asyncio.run(_turn("p", "A trip to Lisbon please"))
+    assert sorted(state.failed_agents) == ["flights_agent", "hotels_agent"]
+    assert "FAILED AGENTS (no data available for these):\nhotels_agent\n" in contexts[0]
+    assert "PARTIAL RESULTS (incomplete, low-confidence data for these):\nflights_agent\n" in contexts[0]
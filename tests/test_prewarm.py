@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+import src.app.prewarm as prewarm
+from src.app.prewarm import PrewarmScheduler, _parse_hours
+from src.tools import cache, research_cache, research_queue
+from src.tools.cache import MemoryCache, SQLiteCache
+from src.tools.env_config import env_value
+
+
+@pytest.fixture
+def queue_on(monkeypatch, tmp_path):
+    # The SQLite cache path is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cache, "_caches", {})
+    monkeypatch.delenv("RESEARCH_CACHE_BACKEND", raising=False)
+    monkeypatch.setenv("CACHE_BACKEND", "memory")
+    monkeypatch.setattr(research_queue, "RESEARCH_QUEUE", True)
+    monkeypatch.setattr(prewarm, "RESEARCH_QUEUE", True)
+
+
+@pytest.mark.parametrize("window, hours", [("1-6", (1, 6)), ("22-5", (22, 5)), ("0-24", (0, 24))])
+def test_parse_hours(window, hours):
+    assert _parse_hours(window) == hours
+
+
+@pytest.mark.parametrize("raw", ["1to6", "1-6-8", "night", "22-25", "-1-5"])
+def test_malformed_off_peak_hours_fall_back_to_any_time(monkeypatch, raw):
+    monkeypatch.setenv("PREWARM_OFF_PEAK_HOURS", raw)
+    assert env_value("PREWARM_OFF_PEAK_HOURS", None, _parse_hours) is None
+
+
+def test_zero_rate_disables_prewarming():
+    scheduler = PrewarmScheduler(active_requests=lambda: 0, destinations=["Lisbon"], runs_per_hour=0)
+    assert not scheduler.enabled
+    assert asyncio.run(scheduler.run_once()) == 0
+
+
+def test_research_cache_is_shared_with_the_workers_when_queued(queue_on):
+    assert isinstance(research_cache.get_research_cache(), SQLiteCache)
+    assert PrewarmScheduler(active_requests=lambda: 0, destinations=["Lisbon"]).enabled
+
+
+def test_queued_prewarming_needs_a_shared_cache(queue_on, monkeypatch):
+    monkeypatch.setenv("RESEARCH_CACHE_BACKEND", "memory")
+    assert isinstance(research_cache.get_research_cache(), MemoryCache)
+    assert not PrewarmScheduler(active_requests=lambda: 0, destinations=["Lisbon"]).enabled
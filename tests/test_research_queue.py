@@ -0,0 +1,100 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src.models.TripRequest import TripRequest
+from src.models.TripState import TripState
+from src.tools import research_queue
+from src.tools.research_queue import ResearchQueue, run_research
+
+TRIP = TripRequest(origin="Atlanta", destination="Lisbon", num_people=2, start_date="2026-05-01", end_date="2026-05-08", budget_per_person=2500)
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    queue = ResearchQueue(str(tmp_path / "queue.sqlite3"))
+    monkeypatch.setattr(research_queue, "get_research_queue", lambda: queue)
+    monkeypatch.setattr(research_queue, "RESEARCH_QUEUE_POLL_SECONDS", 0.01)
+    return queue
+
+
+async def _unused_agent(state):
+    raise AssertionError("queued research must not run in the API process")
+
+
+def _work_one(queue: ResearchQueue, update: dict):
+    """A stand-in worker: claim the next job and complete it."""
+    while (job := queue.claim("test-worker")) is None:
+        time.sleep(0.01)
+    queue.complete(job.id, "test-worker", update)
+
+
+def test_run_research_returns_the_worker_result(queue):
+    worker = threading.Thread(target=_work_one, args=(queue, {"research": {"hotels": []}}))
+    worker.start()
+    update = asyncio.run(run_research("hotels_agent", _unused_agent, TripState(trip_request=TRIP), "session"))
+    worker.join()
+    assert update == {"research": {"hotels": []}}
+    assert queue.session_jobs("session")[0]["status"] == "done"
+
+
+def _hold_write_lock(path: str, locked: threading.Event, seconds: float):
+    """Another writer: take the database's write lock for `seconds`, on one connection in this thread."""
+    blocker = sqlite3.connect(path, isolation_level=None)
+    try:
+        blocker.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(seconds)
+        blocker.rollback()
+    finally:
+        blocker.close()
+
+
+def test_locked_database_does_not_block_the_event_loop(queue):
+    locked = threading.Event()
+    blocker = threading.Thread(target=_hold_write_lock, args=(queue.path, locked, 0.5))
+    blocker.start()
+    assert locked.wait(5)
+    # Daemon, so a failed assertion before any job exists can't leave it spinning
+    worker = threading.Thread(target=_work_one, args=(queue, {"research": {}}), daemon=True)
+
+    async def scenario():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        research = asyncio.create_task(run_research("hotels_agent", _unused_agent, TripState(trip_request=TRIP), "session"))
+        await asyncio.sleep(0.3)
+        # The enqueue is still waiting on the lock, but the loop kept running
+        assert not research.done() and ticks >= 10
+        worker.start()
+        update = await research
+        ticker.cancel()
+        await asyncio.to_thread(worker.join)
+        return update
+
+    try:
+        assert asyncio.run(scenario()) == {"research": {}}
+    finally:
+        blocker.join()
+
+
+def test_cancelled_wait_cancels_the_queued_job(queue):
+    async def scenario():
+        research = asyncio.create_task(run_research("hotels_agent", _unused_agent, TripState(trip_request=TRIP), "session"))
+        await asyncio.sleep(0.1)
+        research.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await research
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert queue.session_jobs("session")[0]["status"] == "cancelled"
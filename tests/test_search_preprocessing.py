@@ -0,0 +1,21 @@
+from src.tools.search_preprocessing import estimate_tokens, fit_to_budget, preprocess_results
+
+
+def test_keeps_the_best_snippets_in_original_order():
+    snippets = ["a" * 40, "b" * 40, "c" * 40]
+    assert fit_to_budget(snippets, [1.0, 3.0, 2.0], token_budget=22) == ["b" * 40, "c" * 40]
+
+
+def test_oversized_snippet_is_cut_to_fit():
+    snippet = "word " * 2000
+    kept = fit_to_budget([snippet], [1.0], token_budget=100)
+    assert len(kept) == 1
+    assert 0 < estimate_tokens(kept[0]) + 1 <= 100
+    assert snippet.startswith(kept[0])
+
+
+def test_text_without_sentence_breaks_is_never_emptied():
+    raw = " ".join(f"hotel{i} lisbon $120 per night" for i in range(1200))
+    processed = preprocess_results(raw, "hotels in lisbon", "HotelsAgent", token_budget=500)
+    assert processed
+    assert estimate_tokens(processed) <= 500
@@ -0,0 +1,134 @@
+import asyncio
+import operator
+import sqlite3
+import threading
+import time
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from src.app.session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+class CounterState(TypedDict):
+    turns: Annotated[list, operator.add]
+    last: str
+
+
+def _graph(store):
+    graph = StateGraph(CounterState)
+    graph.add_node("step", lambda state: {"turns": [len(state["turns"]) + 1], "last": f"turn {len(state['turns']) + 1}"})
+    graph.add_edge(START, "step")
+    graph.add_edge("step", END)
+    return graph.compile(checkpointer=store)
+
+
+def _run(graph, thread_id: str, turns: int = 1) -> dict:
+    config = {"configurable": {"thread_id": thread_id}}
+    for _ in range(turns):
+        graph.invoke({"turns": []}, config=config)
+    return graph.get_state(config).values
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "memory":
+            return InMemorySessionStore(**kwargs)
+        return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), **kwargs)
+    return make
+
+
+def test_sessions_resume_from_their_checkpoint(make_store):
+    graph = _graph(make_store())
+    assert _run(graph, "a", turns=3) == {"turns": [1, 2, 3], "last": "turn 3"}
+    assert _run(graph, "b") == {"turns": [1], "last": "turn 1"}
+
+
+def test_in_memory_store_keeps_only_the_latest_checkpoint():
+    store = InMemorySessionStore()
+    graph = _graph(store)
+    _run(graph, "a", turns=20)
+    assert sum(len(checkpoints) for checkpoints in store.storage["a"].values()) == 1
+    # One blob per channel: the versions older checkpoints referenced are gone
+    assert len(store.blobs) == len({key[2] for key in store.blobs})
+    assert len(store.writes) <= 1
+    assert _run(graph, "a")["turns"] == list(range(1, 22))
+
+
+def test_least_recently_used_sessions_are_evicted(make_store):
+    store = make_store(max_sessions=2)
+    graph = _graph(store)
+    for thread_id in ("a", "b", "a", "c"):
+        _run(graph, thread_id)
+    assert store.session_count() == 2
+    assert _run(graph, "b")["turns"] == [1]
+
+
+def test_idle_sessions_are_swept_on_write(make_store, monkeypatch):
+    store = make_store(ttl=60)
+    graph = _graph(store)
+    _run(graph, "idle")
+    started = time.time()
+    monkeypatch.setattr(time, "time", lambda: started + 120)
+    _run(graph, "active")
+    assert store.session_count() == 1
+    if isinstance(store, InMemorySessionStore):
+        assert "idle" not in store.storage and all(key[0] != "idle" for key in store.blobs)
+
+
+def test_async_turns_resume_from_their_checkpoint(make_store):
+    graph = _graph(make_store())
+    config = {"configurable": {"thread_id": "a"}}
+
+    async def scenario():
+        for _ in range(3):
+            await graph.ainvoke({"turns": []}, config=config)
+        return (await graph.aget_state(config)).values
+
+    assert asyncio.run(scenario()) == {"turns": [1, 2, 3], "last": "turn 3"}
+
+
+def _hold_write_lock(path: str, locked: threading.Event, seconds: float):
+    """Another uvicorn worker's write: hold the lock for `seconds`, on one connection in this thread."""
+    blocker = sqlite3.connect(path, isolation_level=None)
+    try:
+        blocker.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(seconds)
+        blocker.rollback()
+    finally:
+        blocker.close()
+
+
+def test_sqlite_store_waits_for_a_locked_database_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    graph = _graph(SQLiteSessionStore(path))
+    locked = threading.Event()
+    blocker = threading.Thread(target=_hold_write_lock, args=(path, locked, 0.5))
+    blocker.start()
+    assert locked.wait(5)
+
+    async def scenario():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        turn = asyncio.create_task(graph.ainvoke({"turns": []}, config={"configurable": {"thread_id": "a"}}))
+        await asyncio.sleep(0.3)
+        # The checkpoint write is still waiting on the lock, but the loop kept running
+        assert not turn.done() and ticks >= 10
+        result = await turn
+        ticker.cancel()
+        return result
+
+    try:
+        assert asyncio.run(scenario())["turns"] == [1]
+    finally:
+        blocker.join()
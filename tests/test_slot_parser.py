@@ -0,0 +1,129 @@
+from datetime import date
+
+import pytest
+
+from src.tools.slot_parser import normalize_date, parse_slots
+
+TODAY = date(2026, 3, 10)
+
+
+def test_parses_a_full_request():
+    slots, understood = parse_slots("From Atlanta to Lisbon, 2026-05-01 to 2026-05-08, 4 people, $2,500 each", today=TODAY)
+    assert slots == {
+        "origin": "Atlanta", "destination": "Lisbon", "start_date": "2026-05-01", "end_date": "2026-05-08",
+        "num_people": 4, "budget_per_person": 2500.0,
+    }
+    assert understood
+
+
+@pytest.mark.parametrize("text, origin, destination", [
+    ("from New York to Paris", "New York", "Paris"),
+    ("We fly from Boston to Madrid", "Boston", "Madrid"),
+    ("from Paris to Rome May 3", "Paris", "Rome"),
+    ("from Sunnyvale to Santa Fe", "Sunnyvale", "Santa Fe"),
+])
+def test_route(text, origin, destination):
+    slots, _ = parse_slots(text, today=TODAY)
+    assert (slots["origin"], slots["destination"]) == (origin, destination)
+
+
+@pytest.mark.parametrize("text", [
+    "We're free from Monday to Friday",
+    "from Christmas to New Year's",
+    "from Thanksgiving to Sunday",
+    "from March to April",
+    "from Tomorrow to Saturday",
+])
+def test_time_ranges_are_not_routes(text):
+    slots, understood = parse_slots(text, today=TODAY)
+    assert "origin" not in slots and "destination" not in slots
+    assert not understood
+
+
+@pytest.mark.parametrize("text, start, end", [
+    ("May 1 to May 8", "2026-05-01", "2026-05-08"),
+    ("3rd of June until the 10th of June", "2026-06-03", "2026-06-10"),
+    ("1/15 - 1/20", "2027-01-15", "2027-01-20"),
+    ("4/2/27 to 4/9/27", "2027-04-02", "2027-04-09"),
+])
+def test_dates_are_iso(text, start, end):
+    slots, _ = parse_slots(text, today=TODAY)
+    assert (slots["start_date"], slots["end_date"]) == (start, end)
+
+
+def test_single_date_fills_the_open_end():
+    slots, understood = parse_slots("returning June 9", known={"start_date": "2026-06-01"}, today=TODAY)
+    assert slots == {"end_date": "2026-06-09"}
+    assert understood
+
+
+def test_single_date_with_both_ends_open_is_ambiguous():
+    slots, understood = parse_slots("June 9", today=TODAY)
+    assert "start_date" not in slots and "end_date" not in slots
+    assert not understood
+
+
+@pytest.mark.parametrize("text, people", [("just me", 1), ("me and my wife", 2), ("three of us", 3), ("6 adults", 6)])
+def test_party_size(text, people):
+    assert parse_slots(text, today=TODAY)[0]["num_people"] == people
+
+
+def test_group_budget_is_split_per_person():
+    slots, understood = parse_slots("$4k total", known={"num_people": 4}, today=TODAY)
+    assert slots == {"budget_per_person": 1000.0}
+    assert understood
+
+
+def test_group_budget_without_party_size_is_ambiguous():
+    slots, understood = parse_slots("$4k total", today=TODAY)
+    assert "budget_per_person" not in slots
+    assert not understood
+
+
+def test_unexplained_words_need_the_llm():
+    slots, understood = parse_slots("4 people, and we love street food", today=TODAY)
+    assert slots == {"num_people": 4}
+    assert not understood
+
+
+@pytest.mark.parametrize("text, iso", [
+    ("2026-05-01", "2026-05-01"),
+    ("2026-05-01T00:00:00", "2026-05-01"),
+    ("May 1, 2026", "2026-05-01"),
+    ("1st of May", "2026-05-01"),
+    ("5/1/26", "2026-05-01"),
+])
+def test_normalize_date(text, iso):
+    assert normalize_date(text, today=TODAY) == iso
+
+
+@pytest.mark.parametrize("text", ["next week", "May 1 to May 8", "2026-02-30", ""])
+def test_normalize_date_rejects_anything_but_one_valid_date(text):
+    assert normalize_date(text, today=TODAY) is None
+
+
+def test_yearless_return_date_follows_the_departure():
+    # Sent on May 5: May 1 has passed this year, so the whole trip is next year
+    slots, understood = parse_slots("May 1 to May 8", today=date(2026, 5, 5))
+    assert (slots["start_date"], slots["end_date"]) == ("2027-05-01", "2027-05-08")
+    assert understood
+
+
+def test_yearless_range_across_new_year():
+    slots, _ = parse_slots("Dec 28 to Jan 4", today=TODAY)
+    assert (slots["start_date"], slots["end_date"]) == ("2026-12-28", "2027-01-04")
+
+
+def test_single_return_date_follows_the_known_departure():
+    slots, _ = parse_slots("back on May 8", known={"start_date": "2027-05-01"}, today=date(2026, 5, 5))
+    assert slots == {"end_date": "2027-05-08"}
+
+
+@pytest.mark.parametrize("text, known", [
+    ("2026-05-08 to 2026-05-01", {}),
+    ("leaving June 20", {"end_date": "2026-06-10"}),
+])
+def test_return_before_departure_needs_the_llm(text, known):
+    slots, understood = parse_slots(text, known=known, today=TODAY)
+    assert "start_date" not in slots and "end_date" not in slots
+    assert not understood